@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TodoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "todo"
+
+    def ready(self):
+        # Connect signals invalidating cached profiles, keeping shards and
+        # the feed of public lists.
+        from . import cache, feed, sharding  # noqa: F401
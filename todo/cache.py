@@ -0,0 +1,169 @@
+"""Public profiles cached by a version per user.
+
+A profile is built once per version of its user and served from the cache
+after that, username lookup included, so it costs no query until the user
+changes what it shows. The version is bumped once the transaction making
+the change commits:
+
+- creating, deleting, renaming or (un)publishing a public list;
+- renaming or deleting the user.
+
+Payloads of older versions just age out. Versions, usernames and payloads
+live in the `profiles` cache, which every process serving or changing
+profiles must share, see `CACHES` in settings.
+
+Signals are only sent by `Model.save()` and `Model.delete()`, so callers of
+`QuerySet.update()` or `bulk_create()` changing what a profile shows have to
+call `bump_version()` themselves.
+
+Profiles are built from the primary database, as a replica lagging behind
+could store a stale payload under a new version.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ToDo
+from .sharding import shard_for_owner
+
+User = get_user_model()
+
+cache = caches["profiles"]
+
+TIMEOUT = 24 * 60 * 60
+
+
+def user_key(username: str) -> str:
+    return f"profile-user:{username}"
+
+
+def version_key(user_id: int) -> str:
+    return f"profile-version:{user_id}"
+
+
+def profile_key(user_id: int, version: int) -> str:
+    return f"profile:{user_id}:{version}"
+
+
+def get_version(user_id: int) -> int:
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def bump_version(user_id: int, using: str | None = None) -> None:
+    """Invalidate cached profile of the user, now and once committed.
+
+    The second bump drops a profile a concurrent request may have built from
+    data read before the transaction on database `using` committed.
+
+    Versions start from the clock and are replaced rather than incremented,
+    so concurrent bumps never read and write back the same number, and a
+    version evicted from the cache never comes back with a number some
+    stale payload is stored under.
+    """
+
+    def bump():
+        cache.set(version_key(user_id), time.time_ns(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump, using=using)
+
+
+def cached_profile(username: str) -> dict | None:
+    user_id = cache.get(user_key(username))
+    if user_id is None:
+        return None
+    profile = cache.get(profile_key(user_id, get_version(user_id)))
+    # The user may have been renamed since.
+    if profile is None or profile["username"] != username:
+        return None
+    return profile
+
+
+def primary(model):
+    return model._default_manager.db_manager(router.db_for_write(model))
+
+
+def find_user(username: str):
+    return primary(User).filter(username=username).values_list("pk", flat=True)
+
+
+def public_lists(user_id: int):
+    lists = ToDo.objects.using(shard_for_owner(user_id) or router.db_for_write(ToDo))
+    return lists.filter(owner_id=user_id, public=True).values("id", "title")
+
+
+def store_profile(user_id: int, username: str, version: int, lists: list) -> dict:
+    profile = {
+        "id": user_id,
+        "username": username,
+        "version": version,
+        "built_at": timezone.now(),
+        "lists": lists,
+    }
+    cache.set(user_key(username), user_id, TIMEOUT)
+    cache.set(profile_key(user_id, version), profile, TIMEOUT)
+    return profile
+
+
+def get_profile(username: str) -> dict | None:
+    """Return public profile of the user, None if there is no such user."""
+    profile = cached_profile(username)
+    if profile is not None:
+        return profile
+    user_id = find_user(username).first()
+    if user_id is None:
+        cache.delete(user_key(username))
+        return None
+    # Read before the lists, so a change committed in between bumps it.
+    version = get_version(user_id)
+    return store_profile(user_id, username, version, list(public_lists(user_id)))
+
+
+async def aget_profile(username: str) -> dict | None:
+    """Async version of `get_profile()`."""
+    profile = cached_profile(username)
+    if profile is not None:
+        return profile
+    user_id = await find_user(username).afirst()
+    if user_id is None:
+        cache.delete(user_key(username))
+        return None
+    version = get_version(user_id)
+    lists = [todo async for todo in public_lists(user_id)]
+    return store_profile(user_id, username, version, lists)
+
+
+@receiver(post_save, sender=ToDo, dispatch_uid="todo_profile_save")
+def todo_saved(sender, instance, created, using, **kwargs):
+    if instance.public or getattr(instance, "_stored_public", False):
+        bump_version(instance.owner_id, using)
+
+
+@receiver(post_delete, sender=ToDo, dispatch_uid="todo_profile_delete")
+def todo_deleted(sender, instance, using, **kwargs):
+    if instance.public:
+        bump_version(instance.owner_id, using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid="user_profile")
+def user_saved(sender, instance, using, update_fields, **kwargs):
+    # Logging in only sets `last_login`.
+    if update_fields != {"last_login"}:
+        bump_version(instance.pk, using)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL, dispatch_uid="user_delete")
+def user_deleted(sender, instance, using, **kwargs):
+    bump_version(instance.pk, using)
@@ -0,0 +1,222 @@
+"""Live changes of to-do lists streamed to browsers as Server-Sent Events.
+
+Writers publish small events to an in-process hub once their transaction
+commits. Every subscriber owns a bounded queue living on the event loop it
+listens on, and publishing only schedules a non-blocking put there, so a
+slow subscriber never holds up a writer. When a queue overflows its events
+are dropped and the subscriber is told to reload instead.
+
+The hub only reaches subscribers of the same process, so every worker
+serving writes has to serve the streams too, as a single ASGI worker does.
+"""
+
+import asyncio
+import io
+import json
+import re
+import threading
+from collections import defaultdict
+from functools import reduce
+from importlib import import_module
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signals
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+
+EVENTS_PATH = re.compile(r"^/(?P<pk>[0-9]+)/events/$")
+
+# Event telling the client to reload the whole list.
+RELOAD = {"type": "reload"}
+
+
+class Subscription:
+    """Queue of events of one list for one client."""
+
+    def __init__(self, todo_id: int, maxsize: int):
+        self.todo_id = todo_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event: dict) -> None:
+        """Queue event, called on the subscriber's loop only."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self) -> dict:
+        if self.overflowed and self.queue.empty():
+            self.overflowed = False
+            return RELOAD
+        return await self.queue.get()
+
+
+class EventHub:
+    """In-process publish/subscribe of events by to-do list id."""
+
+    def __init__(self, maxsize: int = 100):
+        self.maxsize = maxsize
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, todo_id: int) -> Subscription:
+        subscription = Subscription(todo_id, self.maxsize)
+        with self._lock:
+            self._subscriptions[todo_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.todo_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.todo_id]
+
+    def publish(self, todo_id: int, event: dict) -> None:
+        """Send event to subscribers of the list, from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(todo_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The loop is closed, the subscriber is gone.
+                pass
+
+    def publish_on_commit(
+        self, todo_id: int, event: dict, using: str | None = None
+    ) -> None:
+        """Publish once the transaction on database `using` commits.
+
+        Nothing is published if nobody listens, or if the transaction rolls
+        back. Pass the database of the list, as the default one may have no
+        transaction open and publish at once.
+        """
+        if todo_id in self._subscriptions:
+            transaction.on_commit(lambda: self.publish(todo_id, event), using=using)
+
+
+hub = EventHub()
+
+
+def entry_event(entry, action: str) -> dict:
+    return {
+        "type": "entry",
+        "action": action,
+        "id": entry.pk,
+        "text": entry.text,
+        "completed": entry.completed,
+    }
+
+
+def move_event(entry, target, after: bool) -> dict:
+    """Event of an entry put right before or after `target`."""
+    return {
+        "type": "entry",
+        "action": "moved",
+        "id": entry.pk,
+        "target": target.pk,
+        "after": after,
+    }
+
+
+def format_event(event: dict) -> bytes:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+
+
+async def can_view(scope, todo_id: int) -> bool:
+    """Check that the list is public or owned by the requesting user."""
+    from yyik_auth.auth import aget_user
+
+    from .mixins import visibility_filters
+    from .models import ToDo
+    from .sharding import candidate_shards
+
+    request = ASGIRequest(scope, io.BytesIO())
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    user = await aget_user(request)
+    visible = reduce(or_, visibility_filters(user))
+    for db in candidate_shards(todo_id):
+        if await ToDo.objects.using(db).filter(visible, pk=todo_id).aexists():
+            return True
+    return False
+
+
+async def event_stream(scope, receive, send, keepalive: float = 15) -> None:
+    """ASGI application streaming events of the list in the path."""
+    todo_id = int(EVENTS_PATH.match(scope["path"])["pk"])  # type: ignore
+    # The database is only used for the check, so the request ends there as
+    # far as Django is concerned, which lets it close the connection.
+    await sync_to_async(signals.request_started.send)(sender=None, scope=scope)
+    try:
+        allowed = scope["method"] == "GET" and await can_view(scope, todo_id)
+    finally:
+        await sync_to_async(signals.request_finished.send)(sender=None)
+    if not allowed:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 404,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"Not Found"})
+        return
+
+    subscription = hub.subscribe(todo_id)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    next_event = None
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"retry: 5000\n\n",
+                "more_body": True,
+            }
+        )
+        while not disconnected.done():
+            if next_event is None:
+                next_event = asyncio.ensure_future(subscription.get())
+            await asyncio.wait(
+                {next_event, disconnected},
+                timeout=keepalive,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if next_event.done():
+                body = format_event(next_event.result())
+                next_event = None
+            elif not disconnected.done():
+                body = b": keepalive\n\n"
+            else:
+                break
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        hub.unsubscribe(subscription)
+        for task in (next_event, disconnected):
+            if task is not None:
+                task.cancel()
+
+
+async def wait_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
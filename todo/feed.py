@@ -0,0 +1,185 @@
+"""Public lists copied into one table read by the page of all lists.
+
+Reading public lists from `ToDo` takes a scan of every shard merged with
+own lists, and a join of owners for their usernames. Public lists are
+copied instead, along with the username of their owner, into
+`PublicFeedItem` rows in the default database. Anonymous users get a page
+from a single range scan of one index, others get it merged with their own
+lists.
+
+Items follow lists through signals when lists are saved or deleted, and
+through `touch()` when entries change them. Items of lists stored in the
+database of the feed are written in the transaction of the lists, others
+once it commits, so items never show writes rolled back. Lists written in
+bulk, as by imports, are copied by `refresh()`, and `rebuild_feed` copies
+all of them again.
+"""
+
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from yyiktodo.db import write_atomic
+
+from .models import PublicFeedItem, ToDo
+from .sharding import all_shards
+
+User = get_user_model()
+
+# Fields copied from lists.
+FIELDS = [
+    "id",
+    "owner_id",
+    "title",
+    "modified_at",
+    "entry_count",
+    "completed_count",
+    "progress",
+]
+
+BATCH_SIZE = 500
+
+
+def feed_db() -> str:
+    return router.db_for_write(PublicFeedItem)
+
+
+def with_lists(func, using: str | None) -> None:
+    """Run `func` writing items in the transaction of lists on `using`.
+
+    Transactions can't span databases, so for lists stored apart from the
+    feed `func` waits for theirs to commit.
+    """
+    if (using or DEFAULT_DB_ALIAS) == feed_db():
+        func()
+    else:
+        transaction.on_commit(func, using=using)
+
+
+def is_listed(todo) -> bool:
+    return todo.public and todo.deleted_at is None
+
+
+def item_for(todo: ToDo, username: str) -> PublicFeedItem:
+    return PublicFeedItem(
+        owner_username=username, **{name: getattr(todo, name) for name in FIELDS}
+    )
+
+
+def store(items: list[PublicFeedItem]) -> None:
+    """Insert items, replacing ones of the same lists."""
+    PublicFeedItem.objects.using(feed_db()).bulk_create(
+        items,
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=[*FIELDS[1:], "owner_username"],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def refresh(lists: QuerySet) -> int:
+    """Copy lists of the queryset to the feed again, return how many are public.
+
+    Items of lists which are not public or deleted are removed, pass
+    `ToDo.all_objects` to remove those of deleted lists too.
+    """
+    feed = PublicFeedItem.objects.using(feed_db())
+    listed = last_pk = 0
+    while True:
+        batch = list(
+            lists.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values(*FIELDS, "public", "deleted_at")[:BATCH_SIZE]
+        )
+        if not batch:
+            return listed
+        last_pk = batch[-1]["id"]
+        rows = [row for row in batch if row["public"] and row["deleted_at"] is None]
+        usernames = dict(
+            User.objects.filter(pk__in={row["owner_id"] for row in rows}).values_list(
+                "pk", "username"
+            )
+        )
+        rows = [row for row in rows if row["owner_id"] in usernames]
+        listed_ids = {row["id"] for row in rows}
+        feed.filter(
+            pk__in=[row["id"] for row in batch if row["id"] not in listed_ids]
+        ).delete()
+        store(
+            [
+                PublicFeedItem(
+                    owner_username=usernames[row["owner_id"]],
+                    **{name: row[name] for name in FIELDS},
+                )
+                for row in rows
+            ]
+        )
+        listed += len(rows)
+
+
+def rebuild() -> int:
+    """Copy all public lists to an emptied feed, return their number."""
+    with write_atomic(using=feed_db()):
+        PublicFeedItem.objects.using(feed_db()).all().delete()
+        return sum(
+            refresh(ToDo.objects.using(alias).filter(public=True))
+            for alias in all_shards()
+        )
+
+
+@receiver(post_save, sender=ToDo, dispatch_uid="todo_feed_save")
+def todo_saved(sender, instance, **kwargs):
+    if is_listed(instance):
+        # Copied now, the instance may change before the transaction commits.
+        item = item_for(instance, "")
+        if ToDo.owner.is_cached(instance):  # type: ignore
+            item.owner_username = instance.owner.username
+        with_lists(partial(list_item, item), instance._state.db)
+    elif instance.public or getattr(instance, "_stored_public", False):
+        with_lists(partial(unlist_item, instance.pk), instance._state.db)
+
+
+@receiver(post_delete, sender=ToDo, dispatch_uid="todo_feed_delete")
+def todo_deleted(sender, instance, **kwargs):
+    if instance.public:
+        with_lists(partial(unlist_item, instance.pk), instance._state.db)
+
+
+def list_item(item: PublicFeedItem) -> None:
+    # Counters are only changed by touches, which update items too.
+    updated = (
+        PublicFeedItem.objects.using(feed_db())
+        .filter(pk=item.pk)
+        .update(title=item.title, modified_at=item.modified_at)
+    )
+    if not updated:
+        if not item.owner_username:
+            item.owner_username = User.objects.get(pk=item.owner_id).username
+        store([item])
+
+
+def unlist_item(todo_id: int) -> None:
+    PublicFeedItem.objects.using(feed_db()).filter(pk=todo_id).delete()
+
+
+@receiver(post_save, sender=User, dispatch_uid="todo_feed_user_save")
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save `last_login` only.
+    if created or update_fields is not None and "username" not in update_fields:
+        return
+    # Pages of the feed are validated by keys of their items, which have to
+    # change with the username shown.
+    items = PublicFeedItem.objects.using(feed_db()).filter(owner_id=instance.pk)
+    items.exclude(owner_username=instance.username).update(
+        owner_username=instance.username, modified_at=timezone.now()
+    )
+
+
+@receiver(pre_delete, sender=User, dispatch_uid="todo_feed_user_delete")
+def user_deleted(sender, instance, **kwargs):
+    PublicFeedItem.objects.using(feed_db()).filter(owner_id=instance.pk).delete()
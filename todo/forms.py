@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Entry
+from .models import Entry, ToDo
 
 
 class EntryForm(forms.ModelForm):
@@ -13,3 +13,117 @@ class EntryForm(forms.ModelForm):
     class Meta:
         model = Entry
         fields = ["text"]
+
+
+class EntryBulkForm(forms.Form):
+    """Apply one action to many entries of a list at once."""
+
+    ADD = "add"
+    COMPLETE = "complete"
+    UNCOMPLETE = "uncomplete"
+    DELETE = "delete"
+    CLEAR = "clear"
+    SELECTION_ACTIONS = (COMPLETE, UNCOMPLETE, DELETE)
+    MAX_ENTRIES = 500
+
+    action = forms.ChoiceField(
+        choices=[
+            (ADD, "Add"),
+            (COMPLETE, "Mark completed"),
+            (UNCOMPLETE, "Mark not completed"),
+            (DELETE, "Delete selected"),
+            (CLEAR, "Clear completed"),
+        ]
+    )
+    text = forms.CharField(
+        required=False,
+        label="",
+        widget=forms.Textarea(attrs={"rows": 3, "placeholder": "One entry per line"}),
+    )
+    entries = forms.Field(required=False, widget=forms.MultipleHiddenInput)
+
+    def clean_text(self) -> list[str]:
+        texts = [line.strip() for line in self.cleaned_data["text"].splitlines()]
+        texts = [text for text in texts if text]
+        if len(texts) > self.MAX_ENTRIES:
+            raise forms.ValidationError(
+                f"No more than {self.MAX_ENTRIES} entries at once."
+            )
+        for text in texts:
+            if not 2 <= len(text) <= 200:
+                raise forms.ValidationError(
+                    f'"{text[:20]}" must be from 2 to 200 characters long.'
+                )
+        return texts
+
+    def clean_entries(self) -> list[int]:
+        try:
+            return [int(pk) for pk in self.cleaned_data["entries"] or []]
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid entry selection.")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        if action == self.ADD and not cleaned_data.get("text"):
+            self.add_error("text", "Enter at least one entry.")
+        if action in self.SELECTION_ACTIONS and not cleaned_data.get("entries"):
+            self.add_error("entries", "Select at least one entry.")
+        return cleaned_data
+
+    def save(self, todo: ToDo) -> int:
+        """Apply the action to `todo` and return number of affected entries."""
+        action = self.cleaned_data["action"]
+        if action == self.ADD:
+            return len(todo.add_entries(self.cleaned_data["text"]))
+        if action in (self.COMPLETE, self.UNCOMPLETE):
+            completed = action == self.COMPLETE
+            return todo.set_entries_completed(self.cleaned_data["entries"], completed)
+        if action == self.DELETE:
+            return todo.delete_entries(self.cleaned_data["entries"])
+        return todo.delete_entries(completed=True)
+
+
+class EntryMoveForm(forms.Form):
+    """Pick another entry of the same list to move an entry next to."""
+
+    before = forms.IntegerField(required=False)
+    after = forms.IntegerField(required=False)
+
+    def __init__(self, *args, entry: Entry, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.entry = entry
+
+    def clean(self):
+        cleaned_data = super().clean()
+        before, after = cleaned_data.get("before"), cleaned_data.get("after")
+        if (before is None) == (after is None):
+            raise forms.ValidationError("Give either `before` or `after` entry.")
+        target_id = after if before is None else before
+        if target_id == self.entry.pk:
+            raise forms.ValidationError("An entry can't be moved next to itself.")
+        target = self.entry.todo.entries.only("position").filter(pk=target_id).first()
+        if target is None:
+            raise forms.ValidationError("No such entry in the list.")
+        cleaned_data["target"] = target
+        return cleaned_data
+
+    def save(self) -> Entry:
+        self.entry.move(
+            self.cleaned_data["target"], after=self.cleaned_data["after"] is not None
+        )
+        return self.entry
+
+
+class EntryToggleForm(forms.Form):
+    """Mark one entry completed or not completed."""
+
+    completed = forms.BooleanField(required=False)
+
+    def __init__(self, *args, entry: Entry, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.entry = entry
+
+    def save(self) -> Entry:
+        self.entry.set_completed(self.cleaned_data["completed"])
+        return self.entry
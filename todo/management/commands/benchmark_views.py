@@ -0,0 +1,281 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+import yyik_auth.urls
+from yyiktodo.db import write_atomic
+
+from ... import urls as todo_urls
+from ...models import Entry, ToDo
+from ...sharding import all_shards, with_owners
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to undo writes of a request after measuring it."""
+
+
+@dataclass
+class Scenario:
+    """How to request a route with objects picked from the dataset."""
+
+    method: str = "get"
+    login: bool = False
+    args: Callable[[dict], tuple] = lambda objects: ()
+    data: Callable[[dict], dict] = lambda objects: {}
+    # Writes are rolled back so every iteration sees the same data.
+    write: bool = False
+    status: set[int] = field(default_factory=lambda: {200})
+
+
+SCENARIOS = {
+    "todo:todo-list": Scenario(),
+    "todo:todo-list-my": Scenario(login=True),
+    "todo:todo-create": Scenario(login=True),
+    "todo:todo-detail": Scenario(args=lambda o: (o["todo"].pk,)),
+    "todo:todo-edit": Scenario(login=True, args=lambda o: (o["todo"].pk,)),
+    "todo:todo-delete": Scenario(login=True, args=lambda o: (o["todo"].pk,)),
+    "todo:entry-create": Scenario(
+        method="post",
+        login=True,
+        args=lambda o: (o["todo"].pk,),
+        data=lambda o: {"text": "Benchmark entry"},
+        write=True,
+        status={302},
+    ),
+    "todo:entry-bulk": Scenario(
+        method="post",
+        login=True,
+        args=lambda o: (o["todo"].pk,),
+        data=lambda o: {"action": "complete", "entries": o["entry_ids"]},
+        write=True,
+        status={302},
+    ),
+    "todo:entry-edit": Scenario(login=True, args=lambda o: (o["entry"].pk,)),
+    "todo:entry-delete": Scenario(login=True, args=lambda o: (o["entry"].pk,)),
+    "todo:entry-move": Scenario(
+        method="post",
+        login=True,
+        args=lambda o: (o["entry"].pk,),
+        data=lambda o: {"after": o["entry_ids"][-1]},
+        write=True,
+        status={302},
+    ),
+    "todo:entry-toggle": Scenario(
+        method="post",
+        login=True,
+        args=lambda o: (o["entry"].pk,),
+        data=lambda o: {"completed": "on"},
+        write=True,
+        status={302},
+    ),
+    "todo:search": Scenario(data=lambda o: {"q": o["entry"].text.split()[0]}),
+    "todo:profile": Scenario(args=lambda o: (o["owner"].username,)),
+    "todo:api-lists": Scenario(data=lambda o: {"ids": o["list_ids"]}),
+    "auth:register": Scenario(),
+    "auth:login": Scenario(),
+    "auth:logout": Scenario(status={302}),
+}
+
+
+def route_names() -> list[str]:
+    return [
+        f"{module.app_name}:{pattern.name}"
+        for module in (todo_urls, yyik_auth.urls)
+        for pattern in module.urlpatterns
+        if isinstance(pattern, URLPattern)
+    ]
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    ordered = sorted(values)
+    return ordered[round((len(ordered) - 1) * quantile)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every route of the todo and auth apps with the test client and "
+        "report latency percentiles and query counts. Results saved with "
+        "`--output` can be compared with `--compare` to catch regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=50, help="Measured requests per route."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5, help="Unmeasured requests per route."
+        )
+        parser.add_argument(
+            "--routes", nargs="*", help="Route names to run, all by default."
+        )
+        parser.add_argument("--output", help="JSON file to save results to.")
+        parser.add_argument("--compare", help="JSON file of an earlier run.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative p50 slowdown reported as regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with error if some route regressed.",
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(
+                "DEBUG is on, run with YYIKTODO_DEBUG=0 for production numbers."
+            )
+        missing = [name for name in route_names() if name not in SCENARIOS]
+        if missing:
+            raise CommandError(f"No benchmark scenario for {', '.join(missing)}.")
+        names = options["routes"] or route_names()
+        unknown = set(names) - SCENARIOS.keys()
+        if unknown:
+            raise CommandError(f"Unknown routes {', '.join(sorted(unknown))}.")
+
+        try:
+            # Lets the test client through ALLOWED_HOSTS.
+            setup_test_environment()
+        except RuntimeError:
+            # Already set up by the test runner.
+            pass
+        objects = self.pick_objects()
+        results = {
+            name: self.run(name, SCENARIOS[name], objects, options) for name in names
+        }
+        self.report(results)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump({"meta": self.meta(), "routes": results}, file, indent=2)
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                previous = json.load(file)["routes"]
+            regressions = self.compare(previous, results, options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{regressions} routes regressed.")
+
+    def pick_objects(self) -> dict:
+        """Pick the longest public list, its owner and some of its entries."""
+        todo = (
+            with_owners(ToDo.objects.filter(public=True, entry_count__gt=0))
+            .order_by("-entry_count", "pk")
+            .first()
+        )
+        if todo is None:
+            raise CommandError("No public list with entries, run `generate_data`.")
+        entries = list(todo.entries.order_by(*Entry.ORDERING)[:20])  # type: ignore
+        return {
+            "todo": todo,
+            "owner": todo.owner,
+            "entry": entries[0],
+            "entry_ids": [entry.pk for entry in entries],
+            "list_ids": ",".join(
+                str(pk)
+                for pk in ToDo.objects.filter(public=True).values_list("pk", flat=True)[
+                    :50
+                ]
+            ),
+        }
+
+    def run(self, name: str, scenario: Scenario, objects: dict, options) -> dict:
+        client = Client()
+        if scenario.login:
+            client.force_login(objects["owner"])
+        path = reverse(name, args=scenario.args(objects))
+        request = getattr(client, scenario.method)
+        data = scenario.data(objects)
+
+        latencies, queries = [], []
+        for iteration in range(options["warmup"] + options["iterations"]):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                try:
+                    with write_atomic() if scenario.write else nullcontext():
+                        response = request(path, data)
+                        if scenario.write:
+                            raise Rollback
+                except Rollback:
+                    pass
+                elapsed = time.perf_counter() - started
+            if response.status_code not in scenario.status:
+                raise CommandError(f"{name} answered {response.status_code}.")
+            if iteration >= options["warmup"]:
+                latencies.append(elapsed * 1000)
+                queries.append(len(captured))
+
+        return {
+            "method": scenario.method.upper(),
+            "path": path,
+            "p50_ms": round(percentile(latencies, 0.5), 3),
+            "p90_ms": round(percentile(latencies, 0.9), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "queries": max(queries),
+        }
+
+    def report(self, results: dict) -> None:
+        self.stdout.write(
+            f"{'route':<24} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'queries':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries']:>8}"
+            )
+
+    def compare(self, previous: dict, results: dict, threshold: float) -> int:
+        """Print changes against an earlier run, return number of regressions."""
+        regressions = 0
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            before = previous[name]
+            change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+            more_queries = result["queries"] > before["queries"]
+            regressed = change > threshold or more_queries
+            regressions += regressed
+            self.stdout.write(
+                f"{name:<24} p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms "
+                f"({change:+.0%}), queries {before['queries']} -> {result['queries']}"
+                + (" REGRESSION" if regressed else "")
+            )
+        return regressions
+
+    def meta(self) -> dict:
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "date": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "lists": sum(ToDo.objects.using(db).count() for db in all_shards()),
+            "entries": sum(Entry.objects.using(db).count() for db in all_shards()),
+            "users": User.objects.count(),
+        }
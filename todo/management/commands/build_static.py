@@ -0,0 +1,71 @@
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from yyiktodo.static import (
+    ASSETS,
+    CDN,
+    Asset,
+    CompressedManifestStorage,
+    integrity_of,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Download pinned third party assets into `static/vendor/`, unless they "
+        "are there already, and collect static files under hashed names with "
+        "gzip and brotli copies. Commit the vendored files to build offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Download assets again even if they are vendored.",
+        )
+        parser.add_argument(
+            "--no-collect",
+            action="store_true",
+            help="Only vendor assets, don't run `collectstatic`.",
+        )
+
+    def handle(self, *args, refresh: bool, no_collect: bool, **options):
+        vendor = Path(settings.STATICFILES_DIRS[0]) / "vendor"
+        for asset in ASSETS:
+            path = vendor / asset.path
+            if path.exists() and not refresh:
+                continue
+            data = self.download(asset)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            self.stdout.write(f"Vendored {asset.path}.")
+
+        if no_collect:
+            return
+        if not isinstance(staticfiles_storage, CompressedManifestStorage):
+            self.stderr.write(
+                "DEBUG is on, files are collected without hashes and copies. "
+                "Run with YYIKTODO_DEBUG=0 to build for production."
+            )
+        call_command(
+            "collectstatic",
+            interactive=False,
+            verbosity=options["verbosity"],
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+    def download(self, asset: Asset) -> bytes:
+        try:
+            with urllib.request.urlopen(CDN + asset.url, timeout=30) as response:
+                data = response.read()
+        except OSError as error:
+            raise CommandError(f"Can't download {asset.url}: {error}") from error
+        if asset.integrity and integrity_of(data) != asset.integrity:
+            raise CommandError(f"{asset.url} doesn't match its integrity hash.")
+        return data
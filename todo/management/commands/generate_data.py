@@ -0,0 +1,177 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...feed import item_for, store
+from ...models import Entry, ToDo
+from ...positions import spread
+from ...sharding import atomic_on_shards, shard_for_owner
+from .import_todos import preserved_timestamps
+
+User = get_user_model()
+
+WORDS = (
+    "buy milk bread eggs call mom fix bike pay rent book flight clean kitchen "
+    "water plants read chapter write report email boss walk dog renew passport "
+    "cancel gym plan trip wash car backup laptop order pizza visit dentist"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, lists and entries with skewed entry counts. "
+        "Everything is inserted with `bulk_create`, counters included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lists", type=int, default=1000, help="Number of lists to create."
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            help="Number of users owning the lists, one per 20 lists by default.",
+        )
+        parser.add_argument(
+            "--entries",
+            type=float,
+            default=10,
+            help="Mean number of entries per list, counts follow a Pareto law.",
+        )
+        parser.add_argument(
+            "--max-entries",
+            type=int,
+            default=500,
+            help="Entry count of the longest lists.",
+        )
+        parser.add_argument(
+            "--public", type=float, default=0.3, help="Share of public lists."
+        )
+        parser.add_argument(
+            "--completed",
+            type=float,
+            default=0.5,
+            help="Mean share of completed entries in a list.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--prefix", default="user", help="Prefix of generated usernames."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of lists inserted per transaction along with entries.",
+        )
+
+    def handle(self, *args, lists: int, users: int | None, **options):
+        self.random = random.Random(options["seed"])
+        self.options = options
+        started = time.monotonic()
+
+        owner_ids = self.create_users(users or max(lists // 20, 1), options["prefix"])
+        created = entries = 0
+        with preserved_timestamps():
+            while created < lists:
+                size = min(options["batch_size"], lists - created)
+                with atomic_on_shards():
+                    entries += self.create_batch(size, owner_ids)
+                created += size
+                self.stderr.write(f"{created}/{lists} lists", ending="\r")
+        self.stderr.write("")
+
+        elapsed = time.monotonic() - started
+        rows = len(owner_ids) + created + entries
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f"Created {len(owner_ids)} users, {created} lists and {entries} entries "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)."
+        )
+
+    def create_users(self, count: int, prefix: str) -> list[int]:
+        # Generated users can't log in, the password is computed once as
+        # hashing is slow on purpose.
+        password = make_password(None)
+        names = [f"{prefix}{number}" for number in range(count)]
+        User.objects.bulk_create(
+            [User(username=name, password=password) for name in names],
+            ignore_conflicts=True,
+        )
+        self.usernames = dict(
+            User.objects.filter(username__in=names).values_list("pk", "username")
+        )
+        return list(self.usernames)
+
+    def create_batch(self, size: int, owner_ids: list[int]) -> int:
+        now = timezone.now()
+        todos, counts = [], []
+        for _ in range(size):
+            created_at = now - timedelta(seconds=self.random.randrange(365 * 86400))
+            entry_count = self.entry_count()
+            completed = round(entry_count * self.completed_share())
+            todos.append(
+                ToDo(
+                    title=self.text(1, 4).capitalize(),
+                    # Squared uniform gives a few users most of the lists.
+                    owner_id=owner_ids[int(self.random.random() ** 2 * len(owner_ids))],
+                    public=self.random.random() < self.options["public"],
+                    created_at=created_at,
+                    modified_at=created_at + (now - created_at) * self.random.random(),
+                    entry_count=entry_count,
+                    completed_count=completed,
+                    progress=completed * 100 // max(entry_count, 1),
+                )
+            )
+            counts.append((entry_count, completed))
+        shard_todos = defaultdict(list)
+        for todo in todos:
+            shard_todos[shard_for_owner(todo.owner_id)].append(todo)
+        for alias, objects in shard_todos.items():
+            ToDo.objects.using(alias).bulk_create(objects)
+        if any(todo.pk is None for todo in todos):
+            raise CommandError("Database doesn't return ids of inserted rows.")
+        # Bulk inserts send no signals the feed would follow.
+        store(
+            [
+                item_for(todo, self.usernames[todo.owner_id])
+                for todo in todos
+                if todo.public
+            ]
+        )
+
+        shard_entries = defaultdict(list)
+        for todo, (entry_count, completed) in zip(todos, counts):
+            shard_entries[todo._state.db].extend(
+                Entry(
+                    todo_id=todo.pk,
+                    text=self.text(2, 6),
+                    completed=number < completed,
+                    position=position,
+                )
+                for number, position in enumerate(spread(entry_count))
+            )
+        for alias, objects in shard_entries.items():
+            Entry.objects.using(alias).bulk_create(objects, batch_size=5000)
+        return sum(map(len, shard_entries.values()))
+
+    def entry_count(self) -> int:
+        # Pareto variate with shape 1.5 minus one has mean 2, most lists are
+        # short and a few are very long.
+        count = int(self.options["entries"] / 2 * (self.random.paretovariate(1.5) - 1))
+        return min(count, self.options["max_entries"])
+
+    def completed_share(self) -> float:
+        mean = self.options["completed"]
+        if mean <= 0 or mean >= 1:
+            return min(max(mean, 0), 1)
+        return self.random.betavariate(2 * mean, 2 * (1 - mean))
+
+    def text(self, shortest: int, longest: int) -> str:
+        words = self.random.choices(WORDS, k=self.random.randint(shortest, longest))
+        return " ".join(words)
@@ -0,0 +1,274 @@
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.dateparse import parse_datetime
+
+from ...cache import bump_version
+from ...feed import item_for, store
+from ...models import Entry, ToDo
+from ...positions import START, encode_int
+from ...sharding import (
+    all_shards,
+    atomic_on_shards,
+    reset_id_sequences,
+    shard_for_owner,
+)
+
+User = get_user_model()
+
+
+@contextmanager
+def preserved_timestamps():
+    """Stop `auto_now` fields of lists from overwriting imported values.
+
+    Fields are shared by the whole process, so this is only safe in a
+    process which does nothing else, like a management command.
+    """
+    fields = [ToDo._meta.get_field("created_at"), ToDo._meta.get_field("modified_at")]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False  # type: ignore
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add  # type: ignore
+
+
+class Command(BaseCommand):
+    help = (
+        "Load NDJSON made by `export_todos`, keeping ids, owners and timestamps. "
+        "Owners are matched by username and created without password if missing. "
+        "Lists go to the shard of their owner. Rows imported already are "
+        "skipped, and the import fails on ids taken by other rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="File made by `export_todos`.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows inserted per transaction.",
+        )
+        parser.add_argument(
+            "--owner",
+            action="append",
+            dest="owners",
+            metavar="USERNAME",
+            help="Only import lists of this user, can be repeated.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "File storing the number of imported lines. If it exists the "
+                "import resumes after that line."
+            ),
+        )
+
+    def handle(self, *args, input: str, batch_size: int, checkpoint, owners, **options):
+        self.owners: dict[str, int] = {}
+        self.selected: set[str] | None = set(owners) if owners else None
+        # Shards of imported lists, which their entries go to.
+        self.todo_shards: dict[int, str | None] = {}
+        # Lists of owners not selected, whose entries are left out too.
+        self.excluded: set[int] = set()
+        self.skipped: Counter[str] = Counter()
+        done = self.read_checkpoint(checkpoint)
+        started = time.monotonic()
+        rows = 0
+
+        with open(input, encoding="utf-8") as stream, preserved_timestamps():
+            lines = islice(stream, done, None)
+            while batch := list(islice(lines, batch_size)):
+                with atomic_on_shards():
+                    rows += self.import_batch(batch, done)
+                done += len(batch)
+                self.write_checkpoint(checkpoint, done)
+
+        self.reset_sequences()
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f"Imported {rows} rows in {elapsed:.1f}s ({rate:.0f} rows/s), "
+            f"{done} lines done."
+        )
+        for reason, count in sorted(self.skipped.items()):
+            self.stdout.write(f"Skipped {count} {reason}.")
+
+    def import_batch(self, lines: list[str], offset: int) -> int:
+        """Insert rows of the lines and return their number."""
+        todos, entries = [], []
+        for number, line in enumerate(lines, offset + 1):
+            try:
+                row = json.loads(line)
+                model = row.pop("model")
+            except (ValueError, KeyError):
+                raise CommandError(f"Line {number} is not an exported row.")
+            if model == "todo":
+                todos.append(row)
+            elif model == "entry":
+                entries.append(row)
+            else:
+                raise CommandError(f"Line {number} has unknown model {model!r}.")
+
+        if self.selected is not None:
+            self.excluded.update(
+                row["id"] for row in todos if row["owner"] not in self.selected
+            )
+            todos = [row for row in todos if row["owner"] in self.selected]
+        owners = self.get_owners({row["owner"] for row in todos})
+        existing = self.existing(
+            ToDo, [row["id"] for row in todos], "owner_id", "created_at"
+        )
+        todo_objects = defaultdict(list)
+        feed_items = []
+        conflicts = []
+        for row in todos:
+            owner_id = owners[row["owner"]]
+            todo = ToDo(
+                id=row["id"],
+                owner_id=owner_id,
+                title=row["title"],
+                public=row["public"],
+                created_at=parse_datetime(row["created_at"]),
+                modified_at=parse_datetime(row["modified_at"]),
+                entry_count=row["entry_count"],
+                completed_count=row["completed_count"],
+                progress=row["progress"],
+            )
+            if todo.pk in existing:
+                alias, stored = existing[todo.pk]
+                if stored != (todo.owner_id, todo.created_at):
+                    conflicts.append(todo.pk)
+                self.todo_shards[todo.pk] = alias
+                self.skipped["lists imported already"] += 1
+                continue
+            alias = self.todo_shards[todo.pk] = shard_for_owner(owner_id)
+            todo_objects[alias].append(todo)
+            if todo.public:
+                feed_items.append(item_for(todo, row["owner"]))
+        if conflicts:
+            raise CommandError(f"Ids of lists {conflicts} are taken by other lists.")
+        for alias, objects in todo_objects.items():
+            ToDo.objects.using(alias).bulk_create(objects)
+            # Bulk inserts send no signals cached profiles would follow.
+            for owner_id in {todo.owner_id for todo in objects if todo.public}:
+                bump_version(owner_id, alias)
+        # Nor ones the feed would.
+        store(feed_items)
+
+        self.locate_lists(
+            {row["todo"] for row in entries} - self.todo_shards.keys() - self.excluded
+        )
+        entries = [row for row in entries if row["todo"] not in self.excluded]
+        existing = self.existing(Entry, [row["id"] for row in entries], "todo_id")
+        entry_objects = defaultdict(list)
+        conflicts = []
+        for row in entries:
+            if row["id"] in existing:
+                if existing[row["id"]][1] != (row["todo"],):
+                    conflicts.append(row["id"])
+                self.skipped["entries imported already"] += 1
+                continue
+            entry_objects[self.todo_shards[row["todo"]]].append(
+                Entry(
+                    id=row["id"],
+                    todo_id=row["todo"],
+                    text=row["text"],
+                    completed=row["completed"],
+                    # Older exports have no positions, entries keep id order.
+                    position=row.get("position") or encode_int(START + row["id"]),
+                )
+            )
+        if conflicts:
+            raise CommandError(
+                f"Ids of entries {conflicts} are taken by entries of other lists."
+            )
+        for alias, objects in entry_objects.items():
+            Entry.objects.using(alias).bulk_create(objects)
+        inserted = [*todo_objects.values(), *entry_objects.values()]
+        return sum(len(objects) for objects in inserted)
+
+    def existing(self, model, ids: list[int], *fields: str) -> dict:
+        """Return shards and values of `fields` of stored rows by id."""
+        found = {}
+        for alias in all_shards():
+            rows = model._base_manager.using(alias).filter(pk__in=ids)
+            for pk, *values in rows.values_list("pk", *fields):
+                found[pk] = (alias, tuple(values))
+        return found
+
+    def locate_lists(self, ids: set[int]) -> None:
+        """Find lists of entries imported before resuming from a checkpoint."""
+        if not ids:
+            return
+        selected = None
+        if self.selected is not None:
+            selected = set(
+                User.objects.filter(username__in=self.selected).values_list(
+                    "pk", flat=True
+                )
+            )
+        found = self.existing(ToDo, list(ids), "owner_id")
+        for pk in ids:
+            if pk not in found:
+                raise CommandError(f"List {pk} of exported entries is missing.")
+            alias, (owner_id,) = found[pk]
+            if selected is not None and owner_id not in selected:
+                self.excluded.add(pk)
+            else:
+                self.todo_shards[pk] = alias
+
+    def get_owners(self, usernames: set[str]) -> dict[str, int]:
+        """Return ids of users by usernames, creating missing ones."""
+        missing = usernames - self.owners.keys()
+        if missing:
+            self.owners.update(
+                User.objects.filter(username__in=missing).values_list("username", "pk")
+            )
+            missing -= self.owners.keys()
+        if missing:
+            User.objects.bulk_create(
+                [
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                ]
+            )
+            self.owners.update(
+                User.objects.filter(username__in=missing).values_list("username", "pk")
+            )
+        return self.owners
+
+    def reset_sequences(self) -> None:
+        for alias in all_shards():
+            connection = connections[alias or DEFAULT_DB_ALIAS]
+            statements = connection.ops.sequence_reset_sql(no_style(), [ToDo, Entry])
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+            if alias is not None:
+                reset_id_sequences(alias)
+
+    def read_checkpoint(self, path: str | None) -> int:
+        if not (path and os.path.exists(path)):
+            return 0
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)["lines"]
+
+    def write_checkpoint(self, path: str | None, lines: int) -> None:
+        if not path:
+            return
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"lines": lines}, file)
+        os.replace(temporary, path)
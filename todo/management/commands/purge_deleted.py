@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...models import ToDo
+from ...purge import BATCH_SIZE, purge_list
+from ...sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove soft deleted to-do lists with their entries. Entries are "
+        "deleted in chunks, each in its own transaction, pausing in between "
+        "so other writers are not stalled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=0,
+            help="Only purge lists deleted at least this many seconds ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of entries deleted per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.01,
+            help="Seconds to wait between chunks.",
+        )
+
+    def handle(
+        self, *args, older_than: float, batch_size: int, pause: float, **options
+    ):
+        deleted_before = timezone.now() - timedelta(seconds=older_than)
+        lists = entries = 0
+        for alias in all_shards():
+            todo_ids = list(
+                ToDo.all_objects.using(alias)
+                .filter(deleted_at__lte=deleted_before)
+                .values_list("pk", flat=True)
+            )
+            for todo_id in todo_ids:
+                for count in purge_list(todo_id, alias, batch_size):
+                    entries += count
+                    time.sleep(pause)
+                lists += 1
+
+        self.stdout.write(f"Purged {lists} lists and {entries} entries.")
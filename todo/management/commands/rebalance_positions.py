@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from yyiktodo.db import write_atomic
+
+from ...models import Entry, ToDo
+from ...positions import MAX_LENGTH
+from ...sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Respace position keys of entries in lists where moves made them long. "
+        "Entries keep their order, only their keys get shorter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only count lists to respace and fail if there are some.",
+        )
+        parser.add_argument(
+            "--max-length",
+            type=int,
+            default=MAX_LENGTH,
+            help="Respace lists having a longer key.",
+        )
+
+    def handle(self, *args, check: bool, max_length: int, **options):
+        lists = entries = 0
+        for alias in all_shards():
+            todo_ids = list(
+                Entry.objects.using(alias)
+                .annotate(length=Length("position"))
+                .filter(Q(length__gt=max_length) | Q(position=""))
+                .values_list("todo_id", flat=True)
+                .distinct()
+            )
+            lists += len(todo_ids)
+            if check:
+                continue
+            for todo in ToDo.objects.using(alias).filter(pk__in=todo_ids).only("pk"):
+                with write_atomic(using=alias):
+                    entries += todo.respace_entries()
+
+        if check:
+            self.stdout.write(f"{lists} lists have keys longer than {max_length}.")
+            if lists:
+                raise CommandError(f"{lists} lists have to be respaced.")
+        else:
+            self.stdout.write(f"Respaced {entries} entries in {lists} lists.")
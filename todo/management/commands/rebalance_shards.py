@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yyiktodo.db import write_atomic
+
+from ...models import Entry, ToDo
+from ...sharding import reset_id_sequences, shard_for_owner, shards
+from .import_todos import preserved_timestamps
+
+
+class Command(BaseCommand):
+    help = (
+        "Move to-do lists with their entries to the shard of their owner, as "
+        "needed after adding shards to TODO_SHARDS. Lists keep their ids and "
+        "timestamps, and are deleted from the old shard only once copied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only count misplaced lists and fail if there are some.",
+        )
+        parser.add_argument(
+            "--drain",
+            nargs="*",
+            default=[],
+            help=(
+                "Also move every list off these databases, shards removed from "
+                "TODO_SHARDS but still in DATABASES."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of lists moved per transaction.",
+        )
+
+    def handle(self, *args, check: bool, drain: list[str], batch_size: int, **options):
+        for alias in drain:
+            if alias not in connections:
+                raise CommandError(f"Unknown database {alias}.")
+        misplaced = moved_entries = 0
+        with preserved_timestamps():
+            for source in shards() + [
+                alias for alias in drain if alias not in shards()
+            ]:
+                last_pk = 0
+                while True:
+                    batch = list(
+                        ToDo.all_objects.using(source)
+                        .filter(pk__gt=last_pk)
+                        .order_by("pk")
+                        .values_list("pk", "owner_id")[:batch_size]
+                    )
+                    if not batch:
+                        break
+                    last_pk = batch[-1][0]
+                    targets = defaultdict(list)
+                    for pk, owner_id in batch:
+                        target = shard_for_owner(owner_id) or DEFAULT_DB_ALIAS
+                        if target != source:
+                            targets[target].append(pk)
+                    for target, todo_ids in targets.items():
+                        misplaced += len(todo_ids)
+                        if not check:
+                            moved_entries += self.move(source, target, todo_ids)
+
+        if check:
+            self.stdout.write(f"{misplaced} lists are on a wrong shard.")
+            if misplaced:
+                raise CommandError(f"{misplaced} lists have to be moved.")
+        else:
+            self.stdout.write(f"Moved {misplaced} lists and {moved_entries} entries.")
+
+    def move(self, source: str, target: str, todo_ids: list[int]) -> int:
+        """Copy lists with entries to `target` and delete them from `source`.
+
+        Rows are read once the source transaction holds the write lock, so
+        nothing written meanwhile is lost. The target commits first, and
+        lists already copied by an interrupted run are skipped.
+        """
+        with write_atomic(using=source), write_atomic(using=target):
+            todos = list(ToDo.all_objects.using(source).filter(pk__in=todo_ids))
+            entries = list(Entry.objects.using(source).filter(todo_id__in=todo_ids))
+            ToDo.objects.using(target).bulk_create(todos, ignore_conflicts=True)
+            Entry.objects.using(target).bulk_create(
+                entries, batch_size=5000, ignore_conflicts=True
+            )
+            reset_id_sequences(target)
+            ToDo.all_objects.using(source).filter(pk__in=todo_ids).delete()
+        return len(entries)
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...feed import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy public lists of all shards to the feed table again, as needed "
+        "after adding shards or writing lists with raw SQL."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        listed = rebuild()
+        self.stdout.write(
+            f"Copied {listed} public lists in {time.monotonic() - started:.1f}s."
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from ...models import ToDo
+from ...search import rebuild_index
+from ...sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate full-text search tables and triggers if missing and reindex "
+        "all list titles and entry texts, in every shard."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            help="Database to rebuild the index in, instead of every shard.",
+        )
+
+    def handle(self, *args, database: str | None, **options):
+        if database:
+            databases = [database]
+        else:
+            databases = [alias or router.db_for_write(ToDo) for alias in all_shards()]
+        for alias in databases:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError("Full-text search needs SQLite with FTS5.")
+        for alias in databases:
+            started = time.monotonic()
+            rebuild_index(alias)
+            self.stdout.write(
+                f"Rebuilt search index of {alias} in "
+                f"{time.monotonic() - started:.1f}s."
+            )
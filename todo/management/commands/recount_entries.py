@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from yyiktodo.db import write_atomic
+
+from ...feed import refresh
+from ...models import Entry, ToDo
+from ...sharding import all_shards
+
+
+def count_entries(**filters):
+    """Subquery counting entries of the outer to-do list."""
+    entries = (
+        Entry.objects.filter(todo=OuterRef("pk"), **filters)
+        .values("todo")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(entries, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Verify and rebuild entry counters of to-do lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify counters and fail if some of them are wrong.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of lists verified and fixed per transaction.",
+        )
+
+    def handle(self, *args, check: bool, batch_size: int, **options):
+        checked = wrong = 0
+        for alias in all_shards():
+            lists = ToDo.objects.using(alias)
+            last_pk = 0
+            while True:
+                batch = list(
+                    lists.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1]
+                checked += len(batch)
+                with (transaction.atomic if check else write_atomic)(using=alias):
+                    stale = self.find_stale(lists, batch)
+                    wrong += len(stale)
+                    if stale and not check:
+                        self.rebuild(lists, stale)
+                        refresh(lists.filter(pk__in=stale))
+
+        self.stdout.write(f"Checked {checked} lists, {wrong} had wrong counters.")
+        if check and wrong:
+            raise CommandError(f"{wrong} lists have wrong counters.")
+
+    def find_stale(self, lists, todo_ids: list[int]) -> list[int]:
+        lists = lists.filter(pk__in=todo_ids).annotate(
+            actual_entries=count_entries(),
+            actual_completed=count_entries(completed=True),
+        )
+        actual_progress = F("actual_completed") * 100 / Greatest(F("actual_entries"), 1)
+        stale = lists.filter(
+            ~Q(entry_count=F("actual_entries"))
+            | ~Q(completed_count=F("actual_completed"))
+            | ~Q(progress=actual_progress)
+        )
+        return list(stale.values_list("pk", flat=True))
+
+    def rebuild(self, lists, todo_ids: list[int]) -> None:
+        lists = lists.filter(pk__in=todo_ids)
+        lists.update(
+            entry_count=count_entries(),
+            completed_count=count_entries(completed=True),
+        )
+        lists.update(
+            progress=F("completed_count") * 100 / Greatest(F("entry_count"), 1)
+        )
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import time
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def database_path(name) -> str:
+    """Return file path of SQLite database `NAME`, which may be a URI."""
+    name = str(name)
+    if name.startswith("file:"):
+        return unquote(urlsplit(name).path)
+    return name
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over its replicas, standing in for "
+        "replication locally. Every copy is a consistent snapshot and replaces "
+        "the replica file at once, so readers never see a partial copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "replicas",
+            nargs="*",
+            help="Aliases of replicas to refresh, DATABASE_REPLICAS by default.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep refreshing every given number of seconds.",
+        )
+
+    def handle(self, *args, replicas: list[str], interval: float | None, **options):
+        replicas = replicas or settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError("No replicas, set YYIKTODO_REPLICAS.")
+        for alias in replicas:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"Replica {alias} isn't an SQLite database.")
+
+        while True:
+            started = time.monotonic()
+            for alias in replicas:
+                self.refresh(alias)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"Refreshed {', '.join(replicas)} in {elapsed:.2f}s.")
+            if interval is None:
+                break
+            time.sleep(max(interval - elapsed, 0))
+
+    def refresh(self, alias: str) -> None:
+        path = database_path(connections[alias].settings_dict["NAME"])
+        temporary = f"{path}.tmp"
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        copy = sqlite3.connect(temporary)
+        try:
+            primary.connection.backup(copy)
+            # Read-only connections can't use a WAL file.
+            copy.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            copy.close()
+        os.replace(temporary, path)
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0007_alter_entry_text_alter_todo_owner"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("public", True)),
+                fields=["-modified_at", "-id"],
+                name="todo_public_modified_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["owner", "-modified_at", "-id"], name="todo_owner_modified_idx"
+            ),
+        ),
+    ]
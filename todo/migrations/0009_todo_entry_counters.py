@@ -0,0 +1,64 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:17
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def count_entries(apps, schema_editor):
+    ToDo = apps.get_model("todo", "ToDo")
+    Entry = apps.get_model("todo", "Entry")
+
+    def count(**filters):
+        entries = (
+            Entry.objects.filter(todo=OuterRef("pk"), **filters)
+            .values("todo")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(entries, output_field=IntegerField()), 0)
+
+    ToDo.objects.update(entry_count=count(), completed_count=count(completed=True))
+    ToDo.objects.update(
+        progress=F("completed_count") * 100 / Greatest(F("entry_count"), 1)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0008_todo_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todo",
+            name="completed_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="todo",
+            name="entry_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="todo",
+            name="progress",
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_entries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("public", True)),
+                fields=["-progress", "-id"],
+                name="todo_public_progress_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["owner", "-progress", "-id"], name="todo_owner_progress_idx"
+            ),
+        ),
+    ]
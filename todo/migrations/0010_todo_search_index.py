@@ -0,0 +1,73 @@
+# Generated by Django 4.1.1 on 2026-10-18 15:02
+
+from django.db import migrations
+
+# Statements as of this migration, kept apart from `todo.search` which may
+# change later.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_todo_fts USING fts5(title, "
+    "content='todo_todo', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_ai AFTER INSERT ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_ad AFTER DELETE ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_au AFTER UPDATE OF title ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO todo_todo_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_entry_fts USING fts5(text, "
+    "content='todo_entry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_ai AFTER INSERT ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_ad AFTER DELETE ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(todo_entry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_au AFTER UPDATE OF text ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(todo_entry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO todo_entry_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+
+POPULATE_SQL = [
+    "INSERT INTO todo_todo_fts(todo_todo_fts) VALUES ('rebuild')",
+    "INSERT INTO todo_entry_fts(todo_entry_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS todo_todo_fts_ai",
+    "DROP TRIGGER IF EXISTS todo_todo_fts_ad",
+    "DROP TRIGGER IF EXISTS todo_todo_fts_au",
+    "DROP TABLE IF EXISTS todo_todo_fts",
+    "DROP TRIGGER IF EXISTS todo_entry_fts_ai",
+    "DROP TRIGGER IF EXISTS todo_entry_fts_ad",
+    "DROP TRIGGER IF EXISTS todo_entry_fts_au",
+    "DROP TABLE IF EXISTS todo_entry_fts",
+]
+
+
+def create(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL + POPULATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0009_todo_entry_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.1.1 on 2026-10-18 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Search index statements as of this migration, see `0010_todo_search_index`.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_todo_fts USING fts5(title, "
+    "content='todo_todo', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_ai AFTER INSERT ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_ad AFTER DELETE ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_au AFTER UPDATE OF title ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO todo_todo_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_entry_fts USING fts5(text, "
+    "content='todo_entry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_ai AFTER INSERT ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_ad AFTER DELETE ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(todo_entry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_au AFTER UPDATE OF text ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(todo_entry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO todo_entry_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+
+
+def restore_triggers(apps, schema_editor):
+    # SQLite alters a column by rebuilding the table, which drops the search
+    # triggers on it.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("todo", "0010_todo_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AlterField(
+            model_name="todo",
+            name="owner",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="todo_list",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
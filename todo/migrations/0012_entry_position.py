@@ -0,0 +1,98 @@
+# Generated by Django 4.1.1 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+# Search index statements as of this migration, see `0010_todo_search_index`.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_todo_fts USING fts5(title, "
+    "content='todo_todo', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_ai AFTER INSERT ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_ad AFTER DELETE ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_todo_fts_au AFTER UPDATE OF title ON todo_todo "
+    "BEGIN INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO todo_todo_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_entry_fts USING fts5(text, "
+    "content='todo_entry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_ai AFTER INSERT ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_ad AFTER DELETE ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(todo_entry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_entry_fts_au AFTER UPDATE OF text ON todo_entry "
+    "BEGIN INSERT INTO todo_entry_fts(todo_entry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO todo_entry_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+
+# Position keys as made by `todo.positions` at this migration.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+START = len(DIGITS) ** 3 // 2
+
+
+def encode_int(number: int) -> str:
+    digits = ""
+    while True:
+        number, digit = divmod(number, len(DIGITS))
+        digits = DIGITS[digit] + digits
+        if not number:
+            return DIGITS[len(digits)] + digits
+
+
+def spread(count: int) -> list[str]:
+    return [encode_int(START + number) for number in range(count)]
+
+
+def restore_triggers(apps, schema_editor):
+    # SQLite adds a column with a default by rebuilding the table, which
+    # drops the search triggers on it.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def number_entries(apps, schema_editor):
+    """Keep the order entries were shown in, by id."""
+    ToDo = apps.get_model("todo", "ToDo")
+    Entry = apps.get_model("todo", "Entry")
+    db = schema_editor.connection.alias
+    todo_ids = list(
+        ToDo.objects.using(db).filter(entry_count__gt=0).values_list("pk", flat=True)
+    )
+    for todo_id in todo_ids:
+        entries = list(
+            Entry.objects.using(db).filter(todo_id=todo_id).order_by("pk").only("pk")
+        )
+        for entry, position in zip(entries, spread(len(entries))):
+            entry.position = position
+        Entry.objects.using(db).bulk_update(entries, ["position"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0011_todo_owner_no_constraint"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name="entry",
+            name="position",
+            field=models.CharField(default="", editable=False, max_length=200),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+        migrations.RunPython(number_entries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(
+                fields=["todo", "position", "id"], name="entry_todo_position_idx"
+            ),
+        ),
+    ]
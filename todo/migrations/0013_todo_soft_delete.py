@@ -0,0 +1,31 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("todo", "0012_entry_position"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todo",
+            name="deleted_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="todo",
+            name="owner",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="todo_list",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.1.1 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+FIELDS = [
+    "id",
+    "owner_id",
+    "title",
+    "modified_at",
+    "entry_count",
+    "completed_count",
+    "progress",
+]
+
+
+def fill_feed(apps, schema_editor):
+    """Copy public lists of the default database, which holds users.
+
+    Lists of other shards are copied by `manage.py rebuild_feed`.
+    """
+    db = schema_editor.connection.alias
+    if db != DEFAULT_DB_ALIAS:
+        return
+    ToDo = apps.get_model("todo", "ToDo")
+    PublicFeedItem = apps.get_model("todo", "PublicFeedItem")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    usernames = dict(User.objects.using(db).values_list("pk", "username"))
+    lists = ToDo.objects.using(db).filter(public=True, deleted_at=None)
+    PublicFeedItem.objects.using(db).bulk_create(
+        [
+            PublicFeedItem(owner_username=usernames[row["owner_id"]], **row)
+            for row in lists.values(*FIELDS).iterator()
+            if row["owner_id"] in usernames
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("todo", "0013_todo_soft_delete"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PublicFeedItem",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("owner_id", models.BigIntegerField()),
+                ("owner_username", models.CharField(max_length=150)),
+                ("title", models.CharField(max_length=200)),
+                ("modified_at", models.DateTimeField()),
+                ("entry_count", models.IntegerField(default=0)),
+                ("completed_count", models.IntegerField(default=0)),
+                ("progress", models.SmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="publicfeeditem",
+            index=models.Index(
+                fields=["-modified_at", "-id"], name="feed_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publicfeeditem",
+            index=models.Index(fields=["-progress", "-id"], name="feed_progress_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="publicfeeditem",
+            index=models.Index(fields=["owner_id"], name="feed_owner_idx"),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.1 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo", "0014_public_feed"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(
+                condition=models.Q(("completed", True)),
+                fields=["todo"],
+                name="entry_todo_completed_idx",
+            ),
+        ),
+    ]
@@ -1,14 +1,29 @@
+import hashlib
+from datetime import datetime
 from functools import reduce
 from operator import or_
-from typing import Callable
+from typing import Any, Callable
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.messages.storage.cookie import CookieStorage
 from django.db.models import Q, QuerySet
+from django.http import Http404
 from django.shortcuts import redirect
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.edit import ModelFormMixin
 from django.views.generic.list import MultipleObjectMixin
 
+from yyik_auth.auth import aget_user
+
+from .pagination import InvalidCursor, KeysetPaginator
+
 
 class AddOwnerMixin(LoginRequiredMixin, ModelFormMixin):
     """Add current user as owner of created object."""
@@ -44,6 +59,32 @@ class FilteredSingleMixin(FilteredBaseMixin, SingleObjectMixin):
         total_filter = reduce(self.filter_chainer, self.get_filters())
         return queryset.filter(total_filter)
 
+    async def aget_object(self, queryset=None):
+        """Async version of `get_object()`, looking up by primary key only."""
+        if queryset is None:
+            queryset = self.get_queryset()
+        try:
+            return await queryset.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                f"No {queryset.model._meta.verbose_name} found matching the query"
+            )
+
+
+def visibility_filters(user) -> list[Q]:
+    """Filters of lists the user may see, to be chained with `|`."""
+    filters = [Q(public=True)]
+    if user.is_authenticated:
+        filters.append(Q(owner=user))
+    return filters
+
+
+class VisibleFilterMixin(OrFilteredMixin):
+    """Filter lists to public ones and own ones of the user."""
+
+    def get_filters(self):
+        return visibility_filters(self.request.user)  # type: ignore
+
 
 class OrFilteredSingleMixin(OrFilteredMixin, FilteredSingleMixin):
     """Add queryset filtering with `|` for single object."""
@@ -60,3 +101,216 @@ class FilteredMultipleMixin(FilteredBaseMixin, MultipleObjectMixin):
 
 class OrFilteredMultipleMixin(OrFilteredMixin, FilteredMultipleMixin):
     """Add queryset filtering with `|` for multiple object."""
+
+
+class ProgressOrderingMixin(MultipleObjectMixin):
+    """Order and filter to-do lists by progress chosen in query string.
+
+    Every ordering is backed by an index on the list model and on the feed.
+    """
+
+    orderings = {
+        "recent": ("-modified_at", "-id"),
+        "progress": ("-progress", "-id"),
+    }
+    statuses = {
+        "open": Q(progress__lt=100),
+        "done": Q(progress=100),
+    }
+
+    def get_ordering(self):
+        sort = self.request.GET.get("sort")  # type: ignore
+        return self.orderings.get(sort, self.orderings["recent"])
+
+    def get_queryset(self):
+        return self.filter_status(super().get_queryset())
+
+    def filter_status(self, queryset):
+        status = self.statuses.get(self.request.GET.get("status"))  # type: ignore
+        return queryset if status is None else queryset.filter(status)
+
+
+class KeysetPaginationMixin(MultipleObjectMixin):
+    """Paginate objects by opaque cursor instead of page number."""
+
+    paginate_by = 20
+    paginator_class = KeysetPaginator
+    ordering = ("-modified_at", "-id")
+    cursor_kwarg = "cursor"
+
+    def get_keyset_branches(self, queryset):
+        """Return querysets whose union is paginated."""
+        return [queryset]
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        branches = self.get_keyset_branches(queryset)
+        return self.paginator_class(branches, per_page, ordering=self.get_ordering())
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        cursor = self.request.GET.get(self.cursor_kwarg)  # type: ignore
+        try:
+            page = paginator.page(cursor)
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """Async version of `paginate_queryset()`."""
+        paginator = self.get_paginator(queryset, page_size)
+        cursor = self.request.GET.get(self.cursor_kwarg)  # type: ignore
+        try:
+            page = await paginator.apage(cursor)
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class ConditionalGetMixin:
+    """Answer conditional GET with 304 before doing any template work.
+
+    `get_validators()` returns cheap state the page is rendered from along
+    with the time it last changed. The ETag is a hash of that state and of
+    the viewer, so every user gets their own.
+    """
+
+    def get_validators(self) -> tuple[Any, datetime | None] | None:
+        return None
+
+    async def aget_validators(self) -> tuple[Any, datetime | None] | None:
+        """Async version of `get_validators()`, used by async views."""
+        return None
+
+    def get_etag(self, state: Any) -> str:
+        request = self.request  # type: ignore
+        viewer = (request.user.pk, request.COOKIES.get(CookieStorage.cookie_name))
+        data = repr((state, viewer)).encode()
+        return f'W/"{hashlib.md5(data, usedforsecurity=False).hexdigest()}"'
+
+    def get_conditional_response(self, validators):
+        """Return 304 or 412 response if the request's preconditions say so."""
+        state, last_modified = validators
+        return get_conditional_response(
+            self.request,  # type: ignore
+            etag=self.get_etag(state),
+            last_modified=last_modified and int(last_modified.timestamp()),
+        )
+
+    def patch_response(self, response, validators):
+        state, last_modified = validators
+        if last_modified and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+        response.headers.setdefault("ETag", self.get_etag(state))
+        patch_vary_headers(response, ["Cookie"])
+        patch_cache_control(
+            response,
+            no_cache=True,
+            private=self.request.user.is_authenticated,  # type: ignore
+        )
+        return response
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)  # type: ignore
+        response = self.get_conditional_response(validators)
+        if response is None:
+            response = super().get(request, *args, **kwargs)  # type: ignore
+        return self.patch_response(response, validators)
+
+
+class KeysetConditionalGetMixin(ConditionalGetMixin, KeysetPaginationMixin):
+    """Validate keyset paginated pages by keys of their objects."""
+
+    last_modified_field = "modified_at"
+
+    def get_validators(self):
+        queryset = self.get_validators_queryset()
+        page = self.paginate_queryset(queryset, self.get_paginate_by(queryset))[1]
+        return self.get_page_validators(page)
+
+    async def aget_validators(self):
+        queryset = self.get_validators_queryset()
+        page = (
+            await self.apaginate_queryset(queryset, self.get_paginate_by(queryset))
+        )[1]
+        return self.get_page_validators(page)
+
+    def get_validators_queryset(self):
+        """Return the paginated queryset loading only keys of objects."""
+        names = {name.lstrip("-") for name in self.get_ordering()}
+        names |= {self.model._meta.pk.name, self.last_modified_field}  # type: ignore
+        self.validator_fields = sorted(names)
+        queryset = self.get_queryset().select_related(None).prefetch_related(None)
+        return queryset.only(*names)
+
+    def get_page_validators(self, page):
+        objects = page.object_list
+        state = (
+            [[getattr(obj, name) for name in self.validator_fields] for obj in objects],
+            page.has_next(),
+            page.has_previous(),
+        )
+        last_modified = max(
+            (getattr(obj, self.last_modified_field) for obj in objects),
+            default=None,
+        )
+        return state, last_modified
+
+
+class AsyncViewMixin:
+    """Serve view from the event loop when running under ASGI.
+
+    `request.user` and the session are loaded in a thread before the
+    handler runs, so sync code reading them later never blocks. Template
+    responses are rendered by the view instead of by the handler, which
+    would render them in a thread, so contexts must hold evaluated data.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        await aget_user(request)
+        return await super().dispatch(request, *args, **kwargs)  # type: ignore
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(  # type: ignore
+            context, **response_kwargs
+        )
+        return response.render()
+
+
+class AsyncConditionalGetMixin(AsyncViewMixin, ConditionalGetMixin):
+    """Async version of `ConditionalGetMixin`.
+
+    Validators come from `aget_validators()` and the page itself is built
+    by `aget_response()`.
+    """
+
+    async def aget_response(self, request, *args, **kwargs):
+        """Build the page, by `get()` of the view run in a thread by default."""
+        get = super(ConditionalGetMixin, self).get  # type: ignore
+        return await sync_to_async(get)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        validators = await self.aget_validators()
+        if validators is None:
+            return await self.aget_response(request, *args, **kwargs)
+        response = self.get_conditional_response(validators)
+        if response is None:
+            response = await self.aget_response(request, *args, **kwargs)
+        return self.patch_response(response, validators)
+
+
+class AsyncKeysetListMixin(AsyncConditionalGetMixin, KeysetConditionalGetMixin):
+    """Serve keyset paginated list view with async queries."""
+
+    async def aget_response(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        self.paginated = await self.apaginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+    def paginate_queryset(self, queryset, page_size):
+        # The page is fetched by `aget_response()` before the context is built.
+        return self.paginated
@@ -1,33 +1,416 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
-from django.db import models
+from django.db import models, router
+from django.db.models import Q
+from django.utils import timezone
+
+from yyik_tasks.queue import enqueue_on_commit
+from yyiktodo.db import write_atomic
+
+from .events import RELOAD, entry_event, hub, move_event
+from .positions import MAX_LENGTH, InvalidPosition, key_between, keys_after, spread
+from .touch import batched_position, remember_position, touch
 
 User = get_user_model()
 
 
+class LiveManager(models.Manager):
+    """Lists not deleted, as seen by views and through related managers."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
+
+
 class ToDo(models.Model):
     title = models.CharField(max_length=200, default="To-Do List")
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="todo_list")
+    # Users are stored in the default database only, which sharded lists
+    # can't have a constraint on, see `todo/sharding.py`. Lists of a deleted
+    # user are soft deleted by a signal there instead of by the collector.
+    owner = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, related_name="todo_list", db_constraint=False
+    )
     public = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
+    # Maintained by entries through `touch()`, rebuilt by `recount_entries`.
+    entry_count = models.IntegerField(default=0, editable=False)
+    completed_count = models.IntegerField(default=0, editable=False)
+    progress = models.SmallIntegerField(default=0, editable=False)
+    # Set when the list is deleted, `purge_deleted` removes it later.
+    deleted_at = models.DateTimeField(null=True, editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    COUNTER_FIELDS = ("entry_count", "completed_count", "progress")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-modified_at", "-id"],
+                name="todo_public_modified_idx",
+                condition=models.Q(public=True),
+            ),
+            models.Index(
+                fields=["owner", "-modified_at", "-id"],
+                name="todo_owner_modified_idx",
+            ),
+            models.Index(
+                fields=["-progress", "-id"],
+                name="todo_public_progress_idx",
+                condition=models.Q(public=True),
+            ),
+            models.Index(
+                fields=["owner", "-progress", "-id"],
+                name="todo_owner_progress_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember stored state to know if the feed of public lists changes.
+        instance._stored_public = instance.__dict__.get("public")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Counters are only ever changed with `F()` expressions, writing back
+        # loaded values would lose concurrent updates.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        result = super().save(*args, **kwargs)
+        self._stored_public = self.public
+        return result
+
+    def soft_delete(self) -> None:
+        """Hide the list at once and queue the purge of its entries.
+
+        Deleting a big list through the collector selects all its entries
+        and removes them in one transaction, blocking other writers.
+        """
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["deleted_at", "modified_at"])
+        using = self._state.db
+        enqueue_on_commit(
+            "todo.purge_lists",
+            {"todo_id": self.pk, "using": using},
+            key=f"purge:{using}:{self.pk}",
+            using=using,
+        )
+
+    def add_entries(self, texts: list[str]) -> list["Entry"]:
+        """Create entries in one statement."""
+        using = router.db_for_write(ToDo, instance=self)
+        positions = keys_after(known_last_position(self.pk, self, using), len(texts))
+        with write_atomic(using=using, savepoint=False):
+            entries = Entry.objects.using(using).bulk_create(
+                [
+                    Entry(todo=self, text=text, position=position)
+                    for text, position in zip(texts, positions)
+                ]
+            )
+            touch(self.pk, self, entries=len(entries), using=using)
+            remember_last_position(self.pk, self, using, positions[-1])
+        hub.publish_on_commit(self.pk, RELOAD, using)
+        return entries
+
+    def set_entries_completed(
+        self, entry_ids: list[int], completed: bool, event: dict = RELOAD
+    ) -> int:
+        """Mark entries completed or not in one statement.
+
+        Subscribers get `event` once any change commits, a reload by default.
+        """
+        using = router.db_for_write(ToDo, instance=self)
+        with write_atomic(using=using, savepoint=False):
+            changed = (
+                self.entries.filter(pk__in=entry_ids)  # type: ignore
+                .exclude(completed=completed)
+                .update(completed=completed)
+            )
+            if changed:
+                completed_delta = changed if completed else -changed
+                touch(self.pk, self, completed=completed_delta, using=using)
+        if changed:
+            hub.publish_on_commit(self.pk, event, using)
+        return changed
+
+    def delete_entries(self, entry_ids: list[int] | None = None, **filters) -> int:
+        """Delete selected or all entries matching `filters`.
+
+        Completed and not completed entries are deleted by separate statements
+        to know how counters change, one of them is skipped when `filters`
+        already pin `completed`.
+        """
+        entries = self.entries.filter(**filters)  # type: ignore
+        if entry_ids is not None:
+            entries = entries.filter(pk__in=entry_ids)
+        states = [filters["completed"]] if "completed" in filters else [True, False]
+        using = router.db_for_write(ToDo, instance=self)
+        deleted = completed = 0
+        with write_atomic(using=using, savepoint=False):
+            for state in states:
+                count, _ = entries.filter(completed=state).delete()
+                deleted += count
+                completed += count if state else 0
+            if deleted:
+                touch(
+                    self.pk, self, entries=-deleted, completed=-completed, using=using
+                )
+        if deleted:
+            hub.publish_on_commit(self.pk, RELOAD, using)
+        return deleted
+
+    def respace_entries(self) -> int:
+        """Give entries short evenly spaced keys in their current order."""
+        entries = list(self.entries.order_by(*Entry.ORDERING).only("position"))  # type: ignore
+        changed = []
+        for entry, position in zip(entries, spread(len(entries))):
+            if entry.position != position:
+                entry.position = position
+                changed.append(entry)
+        using = router.db_for_write(Entry, instance=self)
+        Entry.objects.using(using).bulk_update(changed, ["position"], batch_size=500)
+        remember_last_position(self.pk, self, using, None)
+        return len(changed)
+
+
+def last_position(todo_id: int, using: str | None = None) -> str | None:
+    """Return key of the last entry of the list, None if there is none."""
+    entries = Entry.objects.using(using).filter(todo_id=todo_id)
+    last = entries.order_by("-position").values_list("position", flat=True).first()
+    # Entries created without keys are all empty and sort first.
+    return last or None
+
+
+def known_last_position(todo_id: int, todo: ToDo | None, using: str | None):
+    """Return key of the last entry of the list, looked up if not known.
+
+    Counters of a loaded list tell if it has entries at all. The last key
+    is remembered by the loaded list and by a `deferred_touches()` block
+    once an entry is appended, so appending more doesn't look it up again.
+    """
+    if todo is not None:
+        if not todo.entry_count:
+            return None
+        if getattr(todo, "_last_position", None):
+            return todo._last_position
+    return batched_position(todo_id, using) or last_position(todo_id, using)
+
+
+def remember_last_position(
+    todo_id: int, todo: ToDo | None, using: str | None, position: str | None
+) -> None:
+    """Remember key of the last entry of the list, forget it if None."""
+    if todo is not None:
+        todo._last_position = position  # type: ignore
+    remember_position(todo_id, using, position)
+
 
 class Entry(models.Model):
     todo = models.ForeignKey(ToDo, on_delete=models.CASCADE, related_name="entries")
     text = models.CharField(max_length=200, validators=[MinLengthValidator(2)])
     completed = models.BooleanField(default=False)
+    # Fractional key, see `todo/positions.py`. New entries go last.
+    position = models.CharField(max_length=200, default="", editable=False)
+
+    ORDERING = ("position", "id")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["todo", "position", "id"], name="entry_todo_position_idx"
+            ),
+            # Deleting and counting completed entries of a list. SQLite can't
+            # seek on `completed` in a key, as Django compares booleans bare.
+            models.Index(
+                fields=["todo"],
+                name="entry_todo_completed_idx",
+                condition=models.Q(completed=True),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember stored state to know how counters of lists change.
+        instance._stored_completed = instance.__dict__.get("completed")
+        instance._stored_todo_id = instance.__dict__.get("todo_id")
+        return instance
 
     def save(self, *args, **kwargs):
-        self.todo.save()
-        return super().save(*args, **kwargs)
+        """Save the entry and change counters of its list in one transaction.
+
+        An entry moved to another list is put last there, and counts for the
+        new list instead of the old one.
+        """
+        adding = self._state.adding
+        stored_todo_id = getattr(self, "_stored_todo_id", None)
+        moved = not adding and stored_todo_id not in (None, self.todo_id)  # type: ignore
+        appended = (adding and not self.position) or moved
+        if appended:
+            self.position = self.next_position()
+        using = kwargs.get("using") or router.db_for_write(Entry, instance=self)
+        with write_atomic(using=using, savepoint=False):
+            result = super().save(*args, **kwargs)
+            if adding or moved:
+                if moved:
+                    self.touch_stored_todo(stored_todo_id, using)
+                self.touch_todo(entries=1, completed=int(self.completed))
+                # Entries given a key may go anywhere, the last one is unknown.
+                remember_last_position(
+                    self.todo_id,  # type: ignore
+                    self.cached_todo(),
+                    using,
+                    self.position if appended else None,
+                )
+            else:
+                stored = getattr(self, "_stored_completed", None)
+                changed = stored is not None and stored != self.completed
+                self.touch_todo(
+                    completed=(1 if self.completed else -1) if changed else 0
+                )
+        self._stored_completed = self.completed
+        self._stored_todo_id = self.todo_id  # type: ignore
+        action = "created" if adding else "updated"
+        if moved:
+            hub.publish_on_commit(stored_todo_id, RELOAD, using)
+        hub.publish_on_commit(self.todo_id, entry_event(self, action), using)  # type: ignore
+        return result
 
     def delete(self, *args, **kwargs):
-        self.todo.save()
-        return super().delete(*args, **kwargs)
+        todo_id = getattr(self, "_stored_todo_id", None) or self.todo_id  # type: ignore
+        event = entry_event(self, "deleted")
+        using = kwargs.get("using") or router.db_for_write(Entry, instance=self)
+        with write_atomic(using=using, savepoint=False):
+            result = super().delete(*args, **kwargs)
+            if todo_id == self.todo_id:  # type: ignore
+                completed = getattr(self, "_stored_completed", self.completed)
+                self.touch_todo(entries=-1, completed=-int(bool(completed)))
+            else:
+                self.touch_stored_todo(todo_id, using)
+        hub.publish_on_commit(todo_id, event, using)
+        return result
+
+    def set_completed(self, completed: bool) -> bool:
+        """Mark the entry completed or not without writing its other fields.
+
+        Return if it changed. Subscribers get the entry alone, not a reload.
+        """
+        self.completed = completed
+        changed = self.todo.set_entries_completed(  # type: ignore
+            [self.pk], completed, entry_event(self, "updated")
+        )
+        self._stored_completed = completed
+        return bool(changed)
+
+    def touch_stored_todo(self, todo_id: int, using: str) -> None:
+        """Take the entry out of counters of the list it was stored in."""
+        completed = getattr(self, "_stored_completed", None)
+        if completed is None:
+            completed = self.completed
+        touch(todo_id, entries=-1, completed=-int(completed), using=using)
+
+    def cached_todo(self) -> ToDo | None:
+        return self.todo if Entry.todo.is_cached(self) else None  # type: ignore
+
+    def next_position(self) -> str:
+        """Return key putting the entry after the last one of its list."""
+        using = router.db_for_write(Entry, instance=self)
+        last = known_last_position(self.todo_id, self.cached_todo(), using)  # type: ignore
+        return key_between(last, None)
+
+    def move(self, target: "Entry", after: bool = False) -> None:
+        """Put the entry right before or after another entry of its list.
+
+        Only the entry's own key changes, to one between the keys of the
+        target and of its neighbour on the other side. The list is respaced
+        first if there is no such key, as when neighbours share a key, and
+        in the background once the new key gets longer than `MAX_LENGTH`.
+        """
+        using = router.db_for_write(Entry, instance=self)
+        siblings = Entry.objects.using(using).filter(todo_id=self.todo_id)  # type: ignore
+        siblings = siblings.exclude(pk=self.pk)
+        if after:
+            beyond = Q(position__gt=target.position) | Q(
+                position=target.position, pk__gt=target.pk
+            )
+            neighbour = siblings.filter(beyond).order_by(*self.ORDERING)
+        else:
+            beyond = Q(position__lt=target.position) | Q(
+                position=target.position, pk__lt=target.pk
+            )
+            neighbour = siblings.filter(beyond).order_by("-position", "-id")
+        other = neighbour.values_list("position", flat=True).first()
+        try:
+            if after:
+                position = key_between(target.position, other)
+            else:
+                position = key_between(other, target.position)
+        except InvalidPosition:
+            self.todo.respace_entries()  # type: ignore
+            target.refresh_from_db(fields=["position"])
+            return self.move(target, after)
+        with write_atomic(using=using, savepoint=False):
+            Entry.objects.using(using).filter(pk=self.pk).update(position=position)
+            self.touch_todo()
+            # The entry may now be the last one.
+            remember_last_position(self.todo_id, self.cached_todo(), using, None)  # type: ignore
+        self.position = position
+        if len(position) > MAX_LENGTH:
+            enqueue_on_commit(
+                "todo.respace_entries",
+                {"todo_id": self.todo_id, "using": using},  # type: ignore
+                key=f"respace:{using}:{self.todo_id}",  # type: ignore
+                using=using,
+            )
+        event = move_event(self, target, after)
+        hub.publish_on_commit(self.todo_id, event, using)  # type: ignore
+
+    def touch_todo(self, entries: int = 0, completed: int = 0) -> None:
+        """Bump `modified_at` and counters of the list without loading it."""
+        touch(
+            self.todo_id,  # type: ignore
+            self.cached_todo(),
+            entries=entries,
+            completed=completed,
+            using=router.db_for_write(Entry, instance=self),
+        )
 
     def __str__(self) -> str:
         return self.text
+
+
+class PublicFeedItem(models.Model):
+    """Public list copied with its owner's username, see `todo/feed.py`.
+
+    The primary key is the id of the list. Items are stored in the default
+    database for lists of all shards, so they refer to lists and owners
+    without foreign keys.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    owner_id = models.BigIntegerField()
+    owner_username = models.CharField(max_length=150)
+    title = models.CharField(max_length=200)
+    modified_at = models.DateTimeField()
+    entry_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    progress = models.SmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-modified_at", "-id"], name="feed_modified_idx"),
+            models.Index(fields=["-progress", "-id"], name="feed_progress_idx"),
+            models.Index(fields=["owner_id"], name="feed_owner_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return self.title
@@ -0,0 +1,214 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from functools import reduce
+from operator import or_
+from typing import Any, Iterable, Sequence
+
+from django.db.models import Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    """Cursor token can't be decoded."""
+
+
+def encode_cursor(values: Sequence[Any], reverse: bool = False) -> str:
+    """Pack ordering values into an opaque url-safe token."""
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    raw = json.dumps([int(reverse), payload], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[list[Any], bool]:
+    """Unpack token made by `encode_cursor` into raw values and direction."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.b64decode(padded, altchars=b"-_", validate=True)
+        reverse, values = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError) as error:
+        raise InvalidCursor(token) from error
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values, bool(reverse)
+
+
+class KeysetPage:
+    """One page of keyset paginated objects."""
+
+    def __init__(self, object_list, has_next, has_previous, paginator):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.paginator = paginator
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not (self._has_next and self.object_list):
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not (self._has_previous and self.object_list):
+            return None
+        return self.paginator.cursor_for(self.object_list[0], reverse=True)
+
+
+class KeysetPaginator:
+    """Paginate by seeking past the last seen ordering values.
+
+    Unlike `django.core.paginator.Paginator` it never counts rows and never
+    uses OFFSET, so every page costs the same as the first one, provided
+    that an index covers `ordering`. `ordering` has to be unique, so its
+    last field should be the primary key.
+
+    `object_list` may be a single queryset or several querysets ordered the
+    same way. The latter are paged independently and merged, which lets an
+    `OR` of filters be served by one index per filter.
+    """
+
+    def __init__(
+        self,
+        object_list: QuerySet | Iterable[QuerySet],
+        per_page: int,
+        ordering: Sequence[str] = ("-modified_at", "-id"),
+    ):
+        if isinstance(object_list, QuerySet):
+            object_list = [object_list]
+        self.branches: list[QuerySet] = list(object_list)
+        self.per_page = int(per_page)
+        self.ordering = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+        model = self.branches[0].model
+        self.fields = [model._meta.get_field(name) for name, _ in self.ordering]
+
+    def cursor_for(self, obj, reverse: bool = False) -> str:
+        return encode_cursor(self._key(obj), reverse)
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        values, reverse = self._parse_cursor(cursor)
+        results = [list(queryset) for queryset in self._querysets(values, reverse)]
+        return self._page(results, values, reverse)
+
+    async def apage(self, cursor: str | None = None) -> KeysetPage:
+        """Async version of `page()`."""
+        values, reverse = self._parse_cursor(cursor)
+        results = [
+            [obj async for obj in queryset]
+            for queryset in self._querysets(values, reverse)
+        ]
+        return self._page(results, values, reverse)
+
+    def _parse_cursor(self, cursor: str | None) -> tuple[list | None, bool]:
+        if not cursor:
+            return None, False
+        raw_values, reverse = decode_cursor(cursor)
+        return self._parse_values(raw_values, cursor), reverse
+
+    def _page(self, results: list[list], values: list | None, reverse: bool):
+        objects = results[0] if len(results) == 1 else self._merge(results, reverse)
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+        if reverse:
+            objects.reverse()
+            return KeysetPage(objects, True, has_more, self)
+        return KeysetPage(objects, has_more, values is not None, self)
+
+    def _parse_values(self, raw_values: list, cursor: str) -> list:
+        if len(raw_values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        try:
+            return [
+                field.to_python(value) for field, value in zip(self.fields, raw_values)
+            ]
+        except Exception as error:
+            raise InvalidCursor(cursor) from error
+
+    def _querysets(self, values: list | None, reverse: bool) -> list[QuerySet]:
+        """Return a query per branch fetching one object more than a page."""
+        order_by = [
+            f"-{name}" if descending != reverse else name
+            for name, descending in self.ordering
+        ]
+        querysets = []
+        for branch in self.branches:
+            queryset = branch.order_by(*order_by)
+            if values is not None:
+                queryset = queryset.filter(self._seek_filter(values, reverse))
+            querysets.append(queryset[: self.per_page + 1])
+        return querysets
+
+    def _merge(self, results: list[list], reverse: bool) -> list:
+        """Merge sorted branch results dropping objects found in several."""
+        key = self._sort_key(reverse)
+        merged, seen = [], set()
+        for obj in heapq.merge(*results, key=key):
+            if obj.pk not in seen:
+                seen.add(obj.pk)
+                merged.append(obj)
+        return merged
+
+    def _sort_key(self, reverse: bool):
+        # heapq.merge sorts ascending, so descending fields are wrapped in an
+        # object with inverted comparison.
+        directions = [descending != reverse for _, descending in self.ordering]
+
+        def key(obj):
+            return tuple(
+                _Reversed(value) if descending else value
+                for value, descending in zip(self._key(obj), directions)
+            )
+
+        return key
+
+    def _key(self, obj) -> list:
+        return [getattr(obj, field.attname) for field in self.fields]
+
+    def _seek_filter(self, values: list, reverse: bool) -> Q:
+        """Build `(f1, f2, ...) > (v1, v2, ...)` in the paging direction.
+
+        The leading bound on the first field is redundant but lets the
+        database seek straight to the cursor instead of filtering a scan.
+        """
+        conditions = []
+        for position, (name, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending != reverse else "gt"
+            equal = {
+                prev_name: values[index]
+                for index, (prev_name, _) in enumerate(self.ordering[:position])
+            }
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": values[position]}))
+        first_name, first_descending = self.ordering[0]
+        bound = "lte" if first_descending != reverse else "gte"
+        return Q(**{f"{first_name}__{bound}": values[0]}) & reduce(or_, conditions)
+
+
+class _Reversed:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: "_Reversed") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Reversed) and self.value == other.value
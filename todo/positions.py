@@ -0,0 +1,120 @@
+"""Fractional position keys ordering entries of a list.
+
+A key is a string compared byte by byte, and there is always a key between
+any two others, so moving an entry rewrites its own key only. Keys use
+digits and lowercase letters, which sort the same in common collations.
+
+A key is an integer part followed by an optional fraction. The first
+character is the number of digits of the integer, so longer integers sort
+after shorter ones. Appending increments the integer, so keys of entries
+added one by one grow only logarithmically. Moving between two neighbours
+takes a fraction between theirs, which grows by a character every few
+moves into the same gap until a background task or `rebalance_positions`
+respaces the list. Keys below zero are fractions after the `0` length
+character.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# Integer part of the first key, leaving room for entries moved before it.
+START = BASE**3 // 2
+
+# Lists with longer keys are respaced by `rebalance_positions`.
+MAX_LENGTH = 12
+
+
+class InvalidPosition(ValueError):
+    """No key fits between given keys."""
+
+
+def encode_int(number: int) -> str:
+    digits = ""
+    while True:
+        number, digit = divmod(number, BASE)
+        digits = DIGITS[digit] + digits
+        if not number:
+            return DIGITS[len(digits)] + digits
+
+
+def split(key: str) -> tuple[str, str]:
+    """Split key into its integer part and its fraction."""
+    if not key or key[0] not in DIGITS:
+        raise InvalidPosition(key)
+    length = DIGITS.index(key[0]) + 1 if key[0] != "0" else 1
+    if len(key) < length or key.endswith("0") and len(key) > length:
+        raise InvalidPosition(key)
+    return key[:length], key[length:]
+
+
+def midpoint(low: str, high: str | None) -> str:
+    """Return fraction between two fractions, `None` standing for one."""
+    if high is not None:
+        # Common prefix stays, `low` being padded with zeros.
+        common = 0
+        while common < len(high) and (low[common : common + 1] or "0") == high[common]:
+            common += 1
+        if common:
+            return high[:common] + midpoint(low[common:], high[common:])
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # Consecutive digits, the fraction goes one digit deeper.
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return DIGITS[low_digit] + midpoint(low[1:], None)
+
+
+def key_after(key: str) -> str:
+    integer, _ = split(key)
+    if integer == "0":
+        return encode_int(0)
+    return encode_int(int(integer[1:], BASE) + 1)
+
+
+def key_before(key: str) -> str:
+    integer, fraction = split(key)
+    if integer == "0":
+        return "0" + midpoint("", fraction)
+    if fraction:
+        return integer
+    number = int(integer[1:], BASE)
+    if number:
+        return encode_int(number - 1)
+    return "0" + midpoint("", None)
+
+
+def key_between(low: str | None, high: str | None) -> str:
+    """Return key sorting after `low` and before `high`, either may be None."""
+    if low is None and high is None:
+        return encode_int(START)
+    if low is None:
+        return key_before(high)  # type: ignore
+    if high is None:
+        return key_after(low)
+    if low >= high:
+        raise InvalidPosition(f"{low} >= {high}")
+    split(high)
+    after = key_after(low)
+    if after < high:
+        return after
+    integer, fraction = split(low)
+    high_integer, high_fraction = split(high)
+    return integer + midpoint(
+        fraction, high_fraction if high_integer == integer else None
+    )
+
+
+def keys_after(key: str | None, count: int) -> list[str]:
+    """Return `count` ascending keys after `key`, from the start if None."""
+    keys = []
+    for _ in range(count):
+        key = key_between(key, None)
+        keys.append(key)
+    return keys
+
+
+def spread(count: int) -> list[str]:
+    """Return `count` short ascending keys for a list respaced from scratch."""
+    return [encode_int(START + number) for number in range(count)]
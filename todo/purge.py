@@ -0,0 +1,63 @@
+"""Removal of soft deleted lists in bounded chunks.
+
+Deleting a list through the collector selects all its entries to send
+signals and cascade, then deletes them in one transaction, which holds the
+SQLite write lock for as long as that takes. Lists are soft deleted instead,
+see `ToDo.soft_delete()`, and purged here afterwards by a background task
+or by `purge_deleted`.
+
+Entries are deleted by plain `DELETE ... WHERE id IN (...)` statements of a
+chunk each, every chunk in its own short transaction, and the purge yields
+between chunks so other writers get the lock. Entries have no delete signals
+and their search index is kept by triggers, so nothing is lost by skipping
+the collector. The list row goes last, in the transaction that finds no
+entries left, so a foreign key never points to a missing list.
+
+Django can't declare `ON DELETE CASCADE` in the database, and a cascade
+would delete all entries in one statement anyway, so entries are deleted
+explicitly on every backend.
+"""
+
+from collections.abc import Iterator
+
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+from yyiktodo.db import write_atomic
+
+from .models import Entry, ToDo
+
+BATCH_SIZE = 1000
+
+
+def purge_list(
+    todo_id: int, using: str | None = None, batch_size: int = BATCH_SIZE
+) -> Iterator[int]:
+    """Delete a soft deleted list, yielding counts of entries deleted per chunk.
+
+    The list is deleted once the generator is exhausted. Lists which are not
+    soft deleted are left alone.
+    """
+    using = using or router.db_for_write(ToDo)
+    lists = ToDo.all_objects.using(using).filter(pk=todo_id, deleted_at__isnull=False)
+    entries = Entry.objects.using(using).filter(todo_id=todo_id)
+    while True:
+        with write_atomic(using=using):
+            if not lists.exists():
+                return
+            ids = list(entries.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                delete_rows(ToDo, [todo_id], using)
+                return
+            deleted = delete_rows(Entry, ids, using)
+        yield deleted
+
+
+def delete_rows(model, ids: list[int], using: str | None) -> int:
+    """Delete rows by primary key in one statement, return their number."""
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", ids)
+        return cursor.rowcount
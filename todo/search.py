@@ -0,0 +1,136 @@
+"""Full-text search over list titles and entry texts.
+
+Both are indexed by SQLite FTS5 tables with external content, so the index
+stores only tokens and reads the texts from `todo_todo` and `todo_entry`.
+Triggers keep it in sync with every write, including bulk ones and raw SQL.
+They fire only on changes of indexed columns, so touches of lists made by
+entries don't rewrite the index.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# (FTS table, content table, indexed column)
+INDEXES = [
+    ("todo_todo_fts", "todo_todo", "title"),
+    ("todo_entry_fts", "todo_entry", "text"),
+]
+
+TOKEN_RE = re.compile(r"\w+")
+
+SEARCH_SQL = """
+SELECT t.id, NULL, bm25(todo_todo_fts) AS rank
+FROM todo_todo_fts
+JOIN todo_todo t ON t.id = todo_todo_fts.rowid
+WHERE todo_todo_fts MATCH %s AND t.deleted_at IS NULL
+  AND (t.public OR t.owner_id = %s)
+UNION ALL
+SELECT e.todo_id, e.id, bm25(todo_entry_fts) AS rank
+FROM todo_entry_fts
+JOIN todo_entry e ON e.id = todo_entry_fts.rowid
+JOIN todo_todo t ON t.id = e.todo_id
+WHERE todo_entry_fts MATCH %s AND t.deleted_at IS NULL
+  AND (t.public OR t.owner_id = %s)
+ORDER BY rank
+LIMIT %s
+"""
+
+
+def create_sql(fts: str, table: str, column: str) -> list[str]:
+    """Statements creating FTS table and triggers for one content table."""
+    insert = f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column});"
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column}, "
+        f"content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def drop_sql(fts: str, table: str, column: str) -> list[str]:
+    """Statements dropping what `create_sql()` creates."""
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def create_index(schema_editor) -> None:
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for index in INDEXES:
+        for sql in create_sql(*index):
+            schema_editor.execute(sql)
+
+
+def drop_index(schema_editor) -> None:
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for index in INDEXES:
+        for sql in drop_sql(*index):
+            schema_editor.execute(sql)
+
+
+def populate_index(schema_editor) -> None:
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for fts, _, _ in INDEXES:
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def rebuild_index(using: str = DEFAULT_DB_ALIAS) -> None:
+    """Recreate missing tables and triggers and reindex all content."""
+    with connections[using].cursor() as cursor:
+        for fts, table, column in INDEXES:
+            for sql in create_sql(fts, table, column):
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def build_query(text: str) -> str:
+    """Turn user input into FTS5 query matching all words.
+
+    Words are quoted so that FTS5 syntax in input is taken literally, and
+    the last one matches as prefix, as it may be not typed in full yet.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return ""
+    return " ".join(f'"{token}"' for token in tokens) + "*"
+
+
+@dataclass
+class Match:
+    """List or entry matching search, with objects filled in by the view."""
+
+    todo_id: int
+    entry_id: int | None
+    rank: float
+    todo: Any = None
+    entry: Any = None
+
+
+def search(
+    text: str, user_id: int | None, limit: int = 50, using: str | None = None
+) -> list[Match]:
+    """Return best matches first among lists public or owned by the user."""
+    query = build_query(text)
+    if not query:
+        return []
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [query, user_id, query, user_id, limit])
+        return [Match(*row) for row in cursor.fetchall()]
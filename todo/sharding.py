@@ -0,0 +1,195 @@
+"""To-do lists and entries partitioned across databases by owner.
+
+`TODO_SHARDS` names the databases holding lists and entries, the first one
+being the default database. Lists live on the shard their owner's id hashes
+to with jump consistent hashing, so adding a shard moves only a share of
+them there, which is what `rebalance_shards` does. Users stay in the
+default database, so lists refer to them without a foreign key constraint.
+
+Ids are unique across shards as every shard counts them in its own range.
+Rebalanced lists keep their ids, so a list is looked up on the shard its id
+comes from first and then on the others.
+
+Queries through an instance, such as `todo.entries`, follow the instance.
+Others have to pick their shard with `using()`: by owner for own lists,
+`candidate_shards()` for lookups by id and `all_shards()` for public ones.
+With a single shard all of them get `None`, which leaves routing to the
+other routers as before sharding.
+"""
+
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import QuerySet
+from django.db.models.signals import post_migrate, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from yyik_tasks.queue import enqueue_on_commit
+from yyiktodo.db import write_atomic
+
+from .models import Entry, ToDo
+
+User = get_user_model()
+
+# Shard `n` counts ids from `n << SHARD_ID_BITS` up.
+SHARD_ID_BITS = 40
+
+
+def shards() -> list[str]:
+    return settings.TODO_SHARDS
+
+
+def is_sharded() -> bool:
+    return len(settings.TODO_SHARDS) > 1
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash of Lamping and Veach.
+
+    Growing `buckets` by one moves only `1 / buckets` of keys, all of them
+    to the new bucket.
+    """
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for_owner(owner_id: int) -> str | None:
+    """Return alias of the shard holding lists of the user."""
+    if not is_sharded():
+        return None
+    aliases = shards()
+    return aliases[jump_hash(owner_id, len(aliases))]
+
+
+def all_shards() -> list[str | None]:
+    return list(shards()) if is_sharded() else [None]
+
+
+def candidate_shards(pk: int) -> list[str | None]:
+    """Return shards to look for a list or an entry in, likeliest first."""
+    if not is_sharded():
+        return [None]
+    aliases = shards()
+    home = pk >> SHARD_ID_BITS
+    if home >= len(aliases):
+        return list(aliases)
+    return [aliases[home]] + aliases[:home] + aliases[home + 1 :]
+
+
+def locate(model, pk: int) -> str | None:
+    """Return shard holding the object, the likeliest one if none does."""
+    candidates = candidate_shards(pk)
+    if len(candidates) > 1:
+        for alias in candidates:
+            if model._base_manager.using(alias).filter(pk=pk).exists():
+                return alias
+    return candidates[0]
+
+
+def with_owners(queryset: QuerySet) -> QuerySet:
+    """Load owners along with lists, by a join where users are stored too."""
+    if is_sharded():
+        return queryset.prefetch_related("owner")
+    return queryset.select_related("owner")
+
+
+def instance_shard(instance) -> str | None:
+    if isinstance(instance, User):
+        return None if instance.pk is None else shard_for_owner(instance.pk)
+    if instance._state.db is not None:
+        return instance._state.db
+    if isinstance(instance, ToDo) and instance.owner_id is not None:  # type: ignore
+        return shard_for_owner(instance.owner_id)  # type: ignore
+    if isinstance(instance, Entry):
+        if Entry.todo.is_cached(instance):  # type: ignore
+            return instance_shard(instance.todo)
+        if instance.todo_id is not None:  # type: ignore
+            return locate(ToDo, instance.todo_id)  # type: ignore
+    return None
+
+
+@contextmanager
+def atomic_on_shards():
+    """Run the block in a write transaction on every shard.
+
+    Transactions are committed one after another, so a failure in between
+    leaves the earlier ones committed.
+    """
+    with ExitStack() as stack:
+        for alias in all_shards():
+            stack.enter_context(write_atomic(using=alias))
+        yield
+
+
+class ShardRouter:
+    """Route lists and entries to the shard of the instance in hints."""
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded() or model not in (ToDo, Entry):
+            return None
+        instance = hints.get("instance")
+        return None if instance is None else instance_shard(instance)
+
+    db_for_write = db_for_read
+
+
+def reset_id_sequences(using: str) -> None:
+    """Keep the shard counting ids in its own range, on SQLite.
+
+    The range starts at the shard's offset, and lists moved in from other
+    shards with higher ids would otherwise move the counter into the range
+    of another shard.
+    """
+    if using not in shards() or connections[using].vendor != "sqlite":
+        return
+    start = shards().index(using) << SHARD_ID_BITS
+    end = start + (1 << SHARD_ID_BITS)
+    with connections[using].cursor() as cursor:
+        for model in (ToDo, Entry):
+            table = model._meta.db_table
+            cursor.execute(
+                f"UPDATE sqlite_sequence SET seq = MAX(%s, "
+                f"(SELECT COALESCE(MAX(id), 0) FROM {table} "
+                f"WHERE id >= %s AND id < %s), "
+                f"CASE WHEN seq < %s THEN seq ELSE 0 END) WHERE name = %s",
+                [start, start, end, end, table],
+            )
+            if start:
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                    "WHERE NOT EXISTS "
+                    "(SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                    [table, start, table],
+                )
+
+
+@receiver(post_migrate, dispatch_uid="todo_shard_offsets")
+def shard_migrated(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sender.label == ToDo._meta.app_label and is_sharded():
+        reset_id_sequences(using)
+
+
+@receiver(pre_delete, sender=User, dispatch_uid="todo_shard_owner_delete")
+def owner_deleted(sender, instance, **kwargs):
+    # Lists are only hidden here and purged in chunks in the background.
+    for alias in all_shards():
+        using = alias or router.db_for_write(ToDo)
+        lists = ToDo.objects.using(using).filter(owner_id=instance.pk)
+        todo_ids = list(lists.values_list("pk", flat=True))
+        if not todo_ids:
+            continue
+        lists.filter(pk__in=todo_ids).update(deleted_at=timezone.now())
+        for todo_id in todo_ids:
+            enqueue_on_commit(
+                "todo.purge_lists",
+                {"todo_id": todo_id, "using": using},
+                key=f"purge:{using}:{todo_id}",
+                using=using,
+            )
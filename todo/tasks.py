@@ -0,0 +1,27 @@
+"""Background work of lists, run by `manage.py run_tasks`."""
+
+import time
+
+from yyik_tasks.queue import task
+from yyiktodo.db import write_atomic
+
+from .models import ToDo
+from .purge import purge_list
+
+# Seconds a purge waits between chunks for other writers.
+PURGE_PAUSE = 0.01
+
+
+@task("todo.purge_lists", batch_size=20)
+def purge_lists(calls: list[dict]) -> None:
+    for call in calls:
+        for _ in purge_list(call["todo_id"], call["using"]):
+            time.sleep(PURGE_PAUSE)
+
+
+@task("todo.respace_entries")
+def respace_entries(todo_id: int, using: str) -> None:
+    with write_atomic(using=using):
+        todo = ToDo.objects.using(using).filter(pk=todo_id).only("pk").first()
+        if todo is not None:
+            todo.respace_entries()
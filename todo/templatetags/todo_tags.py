@@ -2,10 +2,14 @@ from django.template import Library
 from django.urls import reverse
 from django.utils.html import format_html
 
+from yyiktodo.static import ASSETS, vendored_url
+
 from ..models import ToDo
 
 register = Library()
 
+VENDORED = {asset.path: asset for asset in ASSETS}
+
 
 @register.simple_tag
 def get_back_url(todo: ToDo | str) -> str:
@@ -48,3 +52,31 @@ def col(classes=""):
 @register.simple_tag
 def endcol():
     return format_html("</div>")
+
+
+@register.simple_tag(takes_context=True)
+def query_url(context, **params) -> str:
+    """Return current query string with `params` replaced, from the first page."""
+    query = context["request"].GET.copy()
+    query.pop("cursor", None)
+    for key, value in params.items():
+        if value:
+            query[key] = value
+        else:
+            query.pop(key, None)
+    return f"?{query.urlencode()}"
+
+
+@register.simple_tag
+def vendored(path: str) -> str:
+    """Return tag of a vendored asset, linked from the CDN until it is collected."""
+    asset = VENDORED[path]
+    url = vendored_url(asset)
+    integrity = ""
+    if asset.integrity:
+        integrity = format_html(
+            ' integrity="{}" crossorigin="anonymous"', asset.integrity
+        )
+    if path.endswith(".js"):
+        return format_html('<script src="{}"{}></script>', url, integrity)
+    return format_html('<link rel="stylesheet" href="{}"{}>', url, integrity)
@@ -0,0 +1,22 @@
+from django.urls import path
+
+from yyiktodo.urls import urlpatterns as project_urlpatterns
+
+from ..mixins import AsyncConditionalGetMixin
+from ..views import AsyncToDoDetailView, AsyncToDoListView, AsyncUserProfileView
+
+
+class ThreadedToDoDetailView(AsyncToDoDetailView):
+    """Detail page built by the default `aget_response()`."""
+
+    aget_response = AsyncConditionalGetMixin.aget_response
+
+
+# Project URLs with async read views resolved first, as with
+# `TODO_ASYNC_VIEWS` on.
+urlpatterns = [
+    path("", AsyncToDoListView.as_view()),
+    path("<int:pk>/", AsyncToDoDetailView.as_view()),
+    path("users/<str:username>/", AsyncUserProfileView.as_view()),
+    path("threaded/<int:pk>/", ThreadedToDoDetailView.as_view()),
+] + project_urlpatterns
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Entry, ToDo
+
+User = get_user_model()
+
+
+class ToDoBatchViewTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(username="user1", password="pass1")
+        self.user2 = User.objects.create(username="user2", password="pass2")
+        self.public = ToDo.objects.create(title="Public", owner=self.user1, public=True)
+        self.private = ToDo.objects.create(title="Private", owner=self.user1)
+        self.other = ToDo.objects.create(title="Other", owner=self.user2, public=True)
+        self.public.add_entries(["one", "two"])
+        Entry.objects.create(todo=self.other, text="three", completed=True)
+        self.path = reverse("todo:api-lists")
+
+    def get(self, **params):
+        return self.client.get(self.path, params)
+
+    def test_returns_lists_in_requested_order(self):
+        response = self.get(ids=f"{self.other.pk},{self.public.pk}")
+
+        self.assertEqual(response.status_code, 200)
+        lists = response.json()["lists"]
+        self.assertEqual([data["title"] for data in lists], ["Other", "Public"])
+        self.assertEqual(lists[0]["owner"], "user2")
+        self.assertEqual(
+            lists[0]["entries"],
+            [{"id": 3, "text": "three", "completed": True}],
+        )
+
+    def test_selects_fields(self):
+        response = self.get(ids=self.public.pk, fields="title,entries.text")
+
+        self.assertEqual(
+            response.json()["lists"],
+            [{"title": "Public", "entries": [{"text": "one"}, {"text": "two"}]}],
+        )
+
+    def test_keys_keep_field_order(self):
+        response = self.get(
+            ids=self.public.pk, fields="progress,entries.completed,id,entries.id"
+        )
+
+        data = response.json()["lists"][0]
+        self.assertEqual(list(data), ["id", "progress", "entries"])
+        self.assertEqual(list(data["entries"][0]), ["id", "completed"])
+
+    def test_hides_private_from_others(self):
+        self.client.force_login(self.user2)
+        response = self.get(ids=f"{self.private.pk},{self.other.pk}")
+
+        self.assertEqual(response.json()["missing"], [self.private.pk])
+        self.assertEqual(len(response.json()["lists"]), 1)
+
+    def test_shows_private_to_owner(self):
+        self.client.force_login(self.user1)
+        response = self.get(ids=self.private.pk, fields="title")
+
+        self.assertEqual(response.json()["lists"], [{"title": "Private"}])
+
+    def test_query_count_does_not_grow(self):
+        ToDo.objects.bulk_create(
+            [ToDo(title=f"List {i}", owner=self.user2, public=True) for i in range(50)]
+        )
+        ids = ",".join(str(pk) for pk in ToDo.objects.values_list("pk", flat=True))
+
+        with self.assertNumQueries(2):
+            response = self.get(ids=ids)
+        self.assertEqual(len(response.json()["lists"]), 52)
+        self.assertEqual(response.json()["missing"], [self.private.pk])
+
+    def test_bad_requests(self):
+        for params in (
+            {},
+            {"ids": "1,x"},
+            {"ids": ",".join(str(pk) for pk in range(1, 102))},
+            {"ids": "1", "fields": "password"},
+        ):
+            with self.subTest(params=params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
@@ -0,0 +1,96 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from ..models import ToDo
+from ..views import AsyncToDoDetailView, AsyncToDoListView, AsyncUserProfileView
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF="todo.tests.async_urls")
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        caches["profiles"].clear()
+        caches["fragments"].clear()
+        self.user1 = User.objects.create(username="user1", password="pass1")
+        self.user2 = User.objects.create(username="user2", password="pass2")
+        self.public = ToDo.objects.create(
+            title="User1 public list", owner=self.user1, public=True
+        )
+        self.private = ToDo.objects.create(title="User1 private list", owner=self.user1)
+        self.public.add_entries(["First entry", "Second entry"])
+
+    def test_views_are_async(self):
+        for view in (AsyncToDoListView, AsyncToDoDetailView, AsyncUserProfileView):
+            self.assertTrue(view.view_is_async)
+
+    async def test_list_respects_visibility(self):
+        response = await self.async_client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "User1 public list")
+        self.assertNotContains(response, "User1 private list")
+
+    async def test_list_shows_own_lists(self):
+        await sync_to_async(self.async_client.force_login)(self.user1)
+        response = await self.async_client.get("/", {"sort": "progress"})
+
+        self.assertContains(response, "User1 private list")
+        self.assertEqual(response["Cache-Control"], "no-cache, private")
+
+    async def test_list_invalid_cursor(self):
+        response = await self.async_client.get("/", {"cursor": "!"})
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_detail_renders_and_caches_entries(self):
+        await sync_to_async(self.async_client.force_login)(self.user1)
+        path = f"/{self.public.pk}/"
+        first = await self.async_client.get(path)
+        second = await self.async_client.get(path)
+
+        for response in (first, second):
+            self.assertContains(response, "Second entry")
+            self.assertContains(response, 'form="entry-bulk-form"', count=2)
+        self.assertEqual(len(caches["fragments"]._cache), 1)  # type: ignore
+
+    async def test_default_response_runs_sync_view(self):
+        await sync_to_async(self.async_client.force_login)(self.user1)
+        response = await self.async_client.get(f"/threaded/{self.private.pk}/")
+
+        self.assertContains(response, "User1 private list")
+        self.assertIn("ETag", response)
+
+    async def test_detail_hides_private_list(self):
+        await sync_to_async(self.async_client.force_login)(self.user2)
+        response = await self.async_client.get(f"/{self.private.pk}/")
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_detail_not_modified(self):
+        path = f"/{self.public.pk}/"
+        response = await self.async_client.get(path)
+        response = await self.async_client.get(
+            path, **{"If-None-Match": response["ETag"]}
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    async def test_profile(self):
+        response = await self.async_client.get("/users/user1/")
+
+        self.assertContains(response, "User1 public list")
+        self.assertNotContains(response, "User1 private list")
+        response = await self.async_client.get("/users/nobody/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_changed_password_logs_out(self):
+        await sync_to_async(self.async_client.force_login)(self.user1)
+        self.user1.set_password("new password")
+        await sync_to_async(self.user1.save)()
+
+        response = await self.async_client.get("/")
+
+        self.assertNotContains(response, "User1 private list")
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from ..cache import bump_version, cache, get_profile, version_key
+from ..models import ToDo
+
+User = get_user_model()
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        caches["profiles"].clear()
+        self.user = User.objects.create(username="user", password="pass")
+        self.public = ToDo.objects.create(title="Public", owner=self.user, public=True)
+        self.private = ToDo.objects.create(title="Private", owner=self.user)
+        self.path = reverse("todo:profile", args=("user",))
+        self.client.get(self.path)
+
+    def test_cached_profile_makes_no_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.path)
+
+        self.assertContains(response, "Public")
+        self.assertNotContains(response, "Private")
+
+    def test_public_list_changes_invalidate(self):
+        changes = [
+            lambda: ToDo.objects.create(title="New", owner=self.user, public=True),
+            lambda: setattr(self.public, "title", "Renamed") or self.public.save(),
+            lambda: setattr(self.private, "public", True) or self.private.save(),
+            lambda: setattr(self.public, "public", False) or self.public.save(),
+            lambda: ToDo.objects.get(title="New").delete(),
+        ]
+        for change in changes:
+            with self.subTest(change=change):
+                change()
+                with self.assertNumQueries(2):
+                    self.client.get(self.path)
+
+        response = self.client.get(self.path)
+        self.assertContains(response, "Private")
+        self.assertNotContains(response, "Renamed")
+        self.assertNotContains(response, "New")
+
+    def test_private_list_changes_keep_cache(self):
+        self.private.title = "Renamed"
+        self.private.save()
+        ToDo.objects.create(title="New", owner=self.user)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.path)
+
+    def test_updates_invalidate_once_bumped(self):
+        # `QuerySet.update()` sends no signals.
+        ToDo.objects.filter(pk=self.private.pk).update(public=True)
+        self.assertNotContains(self.client.get(self.path), "Private")
+
+        bump_version(self.user.pk)
+        self.assertContains(self.client.get(self.path), "Private")
+
+    def test_version_is_bumped_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.public.title = "Renamed"
+            self.public.save()
+        version = cache.get(version_key(self.user.pk))
+
+        callbacks[-1]()
+        self.assertNotEqual(cache.get(version_key(self.user.pk)), version)
+
+    def test_login_keeps_cache(self):
+        self.client.force_login(self.user)
+
+        with self.assertNumQueries(0):
+            get_profile("user")
+
+    def test_renamed_user_is_not_found_by_old_name(self):
+        self.user.username = "renamed"
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.path).status_code, 404)
+        response = self.client.get(reverse("todo:profile", args=("renamed",)))
+        self.assertContains(response, "Public")
+
+    def test_deleted_user_is_not_found(self):
+        self.user.delete()
+
+        self.assertEqual(self.client.get(self.path).status_code, 404)
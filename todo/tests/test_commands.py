@@ -0,0 +1,300 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Entry, ToDo
+from ..purge import purge_list
+
+User = get_user_model()
+
+
+class RecountEntriesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="U_S_E_R", password="123")
+        self.todo: ToDo = ToDo.objects.create(title="Title", owner=self.user)
+        self.todo.add_entries(["one", "two"])
+        Entry.objects.bulk_create([Entry(todo=self.todo, text="three", completed=True)])
+
+    def test_check_fails_on_wrong_counters(self):
+        with self.assertRaises(CommandError):
+            call_command("recount_entries", check=True, stdout=StringIO())
+
+        self.todo.refresh_from_db()
+        self.assertEqual(self.todo.entry_count, 2)
+
+    def test_recount_fixes_counters(self):
+        out = StringIO()
+        call_command("recount_entries", batch_size=1, stdout=out)
+
+        self.assertIn("1 had wrong counters", out.getvalue())
+        self.todo.refresh_from_db()
+        self.assertEqual(
+            (self.todo.entry_count, self.todo.completed_count, self.todo.progress),
+            (3, 1, 33),
+        )
+        call_command("recount_entries", check=True, stdout=StringIO())
+
+
+class RebalancePositionsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="U_S_E_R", password="123")
+        self.todo: ToDo = ToDo.objects.create(title="Title", owner=self.user)
+        self.one, self.two, self.three = self.todo.add_entries(["one", "two", "three"])
+        for _ in range(10):
+            self.three.move(self.two)
+            self.two.move(self.three)
+
+    def test_rebalance_shortens_keys(self):
+        entries = self.todo.entries.order_by(*Entry.ORDERING)
+        order = list(entries.values_list("text", flat=True))
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebalance_positions", max_length=6, check=True, stdout=StringIO()
+            )
+
+        call_command("rebalance_positions", max_length=6, stdout=StringIO())
+
+        self.assertEqual(list(entries.values_list("text", flat=True)), order)
+        self.assertLessEqual(max(len(e.position) for e in entries), 4)
+        call_command("rebalance_positions", max_length=6, check=True, stdout=StringIO())
+
+
+class PurgeDeletedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="U_S_E_R", password="123")
+        self.deleted: ToDo = ToDo.objects.create(title="Deleted", owner=self.user)
+        self.deleted.add_entries([f"entry {number}" for number in range(5)])
+        self.kept: ToDo = ToDo.objects.create(title="Kept", owner=self.user)
+        self.kept.add_entries(["kept"])
+
+    def test_soft_delete_hides_list(self):
+        with self.assertNumQueries(1):
+            self.deleted.soft_delete()
+
+        self.assertEqual(list(self.user.todo_list.all()), [self.kept])
+        self.assertEqual(Entry.objects.count(), 6)
+
+    def test_soft_delete_queues_purge(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.deleted.soft_delete()
+        call_command("run_tasks", once=True, threads=0, stdout=StringIO())
+
+        self.assertEqual(ToDo.all_objects.count(), 1)
+        self.assertEqual(list(Entry.objects.values_list("text", flat=True)), ["kept"])
+
+    def test_purge_deletes_entries_in_chunks(self):
+        self.deleted.soft_delete()
+        chunks = purge_list(self.deleted.pk, batch_size=2)
+
+        self.assertEqual(list(chunks), [2, 2, 1])
+        self.assertFalse(ToDo.all_objects.filter(pk=self.deleted.pk).exists())
+        self.assertEqual(list(Entry.objects.values_list("text", flat=True)), ["kept"])
+        self.assertEqual(list(purge_list(self.kept.pk)), [])
+        self.assertTrue(ToDo.objects.filter(pk=self.kept.pk).exists())
+
+    def test_purge_command_skips_recent_deletes(self):
+        self.deleted.soft_delete()
+
+        call_command("purge_deleted", older_than=60, stdout=StringIO())
+        self.assertEqual(ToDo.all_objects.count(), 2)
+        out = StringIO()
+        call_command("purge_deleted", batch_size=2, pause=0, stdout=out)
+
+        self.assertIn("Purged 1 lists and 5 entries", out.getvalue())
+        self.assertEqual(ToDo.all_objects.count(), 1)
+
+
+class ExportImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="U_S_E_R", password="123")
+        self.todo: ToDo = ToDo.objects.create(title="Title", owner=self.user)
+        self.other: ToDo = ToDo.objects.create(
+            title="Other", owner=self.user, public=True
+        )
+        self.todo.add_entries(["one", "two"])
+        self.todo.set_entries_completed([self.todo.entries.first().pk], True)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "dump.ndjson")
+
+    def snapshot(self):
+        return (
+            # Owners are recreated with new ids, compared by username below.
+            [
+                {**todo, "owner_id": None}
+                for todo in ToDo.objects.order_by("pk").values()
+            ],
+            list(Entry.objects.order_by("pk").values()),
+            list(ToDo.objects.values_list("owner__username", flat=True)),
+        )
+
+    def export_and_clear(self):
+        call_command("export_todos", output=self.path, stderr=StringIO())
+        expected = self.snapshot()
+        ToDo.objects.all().delete()
+        User.objects.all().delete()
+        return expected
+
+    def test_export_writes_lists_before_entries(self):
+        out = StringIO()
+        call_command("export_todos", stdout=out, stderr=StringIO())
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["model"] for row in rows], ["todo"] * 2 + ["entry"] * 2)
+        self.assertEqual(rows[0]["owner"], "U_S_E_R")
+        self.assertEqual(rows[0]["completed_count"], 1)
+
+    def test_round_trip_keeps_ids_owners_and_timestamps(self):
+        expected = self.export_and_clear()
+
+        out = StringIO()
+        call_command("import_todos", self.path, batch_size=3, stdout=out)
+
+        self.assertIn("Imported 4 rows", out.getvalue())
+        self.assertEqual(self.snapshot(), expected)
+        self.assertFalse(User.objects.get().has_usable_password())
+        # Sequences continue after imported ids.
+        self.assertGreater(
+            ToDo.objects.create(title="New", owner=User.objects.get()).pk,
+            self.other.pk,
+        )
+
+    def test_import_resumes_from_checkpoint(self):
+        self.export_and_clear()
+        checkpoint = os.path.join(self.directory.name, "checkpoint.json")
+        call_command("import_todos", self.path, batch_size=3, stdout=StringIO())
+        Entry.objects.filter(text="two").delete()
+        with open(checkpoint, "w") as file:
+            json.dump({"lines": 3}, file)
+
+        out = StringIO()
+        call_command(
+            "import_todos",
+            self.path,
+            batch_size=3,
+            checkpoint=checkpoint,
+            stdout=out,
+        )
+
+        self.assertIn("Imported 1 rows", out.getvalue())
+        self.assertEqual(Entry.objects.count(), 2)
+        with open(checkpoint) as file:
+            self.assertEqual(json.load(file), {"lines": 4})
+
+    def test_import_skips_rows_imported_already(self):
+        call_command("export_todos", output=self.path, stderr=StringIO())
+        expected = self.snapshot()
+
+        out = StringIO()
+        call_command("import_todos", self.path, stdout=out)
+
+        self.assertIn("Imported 0 rows", out.getvalue())
+        self.assertIn("Skipped 2 lists imported already.", out.getvalue())
+        self.assertIn("Skipped 2 entries imported already.", out.getvalue())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_import_fails_on_ids_taken_by_other_lists(self):
+        self.export_and_clear()
+        owner = User.objects.create(username="other")
+        ToDo.objects.create(id=self.todo.pk, title="Unrelated", owner=owner)
+
+        with self.assertRaisesMessage(CommandError, f"[{self.todo.pk}]"):
+            call_command("import_todos", self.path, stdout=StringIO())
+
+        self.assertEqual(ToDo.objects.get().title, "Unrelated")
+        self.assertFalse(Entry.objects.exists())
+
+    def test_export_and_import_filter_by_owner(self):
+        owner = User.objects.create(username="other")
+        todo = ToDo.objects.create(title="Theirs", owner=owner)
+        todo.add_entries(["three"])
+        out = StringIO()
+        call_command("export_todos", owners=["other"], stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [todo.pk, todo.entries.get().pk])
+
+        self.export_and_clear()
+        call_command("import_todos", self.path, owners=["other"], stdout=StringIO())
+
+        self.assertEqual(list(ToDo.objects.values_list("title", flat=True)), ["Theirs"])
+        self.assertEqual(list(Entry.objects.values_list("text", flat=True)), ["three"])
+        with self.assertRaisesMessage(CommandError, "No users named nobody."):
+            call_command("export_todos", owners=["nobody"], stderr=StringIO())
+
+
+class GenerateDataTests(TestCase):
+    def test_generated_counters_match_entries(self):
+        out = StringIO()
+        call_command(
+            "generate_data",
+            lists=30,
+            users=3,
+            entries=4,
+            public=1,
+            seed=1,
+            batch_size=7,
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        self.assertIn("Created 3 users, 30 lists", out.getvalue())
+        self.assertEqual(ToDo.objects.filter(public=True).count(), 30)
+        self.assertEqual(User.objects.filter(username__startswith="user").count(), 3)
+        call_command("recount_entries", check=True, stdout=StringIO())
+
+
+class BenchmarkViewsTests(TestCase):
+    def setUp(self):
+        call_command(
+            "generate_data",
+            lists=5,
+            users=1,
+            entries=6,
+            public=1,
+            seed=2,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "benchmark.json")
+
+    def benchmark(self, **options):
+        out = StringIO()
+        call_command(
+            "benchmark_views",
+            iterations=1,
+            warmup=0,
+            stdout=out,
+            stderr=StringIO(),
+            **options,
+        )
+        return out.getvalue()
+
+    def test_every_route_is_measured(self):
+        self.benchmark(output=self.path)
+
+        with open(self.path) as file:
+            results = json.load(file)
+        self.assertIn("todo:entry-bulk", results["routes"])
+        self.assertEqual(results["meta"]["lists"], 5)
+        # Writes are rolled back.
+        self.assertFalse(Entry.objects.filter(text="Benchmark entry").exists())
+
+    def test_compare_reports_more_queries(self):
+        self.benchmark(output=self.path, routes=["todo:todo-list"])
+        with open(self.path) as file:
+            results = json.load(file)
+        results["routes"]["todo:todo-list"]["queries"] = 0
+        with open(self.path, "w") as file:
+            json.dump(results, file)
+
+        with self.assertRaises(CommandError):
+            self.benchmark(
+                compare=self.path, routes=["todo:todo-list"], fail_on_regression=True
+            )
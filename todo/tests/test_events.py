@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.db import close_old_connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..events import RELOAD, EventHub, event_stream, hub
+from ..models import Entry, ToDo
+
+User = get_user_model()
+
+
+class EventHubTests(SimpleTestCase):
+    async def test_publish_from_other_thread(self):
+        events = EventHub()
+        subscription = events.subscribe(1)
+        other = events.subscribe(2)
+
+        thread = threading.Thread(target=events.publish, args=(1, {"type": "x"}))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {"type": "x"})
+        self.assertTrue(other.queue.empty())
+
+    async def test_overflow_drops_events_and_asks_to_reload(self):
+        events = EventHub(maxsize=2)
+        subscription = events.subscribe(1)
+
+        for number in range(4):
+            events.publish(1, {"type": "entry", "id": number})
+        await asyncio.sleep(0)
+
+        received = [await subscription.get() for _ in range(3)]
+        self.assertEqual([event.get("id") for event in received], [0, 1, None])
+        self.assertEqual(received[-1], RELOAD)
+
+    async def test_unsubscribe(self):
+        events = EventHub()
+        events.unsubscribe(events.subscribe(1))
+
+        events.publish(1, {"type": "x"})
+        self.assertEqual(events._subscriptions, {})
+
+
+class EntryEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user", password="pass")
+        self.todo = ToDo.objects.create(title="List", owner=self.user, public=True)
+        self.private = ToDo.objects.create(title="Private", owner=self.user)
+        # Like the test client, keep the test transaction's connection open.
+        for signal in (signals.request_started, signals.request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def write(self, function):
+        def run():
+            with self.captureOnCommitCallbacks(execute=True):
+                return function()
+
+        return sync_to_async(run)()
+
+    async def test_entry_writes_publish_after_commit(self):
+        subscription = hub.subscribe(self.todo.pk)
+        self.addCleanup(hub.unsubscribe, subscription)
+
+        entry = await self.write(
+            lambda: Entry.objects.create(todo=self.todo, text="Milk")
+        )
+        entry_id = entry.pk
+        entry.completed = True
+        await self.write(entry.save)
+        await self.write(entry.delete)
+        await self.write(lambda: self.todo.add_entries(["Bread"]))
+
+        events = [await asyncio.wait_for(subscription.get(), 1) for _ in range(4)]
+        self.assertEqual(
+            [(event["type"], event.get("action")) for event in events],
+            [
+                ("entry", "created"),
+                ("entry", "updated"),
+                ("entry", "deleted"),
+                ("reload", None),
+            ],
+        )
+        self.assertEqual(events[2]["id"], entry_id)
+        self.assertTrue(events[1]["completed"])
+
+    def published(self, path: str, data: dict) -> list[dict]:
+        """Post `data` as scripts do, return events published for the list."""
+        listened = mock.patch.dict(hub._subscriptions, {self.todo.pk: set()})
+        with listened, mock.patch.object(hub, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(path, data, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        return [event for _, event in (call.args for call in publish.call_args_list)]
+
+    def test_fragment_endpoints_publish_entries(self):
+        # Pages apply entry events in place, a reload would undo the point
+        # of answering with the entry alone.
+        self.client.force_login(self.user)
+
+        [created] = self.published(
+            reverse("todo:entry-create", args=(self.todo.pk,)), {"text": "Milk"}
+        )
+        entry = Entry.objects.get(todo=self.todo)
+        [toggled] = self.published(
+            reverse("todo:entry-toggle", args=(entry.pk,)), {"completed": "on"}
+        )
+
+        self.assertEqual(
+            (created["type"], created["action"], created["id"]),
+            ("entry", "created", entry.pk),
+        )
+        self.assertEqual(
+            (toggled["type"], toggled["action"], toggled["id"]),
+            ("entry", "updated", entry.pk),
+        )
+        self.assertTrue(toggled["completed"])
+
+    def test_move_publishes_neighbour(self):
+        self.client.force_login(self.user)
+        first, second = self.todo.add_entries(["First", "Second"])
+
+        [moved] = self.published(
+            reverse("todo:entry-move", args=(second.pk,)), {"before": first.pk}
+        )
+
+        self.assertEqual(
+            moved,
+            {
+                "type": "entry",
+                "action": "moved",
+                "id": second.pk,
+                "target": first.pk,
+                "after": False,
+            },
+        )
+
+    async def stream(self, path):
+        """Run event stream, return sent messages and a way to disconnect."""
+        disconnect = asyncio.Event()
+        sent = []
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+        task = asyncio.ensure_future(event_stream(scope, receive, send))
+        return task, sent, disconnect
+
+    async def test_stream_sends_events(self):
+        task, sent, disconnect = await self.stream(f"/{self.todo.pk}/events/")
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+
+        hub.publish(self.todo.pk, {"type": "entry", "id": 1})
+        while len(sent) < 3:
+            await asyncio.sleep(0.01)
+        disconnect.set()
+        await asyncio.wait_for(task, 1)
+
+        self.assertEqual(sent[0]["status"], 200)
+        body = sent[2]["body"].decode()
+        self.assertTrue(body.startswith("event: entry\ndata: "))
+        self.assertEqual(
+            json.loads(body.split("data: ")[1]), {"type": "entry", "id": 1}
+        )
+        self.assertNotIn(self.todo.pk, hub._subscriptions)
+
+    async def test_stream_hides_private_list(self):
+        task, sent, _ = await self.stream(f"/{self.private.pk}/events/")
+        await asyncio.wait_for(task, 1)
+
+        self.assertEqual(sent[0]["status"], 404)
@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import PublicFeedItem, ToDo
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user", password="pass")
+        self.todo = self.user.todo_list.create(title="Public", public=True)
+
+    def item(self) -> PublicFeedItem | None:
+        return PublicFeedItem.objects.filter(pk=self.todo.pk).first()
+
+    def test_item_follows_list(self):
+        todo = ToDo.objects.get(pk=self.todo.pk)
+        todo.title = "Renamed"
+        todo.save()
+        self.assertEqual(self.item().title, "Renamed")  # type: ignore
+
+        todo.public = False
+        todo.save()
+        self.assertIsNone(self.item())
+        todo.public = True
+        todo.save()
+        self.assertEqual(self.item().owner_username, "user")  # type: ignore
+
+        todo.soft_delete()
+        self.assertIsNone(self.item())
+
+    def test_item_follows_entries(self):
+        self.todo.add_entries(["one", "two"])
+        self.todo.entries.first().delete()  # type: ignore
+        entry = self.todo.entries.get()
+        entry.completed = True
+        entry.save()
+
+        todo = ToDo.objects.get(pk=self.todo.pk)
+        item = self.item()
+        self.assertEqual(
+            (item.modified_at, item.entry_count, item.progress),  # type: ignore
+            (todo.modified_at, 1, 100),
+        )
+
+    def test_item_follows_owner(self):
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(self.item().owner_username, "renamed")  # type: ignore
+
+        self.user.delete()
+        self.assertIsNone(self.item())
+
+    def test_anonymous_list_reads_feed_only(self):
+        self.user.todo_list.create(title="Private")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("todo:todo-list"))
+
+        self.assertContains(response, "Public")
+        self.assertNotContains(response, "Private")
+        for query in queries.captured_queries:
+            self.assertIn('FROM "todo_publicfeeditem"', query["sql"])
+            self.assertNotIn("JOIN", query["sql"])
+
+    def test_rebuild_restores_feed(self):
+        ToDo.objects.filter(pk=self.todo.pk).update(title="Renamed")
+        PublicFeedItem.objects.create(
+            id=1000,
+            owner_id=self.user.pk,
+            title="Gone",
+            modified_at=self.todo.created_at,
+        )
+
+        call_command("rebuild_feed", stdout=StringIO())
+
+        self.assertEqual(
+            list(PublicFeedItem.objects.values_list("title", "owner_username")),
+            [("Renamed", "user")],
+        )
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from yyiktodo.metrics import RollingHistogram, registry
+
+from ..models import ToDo
+
+User = get_user_model()
+
+
+class RollingHistogramTests(SimpleTestCase):
+    def test_percentiles_of_recent_samples(self):
+        histogram = RollingHistogram(size=100)
+        for value in range(200):
+            histogram.add(value)
+
+        self.assertEqual(histogram.percentiles((0.5, 0.9, 0.99)), [150, 189, 198])
+        self.assertEqual(histogram.count, 200)
+        self.assertEqual(histogram.sum, sum(range(200)))
+
+    def test_empty(self):
+        self.assertEqual(RollingHistogram(size=10).percentiles((0.5,)), [0.0])
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.histograms.clear()
+        self.user = User.objects.create(username="user", password="pass")
+        self.todo = ToDo.objects.create(title="List", owner=self.user, public=True)
+
+    def test_records_by_url_name(self):
+        self.client.get(reverse("todo:todo-detail", args=(self.todo.pk,)))
+        self.client.get(reverse("todo:todo-detail", args=(self.todo.pk,)))
+        self.client.get("/missing/page/")
+
+        queries = registry.histograms["sql_queries", "todo:todo-detail"]
+        self.assertEqual(queries.count, 2)
+        self.assertGreater(queries.sum, 0)
+        self.assertEqual(
+            registry.histograms["request_seconds", "<unresolved>"].count, 1
+        )
+
+    @override_settings(METRICS_SLOW_REQUEST=0)
+    def test_logs_slow_requests_with_queries(self):
+        with self.assertLogs("yyiktodo.metrics", "WARNING") as logs:
+            self.client.get(reverse("todo:todo-list"))
+
+        self.assertIn("Slow request GET / (todo:todo-list)", logs.output[0])
+        self.assertIn("FROM", logs.output[0])
+
+    @override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_endpoint(self):
+        self.client.get(reverse("todo:todo-list"))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'request_seconds_count{view="todo:todo-list"} 1')
+        self.assertContains(
+            response, 'sql_queries{view="todo:todo-list",quantile="0.5"}'
+        )
+
+    def test_endpoint_is_private(self):
+        # Requests proxied from the same host come from `INTERNAL_IPS`.
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
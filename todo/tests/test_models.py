@@ -136,3 +136,124 @@ class EntryTests(TestCase):
             text="texttext",
         )
         self.assertEqual(str(entry), "texttext")
+
+    def test_todo_add_entries(self):
+        with self.assertNumQueries(2):
+            entries = self.todo.add_entries(["one", "two", "three"])
+
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(self.todo.entries.count(), 3)
+
+    def test_todo_set_entries_completed(self):
+        one, two = self.todo.add_entries(["one", "two"])
+
+        changed = self.todo.set_entries_completed([one.pk, two.pk], True)
+        self.assertEqual(changed, 2)
+        self.assertEqual(self.todo.entries.filter(completed=True).count(), 2)
+
+        changed = self.todo.set_entries_completed([one.pk, two.pk], True)
+        self.assertEqual(changed, 0)
+
+    def test_todo_clear_completed_entries_is_one_statement(self):
+        self.todo.add_entries([f"text {i}" for i in range(500)])
+        self.todo.entries.update(completed=True)
+
+        with self.assertNumQueries(2):
+            deleted = self.todo.delete_entries(completed=True)
+        self.assertEqual(deleted, 500)
+        self.assertFalse(self.todo.entries.exists())
+
+
+class EntryCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="U_S_E_R",
+            password="123",
+        )
+        self.todo: ToDo = ToDo.objects.create(
+            title="Title",
+            owner=self.user,
+        )
+
+    def assertCounters(self, entries, completed, progress, todo=None):
+        todo = todo or ToDo.objects.get(pk=self.todo.pk)
+        self.assertEqual(
+            (todo.entry_count, todo.completed_count, todo.progress),
+            (entries, completed, progress),
+        )
+
+    def test_entry_create_counts(self):
+        Entry.objects.create(todo=self.todo, text="one")
+        Entry.objects.create(todo=self.todo, text="two", completed=True)
+
+        self.assertCounters(2, 1, 50)
+        self.assertCounters(2, 1, 50, todo=self.todo)
+
+    def test_entry_toggle_counts(self):
+        Entry.objects.create(todo=self.todo, text="one")
+        entry = Entry.objects.get(todo=self.todo)
+        entry.completed = True
+        entry.save()
+        self.assertCounters(1, 1, 100)
+
+        entry.save()
+        self.assertCounters(1, 1, 100)
+
+        entry.completed = False
+        entry.save()
+        self.assertCounters(1, 0, 0)
+
+    def test_entry_delete_counts(self):
+        Entry.objects.create(todo=self.todo, text="one", completed=True)
+        Entry.objects.create(todo=self.todo, text="two")
+        Entry.objects.get(text="one").delete()
+
+        self.assertCounters(1, 0, 0)
+
+    def test_entry_moved_to_other_list_counts_there(self):
+        other = ToDo.objects.create(title="Other", owner=self.user)
+        Entry.objects.create(todo=other, text="first")
+        Entry.objects.create(todo=self.todo, text="one", completed=True)
+        Entry.objects.create(todo=self.todo, text="two")
+
+        entry = Entry.objects.get(text="one")
+        entry.todo = other
+        entry.save()
+
+        self.assertCounters(1, 0, 0)
+        self.assertCounters(2, 1, 50, todo=ToDo.objects.get(pk=other.pk))
+        self.assertEqual(
+            list(
+                other.entries.order_by(*Entry.ORDERING).values_list("text", flat=True)
+            ),
+            ["first", "one"],
+        )
+
+        entry.delete()
+        self.assertCounters(1, 0, 0, todo=ToDo.objects.get(pk=other.pk))
+
+    def test_bulk_counts(self):
+        entries = self.todo.add_entries(["one", "two", "three", "four"])
+        self.assertCounters(4, 0, 0)
+
+        self.todo.set_entries_completed([entry.pk for entry in entries[:3]], True)
+        self.assertCounters(4, 3, 75)
+
+        self.todo.set_entries_completed([entries[0].pk], False)
+        self.assertCounters(4, 2, 50)
+
+        self.todo.delete_entries([entries[0].pk, entries[1].pk])
+        self.assertCounters(2, 1, 50)
+
+        self.todo.delete_entries(completed=True)
+        self.assertCounters(1, 0, 0)
+
+    def test_todo_save_keeps_counters(self):
+        stale = ToDo.objects.get(pk=self.todo.pk)
+        Entry.objects.create(todo=self.todo, text="one")
+        stale.title = "New title"
+        stale.save()
+
+        todo = ToDo.objects.get(pk=self.todo.pk)
+        self.assertEqual(todo.title, "New title")
+        self.assertEqual(todo.entry_count, 1)
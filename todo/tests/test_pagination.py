@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..feed import rebuild as rebuild_feed
+from ..models import ToDo
+from ..pagination import InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor
+
+User = get_user_model()
+
+
+class CursorTests(TestCase):
+    def test_cursor_roundtrip(self):
+        now = timezone.now()
+        token = encode_cursor([now, 42], reverse=True)
+
+        values, reverse = decode_cursor(token)
+        self.assertEqual(values, [now.isoformat(), 42])
+        self.assertIs(reverse, True)
+
+    def test_garbage_cursor_fails(self):
+        self.assertRaises(InvalidCursor, decode_cursor, "not a cursor")
+        self.assertRaises(InvalidCursor, decode_cursor, encode_cursor([]) + "!!")
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(username="user1", password="pass1")
+        self.user2 = User.objects.create(username="user2", password="pass2")
+        now = timezone.now()
+        ToDo.objects.bulk_create(
+            [
+                ToDo(title=f"List {i}", owner=self.user1, public=i % 2 == 0)
+                for i in range(7)
+            ]
+            + [
+                ToDo(title=f"Other {i}", owner=self.user2, public=True)
+                for i in range(3)
+            ]
+        )
+        # Two lists share a timestamp to check the tie breaker.
+        for i, todo in enumerate(ToDo.objects.order_by("id")):
+            modified_at = now - timedelta(minutes=i if i != 5 else 4)
+            ToDo.objects.filter(pk=todo.pk).update(modified_at=modified_at)
+
+    def expected(self, queryset):
+        return list(queryset.order_by("-modified_at", "-id"))
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append(list(page))
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_pages_cover_everything_once(self):
+        queryset = ToDo.objects.all()
+        pages, _ = self.walk(KeysetPaginator(queryset, 3))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected(queryset))
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator = KeysetPaginator(ToDo.objects.all(), 3)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_previous())
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_branches_are_merged_without_duplicates(self):
+        branches = [
+            ToDo.objects.filter(public=True),
+            ToDo.objects.filter(owner=self.user1),
+        ]
+        pages, _ = self.walk(KeysetPaginator(branches, 4))
+
+        visible = ToDo.objects.filter(Q(public=True) | Q(owner=self.user1))
+        self.assertEqual(sum(pages, []), self.expected(visible))
+
+    def test_page_does_not_count(self):
+        paginator = KeysetPaginator(ToDo.objects.all(), 3)
+        first = paginator.page()
+
+        with self.assertNumQueries(1) as context:
+            paginator.page(first.next_cursor)
+        self.assertNotIn("COUNT", context.captured_queries[0]["sql"])
+
+    def test_wrong_cursor_length_fails(self):
+        paginator = KeysetPaginator(ToDo.objects.all(), 3)
+
+        self.assertRaises(InvalidCursor, paginator.page, encode_cursor([1]))
+
+
+class KeysetPaginatedViewsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user1", password="pass1")
+        ToDo.objects.bulk_create(
+            [
+                ToDo(title=f"List #{i:02}", owner=self.user, public=True)
+                for i in range(25)
+            ]
+        )
+        rebuild_feed()
+
+    def test_todo_list_paginates(self):
+        response = self.client.get(reverse("todo:todo-list"))
+
+        self.assertEqual(len(response.context["todo_list"]), 20)  # type: ignore
+        page = response.context["page_obj"]  # type: ignore
+        self.assertContains(response, f"?cursor={page.next_cursor}")
+
+        response = self.client.get(
+            reverse("todo:todo-list"), {"cursor": page.next_cursor}
+        )
+        self.assertEqual(len(response.context["todo_list"]), 5)  # type: ignore
+
+    def test_my_todo_list_paginates(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("todo:todo-list-my"))
+
+        self.assertEqual(len(response.context["todo_list"]), 20)  # type: ignore
+        self.assertTrue(response.context["page_obj"].has_next())  # type: ignore
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse("todo:todo-list"), {"cursor": "???"})
+
+        self.assertEqual(response.status_code, 404)
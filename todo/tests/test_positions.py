@@ -0,0 +1,113 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Entry, ToDo
+from ..positions import InvalidPosition, key_between, keys_after, spread
+
+User = get_user_model()
+
+
+class KeyTests(SimpleTestCase):
+    def test_keys_stay_between_neighbours(self):
+        generator = random.Random(0)
+        keys = [key_between(None, None)]
+        for _ in range(2000):
+            index = generator.randrange(len(keys) + 1)
+            low = keys[index - 1] if index else None
+            high = keys[index] if index < len(keys) else None
+            key = key_between(low, high)
+            self.assertTrue(low is None or low < key)
+            self.assertTrue(high is None or key < high)
+            keys.insert(index, key)
+        self.assertEqual(keys, sorted(keys))
+
+    def test_appended_keys_stay_short(self):
+        keys = keys_after(None, 10000)
+
+        self.assertEqual(keys, sorted(keys))
+        self.assertLessEqual(max(map(len, keys)), 5)
+
+    def test_keys_before_first_go_below_zero(self):
+        key = key_between(None, None)
+        for _ in range(30000):
+            lower = key_between(None, key)
+            self.assertLess(lower, key)
+            key = lower
+
+    def test_spread_is_sorted(self):
+        keys = spread(100)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(keys[0], key_between(None, None))
+
+    def test_no_key_between_equal_keys(self):
+        key = key_between(None, None)
+        self.assertRaises(InvalidPosition, key_between, key, key)
+        self.assertRaises(InvalidPosition, key_between, "", key)
+
+
+class MoveTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username="user", password="pass")
+        self.todo = ToDo.objects.create(owner=user)
+        self.one, self.two, self.three = self.todo.add_entries(["one", "two", "three"])
+
+    def order(self) -> list[str]:
+        entries = self.todo.entries.order_by(*Entry.ORDERING)
+        return list(entries.values_list("text", flat=True))
+
+    def test_new_entries_go_last(self):
+        Entry.objects.create(todo=self.todo, text="four")
+        self.todo.add_entries(["five"])
+
+        self.assertEqual(self.order(), ["one", "two", "three", "four", "five"])
+
+    def test_move_rewrites_only_moved_entry(self):
+        positions = {e.pk: e.position for e in self.todo.entries.all()}
+
+        # Neighbour lookup, entry update and list touch.
+        with self.assertNumQueries(3):
+            self.three.move(self.one)
+        self.assertEqual(self.order(), ["three", "one", "two"])
+        self.one.move(self.two, after=True)
+        self.assertEqual(self.order(), ["three", "two", "one"])
+
+        changed = {
+            e.pk for e in self.todo.entries.all() if positions[e.pk] != e.position
+        }
+        self.assertEqual(changed, {self.one.pk, self.three.pk})
+
+    def test_move_between_equal_keys_respaces_list(self):
+        Entry.objects.filter(pk__in=[self.one.pk, self.two.pk]).update(position="3i00")
+        self.two.refresh_from_db()
+
+        self.three.move(self.two)
+
+        self.assertEqual(self.order(), ["one", "three", "two"])
+
+    def test_long_keys_are_respaced_in_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(40):
+                self.three.move(self.two)
+                self.two.move(self.three)
+        call_command("run_tasks", once=True, threads=0, stdout=StringIO())
+
+        self.assertEqual(self.order(), ["one", "two", "three"])
+        entries = self.todo.entries.order_by(*Entry.ORDERING)
+        self.assertEqual(list(entries.values_list("position", flat=True)), spread(3))
+
+    def test_respace_entries_keeps_order(self):
+        for _ in range(20):
+            self.three.move(self.two)
+            self.two.move(self.three)
+        self.assertGreater(len(self.todo.entries.get(pk=self.two.pk).position), 4)
+        order = self.order()
+
+        self.todo.respace_entries()
+
+        self.assertEqual(self.order(), order)
+        entries = self.todo.entries.order_by(*Entry.ORDERING)
+        self.assertEqual(list(entries.values_list("position", flat=True)), spread(3))
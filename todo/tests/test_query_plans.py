@@ -0,0 +1,103 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..management.commands.benchmark_views import (
+    SCENARIOS,
+    Command as BenchmarkCommand,
+    route_names,
+)
+
+# Plan lines of a table read row by row, without an index to search or
+# walk in order. Index walks show as `SCAN table USING INDEX ...`. SQLite
+# before 3.36 writes `SCAN TABLE table`, aliases follow as `AS alias`.
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class QueryPlanTests(TestCase):
+    """Every query of every todo view is answered through an index.
+
+    SQLite plans without table statistics as if tables were large, so plans
+    of a small dataset are those of a big one.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_data",
+            lists=60,
+            users=3,
+            entries=8,
+            public=0.5,
+            seed=3,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+    def setUp(self):
+        self.objects = BenchmarkCommand().pick_objects()
+
+    def full_scans(self, queries: list[dict]) -> list[str]:
+        scans = []
+        inspected = 0
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith(EXPLAINED):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                for *_, detail in cursor.fetchall():
+                    inspected += 1
+                    if FULL_SCAN.match(detail):
+                        scans.append(f"{detail} in {sql}")
+        # Views and operations checked all make queries, none escapes.
+        self.assertGreater(inspected, 0)
+        return scans
+
+    def assertIndexed(self, name: str, login: bool = False, **params):
+        scenario = SCENARIOS[name]
+        if scenario.login or login:
+            self.client.force_login(self.objects["owner"])
+        path = reverse(name, args=scenario.args(self.objects))
+        data = {**scenario.data(self.objects), **params}
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, scenario.method)(path, data)
+        self.assertIn(response.status_code, scenario.status)
+        self.assertEqual(self.full_scans(captured.captured_queries), [])
+        self.client.logout()
+        return response
+
+    def test_views_use_indexes(self):
+        for name in route_names():
+            if name.startswith("todo:"):
+                with self.subTest(name):
+                    self.assertIndexed(name)
+
+    def test_list_orderings_use_indexes(self):
+        for name in ["todo:todo-list", "todo:todo-list-my"]:
+            for login in [False, True]:
+                for sort in ["recent", "progress"]:
+                    for status in ["", "open", "done"]:
+                        params = {"sort": sort, "status": status}
+                        with self.subTest(name, login=login, **params):
+                            response = self.assertIndexed(name, login, **params)
+                            cursor = response.context["page_obj"].next_cursor
+                            if cursor:
+                                self.assertIndexed(name, login, cursor=cursor, **params)
+
+    def test_filter_completed_entries_uses_index(self):
+        todo = self.objects["todo"]
+        with CaptureQueriesContext(connection) as captured:
+            todo.delete_entries(completed=True)
+        self.assertEqual(self.full_scans(captured.captured_queries), [])
+        self.assertIn(
+            "entry_todo_completed_idx",
+            todo.entries.filter(completed=True).explain(),
+        )
@@ -0,0 +1,89 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from yyiktodo.routers import STICKY_COOKIE
+
+from ..models import ToDo
+
+User = get_user_model()
+
+ALIAS = "replica"
+
+
+class ReplicaTests(TransactionTestCase):
+    """Read from a file refreshed from the test database by the command."""
+
+    def setUp(self):
+        caches["fragments"].clear()
+        caches["profiles"].clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "replica.sqlite3")
+        databases = {
+            "default": settings.DATABASES["default"],
+            ALIAS: {
+                **settings.DATABASES["default"],
+                "NAME": f"file:{path}?mode=ro",
+                "OPTIONS": {"pragmas": {"busy_timeout": 5000}},
+            },
+        }
+        connections.settings[ALIAS] = connections.configure_settings(databases)[ALIAS]
+        self.addCleanup(connections.settings.pop, ALIAS)
+        self.addCleanup(connections.__delitem__, ALIAS)
+        override = override_settings(DATABASE_REPLICAS=[ALIAS])
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create(username="user", password="pass")
+        self.todo = ToDo.objects.create(
+            title="Replicated", owner=self.user, public=True
+        )
+        call_command("refresh_replica", stdout=StringIO())
+        ToDo.objects.create(title="Fresh", owner=self.user, public=True)
+
+    def test_read_views_use_replica(self):
+        paths = [
+            reverse("todo:todo-list"),
+            reverse("todo:profile", args=("user",)),
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+
+        self.assertContains(self.client.get(paths[0]), "Replicated")
+        self.assertNotContains(self.client.get(paths[0]), "Fresh")
+        # Profiles are built from the primary, see `todo/cache.py`.
+        self.assertContains(self.client.get(paths[1]), "Fresh")
+
+    def test_other_views_use_primary(self):
+        response = self.client.get(reverse("todo:search"), {"q": "fresh"})
+
+        self.assertContains(response, "Fresh")
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("todo:entry-create", args=(self.todo.pk,)), {"text": "entry"}
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        response = self.client.get(reverse("todo:todo-list"))
+        self.assertContains(response, "Fresh")
+
+    def test_writes_go_to_primary(self):
+        call_command("refresh_replica", stdout=StringIO())
+        todo = ToDo.objects.using(ALIAS).get(title="Fresh")
+        todo.title = "Renamed"
+        todo.save()
+
+        self.assertTrue(ToDo.objects.using("default").filter(title="Renamed").exists())
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Entry, ToDo
+from ..search import build_query, search
+
+User = get_user_model()
+
+
+def found(text, user_id=None):
+    return [(match.todo_id, match.entry_id) for match in search(text, user_id)]
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(username="user1", password="pass1")
+        self.user2 = User.objects.create(username="user2", password="pass2")
+        self.public = ToDo.objects.create(
+            title="Groceries", owner=self.user1, public=True
+        )
+        self.private = ToDo.objects.create(title="Secret milk plan", owner=self.user2)
+        self.milk = Entry.objects.create(todo=self.public, text="Buy milk")
+        Entry.objects.create(todo=self.private, text="Hide the milk")
+
+    def test_build_query_quotes_words(self):
+        self.assertEqual(build_query('milk OR "bread'), '"milk" "OR" "bread"*')
+        self.assertEqual(build_query("*()"), "")
+
+    def test_respects_visibility(self):
+        self.assertEqual(found("milk"), [(self.public.pk, self.milk.pk)])
+        self.assertEqual(len(found("milk", self.user2.pk)), 3)
+
+    def test_matches_prefix_and_ignores_case(self):
+        self.assertEqual(found("GROC"), [(self.public.pk, None)])
+
+    def test_index_follows_writes(self):
+        self.milk.text = "Buy bread"
+        self.milk.save()
+        self.public.title = "Bakery"
+        self.public.save()
+
+        self.assertEqual(found("milk"), [])
+        self.assertEqual(found("bread"), [(self.public.pk, self.milk.pk)])
+        self.assertEqual(found("bakery"), [(self.public.pk, None)])
+
+        self.public.soft_delete()
+        self.assertEqual(found("bread"), [])
+        self.public.delete()
+        self.assertEqual(found("bread"), [])
+
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE todo_entry_fts")
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(found("milk"), [(self.public.pk, self.milk.pk)])
+        Entry.objects.create(todo=self.public, text="Eggs")
+        self.assertEqual(len(found("eggs")), 1)
+
+    def test_view(self):
+        response = self.client.get(reverse("todo:search"), {"q": "milk"})
+
+        self.assertContains(response, "Buy milk")
+        self.assertNotContains(response, "Hide the milk")
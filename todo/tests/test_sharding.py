@@ -0,0 +1,232 @@
+import os
+import tempfile
+from io import StringIO
+from itertools import count
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from yyiktodo.db import write_atomic
+
+from ..events import hub
+from ..models import Entry, PublicFeedItem, ToDo
+from ..sharding import SHARD_ID_BITS, jump_hash, shard_for_owner
+
+User = get_user_model()
+
+SHARD = "shard1"
+
+SHARDS = ["default", SHARD]
+
+
+class ShardingTests(TransactionTestCase):
+    """Lists split between the test database and a temporary file."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        databases = {
+            "default": settings.DATABASES["default"],
+            SHARD: {
+                **settings.DATABASES["default"],
+                "NAME": os.path.join(cls.directory.name, "shard.sqlite3"),
+            },
+        }
+        connections.settings[SHARD] = connections.configure_settings(databases)[SHARD]
+        with override_settings(TODO_SHARDS=SHARDS):
+            call_command("migrate", database=SHARD, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[SHARD].close()
+        del connections[SHARD]
+        connections.settings.pop(SHARD)
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        caches["fragments"].clear()
+        caches["profiles"].clear()
+        self.addCleanup(ToDo.all_objects.using(SHARD).all().delete)
+        self.names = (f"user{number}" for number in count())
+
+    def make_user(self, shard: str) -> User:
+        """Create a user whose lists are stored on `shard`."""
+        with override_settings(TODO_SHARDS=SHARDS):
+            while True:
+                user = User.objects.create(username=next(self.names))
+                if shard_for_owner(user.pk) == shard:
+                    return user
+
+    def test_jump_hash_moves_keys_only_to_new_bucket(self):
+        moved = 0
+        for key in range(1000):
+            before, after = jump_hash(key, 2), jump_hash(key, 3)
+            if before != after:
+                self.assertEqual(after, 2)
+                moved += 1
+        self.assertAlmostEqual(moved / 1000, 1 / 3, delta=0.05)
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_lists_and_entries_are_stored_on_owner_shard(self):
+        user = self.make_user(SHARD)
+
+        todo = user.todo_list.create(title="Sharded")
+        todo.add_entries(["first", "second"])
+        todo.entries.create(text="third")
+
+        self.assertFalse(ToDo.objects.filter(pk=todo.pk).exists())
+        stored = ToDo.objects.using(SHARD).get(pk=todo.pk)
+        self.assertEqual(stored.entry_count, 3)
+        self.assertGreaterEqual(todo.pk, 1 << SHARD_ID_BITS)
+        self.assertTrue(
+            all(entry.pk >= 1 << SHARD_ID_BITS for entry in stored.entries.all())
+        )
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_list_views_gather_lists_from_shards(self):
+        user1, user2 = self.make_user("default"), self.make_user(SHARD)
+        user1.todo_list.create(title="Public default", public=True)
+        user2.todo_list.create(title="Public shard", public=True)
+        user2.todo_list.create(title="Private shard")
+
+        response = self.client.get(reverse("todo:todo-list"))
+        self.assertContains(response, "Public default")
+        self.assertContains(response, "Public shard")
+        self.assertContains(response, user2.username)
+        self.assertNotContains(response, "Private shard")
+
+        self.client.force_login(user2)
+        response = self.client.get(reverse("todo:todo-list"))
+        self.assertContains(response, "Private shard")
+        response = self.client.get(reverse("todo:todo-list-my"))
+        self.assertContains(response, "Private shard")
+        self.assertNotContains(response, "Public default")
+        response = self.client.get(reverse("todo:search"), {"q": "public"})
+        self.assertContains(response, "Public default")
+        self.assertContains(response, "Public shard")
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_feed_follows_commits_of_shard(self):
+        user = self.make_user(SHARD)
+        feed = PublicFeedItem.objects.all()
+
+        with self.assertRaises(RuntimeError), write_atomic(using=SHARD):
+            user.todo_list.create(title="Rolled back", public=True)
+            raise RuntimeError
+        self.assertFalse(feed.exists())
+
+        with write_atomic(using=SHARD):
+            todo = user.todo_list.create(title="Public shard", public=True)
+            todo.add_entries(["first"])
+            self.assertFalse(feed.exists())
+        self.assertEqual(feed.get().entry_count, 1)
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_search_index_is_rebuilt_in_every_shard(self):
+        self.make_user(SHARD).todo_list.create(title="Sharded milk", public=True)
+        with connections[SHARD].cursor() as cursor:
+            cursor.execute("DROP TABLE todo_todo_fts")
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        response = self.client.get(reverse("todo:search"), {"q": "milk"})
+        self.assertContains(response, "Sharded milk")
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_events_follow_commits_of_shard(self):
+        todo = self.make_user(SHARD).todo_list.create(title="Shard")
+        listened = mock.patch.dict(hub._subscriptions, {todo.pk: set()})
+
+        with listened, mock.patch.object(hub, "publish") as publish:
+            with self.assertRaises(RuntimeError), write_atomic(using=SHARD):
+                todo.entries.create(text="Rolled back")
+                todo.add_entries(["Rolled back"])
+                raise RuntimeError
+            publish.assert_not_called()
+
+            with write_atomic(using=SHARD):
+                todo.entries.create(text="Kept")
+                publish.assert_not_called()
+            publish.assert_called_once()
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_owner_views_use_owner_shard(self):
+        user = self.make_user(SHARD)
+        self.client.force_login(user)
+        self.client.post(reverse("todo:todo-create"), {"title": "Sharded"})
+        todo = ToDo.objects.using(SHARD).get()
+
+        response = self.client.get(reverse("todo:todo-detail", args=(todo.pk,)))
+        self.assertContains(response, "Sharded")
+        self.client.post(
+            reverse("todo:entry-create", args=(todo.pk,)), {"text": "Entry"}
+        )
+        entry = Entry.objects.using(SHARD).get(todo=todo)
+        self.client.post(
+            reverse("todo:entry-edit", args=(entry.pk,)),
+            {"text": "Edited", "completed": "on"},
+        )
+        self.client.post(
+            reverse("todo:todo-edit", args=(todo.pk,)), {"title": "Renamed"}
+        )
+
+        todo = ToDo.objects.using(SHARD).get(pk=todo.pk)
+        self.assertEqual(todo.title, "Renamed")
+        self.assertEqual((todo.entry_count, todo.completed_count), (1, 1))
+        self.client.post(reverse("todo:entry-delete", args=(entry.pk,)))
+        self.assertEqual(ToDo.objects.using(SHARD).get(pk=todo.pk).entry_count, 0)
+        self.client.post(reverse("todo:todo-delete", args=(todo.pk,)))
+        self.assertFalse(ToDo.objects.using(SHARD).exists())
+
+    def test_rebalance_moves_lists_to_added_shard(self):
+        user1, user2 = self.make_user("default"), self.make_user(SHARD)
+        todos = [user.todo_list.create(title="List") for user in (user1, user2)]
+        for todo in todos:
+            todo.add_entries(["first", "second"])
+
+        with override_settings(TODO_SHARDS=SHARDS):
+            with self.assertRaises(CommandError):
+                call_command("rebalance_shards", "--check", stdout=StringIO())
+            call_command("rebalance_shards", stdout=StringIO())
+            call_command("rebalance_shards", "--check", stdout=StringIO())
+
+            self.assertEqual(
+                list(ToDo.objects.values_list("pk", flat=True)), [todos[0].pk]
+            )
+            moved = ToDo.objects.using(SHARD).get()
+            self.assertEqual(
+                (moved.pk, moved.modified_at), (todos[1].pk, todos[1].modified_at)
+            )
+            self.assertEqual(moved.entries.count(), 2)
+            response = self.client.get(reverse("todo:todo-detail", args=(moved.pk,)))
+            self.assertEqual(response.status_code, 404)
+            self.client.force_login(user2)
+            response = self.client.get(reverse("todo:todo-detail", args=(moved.pk,)))
+            self.assertEqual(response.status_code, 200)
+            # Ids on the shard still come from its own range.
+            self.assertGreaterEqual(user2.todo_list.create().pk, 1 << SHARD_ID_BITS)
+
+        call_command("rebalance_shards", "--drain", SHARD, stdout=StringIO())
+        self.assertEqual(ToDo.objects.count(), 3)
+        self.assertEqual(Entry.objects.count(), 4)
+
+    @override_settings(TODO_SHARDS=SHARDS)
+    def test_deleting_user_deletes_lists_on_shards(self):
+        user = self.make_user(SHARD)
+        user.todo_list.create().add_entries(["entry"])
+
+        user.delete()
+
+        self.assertFalse(ToDo.objects.using(SHARD).exists())
+        call_command("purge_deleted", stdout=StringIO())
+        self.assertFalse(ToDo.all_objects.using(SHARD).exists())
+        self.assertFalse(Entry.objects.using(SHARD).exists())
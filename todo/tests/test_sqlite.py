@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.test import SimpleTestCase
+
+from yyiktodo.db import write_atomic
+
+ALIAS = "stress"
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """Run against a database file, as in-memory test databases lock tables."""
+
+    def use_database(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "stress.sqlite3")
+        database = {
+            **settings.DATABASES["default"],
+            "NAME": self.path,
+            "OPTIONS": {**settings.DATABASES["default"]["OPTIONS"], **options},
+        }
+        databases = {"default": settings.DATABASES["default"], ALIAS: database}
+        connections.settings[ALIAS] = connections.configure_settings(databases)[ALIAS]
+        self.addCleanup(connections.settings.pop, ALIAS)
+        self.addCleanup(connections.__delitem__, ALIAS)
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("CREATE TABLE counter (value INTEGER)")
+            cursor.execute("INSERT INTO counter VALUES (0)")
+        connections[ALIAS].close()
+
+    def increment(self, times: int, done: list, errors: list, atomic=write_atomic):
+        try:
+            for _ in range(times):
+                with atomic(using=ALIAS):
+                    with connections[ALIAS].cursor() as cursor:
+                        # Read then write, the case that fails at once when
+                        # transactions are deferred.
+                        cursor.execute("SELECT value FROM counter")
+                        value = cursor.fetchone()[0]
+                        cursor.execute("UPDATE counter SET value = %s", [value + 1])
+                done.append(1)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections[ALIAS].close()
+
+    def stress(self, writers: int = 8, times: int = 50, **options) -> list:
+        done, errors = [], []
+        threads = [
+            threading.Thread(
+                target=self.increment, args=(times, done, errors), kwargs=options
+            )
+            for _ in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(
+                conn.execute("SELECT value FROM counter").fetchone()[0],
+                len(done),
+            )
+        return errors
+
+    def test_pragmas_are_applied(self):
+        self.use_database()
+
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -16000)
+        connections[ALIAS].close()
+
+    def test_concurrent_writers_through_write_gate(self):
+        self.use_database()
+
+        self.assertEqual(self.stress(), [])
+
+    def test_concurrent_writers_waiting_for_lock(self):
+        # Like writers in separate processes.
+        self.use_database(write_gate=False)
+
+        self.assertEqual(self.stress(), [])
+
+    def test_deferred_transactions_fail_under_contention(self):
+        self.use_database(write_gate=False)
+
+        self.assertTrue(self.stress(atomic=transaction.atomic))
+
+    def test_immediate_mode_applies_to_every_transaction(self):
+        self.use_database(transaction_mode="IMMEDIATE", write_gate=False)
+
+        self.assertEqual(self.stress(atomic=transaction.atomic), [])
+
+    def test_reads_dont_wait_for_writer(self):
+        self.use_database(pragmas={**settings.SQLITE_PRAGMAS, "busy_timeout": 10})
+        holder = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.addCleanup(holder.close)
+        holder.execute("BEGIN IMMEDIATE")
+
+        with transaction.atomic(using=ALIAS):
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("SELECT value FROM counter")
+                self.assertEqual(cursor.fetchone()[0], 0)
+        connections[ALIAS].close()
+        holder.execute("COMMIT")
+
+    def test_begin_is_retried(self):
+        self.use_database(
+            pragmas={**settings.SQLITE_PRAGMAS, "busy_timeout": 10}, lock_retries=5
+        )
+        holder = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.addCleanup(holder.close)
+        holder.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.1, holder.execute, ["COMMIT"]).start()
+
+        done, errors = [], []
+        self.increment(1, done, errors)
+
+        self.assertEqual((len(done), errors), (1, []))
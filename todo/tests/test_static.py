@@ -0,0 +1,165 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings as project_settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from yyiktodo.static import CDN, IMMUTABLE, REVALIDATE, StaticFilesMiddleware
+
+from ..management.commands.build_static import ASSETS
+
+STYLE = "body { background: url('fonts/icons.woff2?v=1'); }\n" * 50
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = Path(directory.name, "static")
+        self.root = Path(directory.name, "staticfiles")
+        (self.source / "fonts").mkdir(parents=True)
+        (self.source / "style.css").write_text(STYLE)
+        (self.source / "fonts" / "icons.woff2").write_bytes(os.urandom(64))
+        settings = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE="yyiktodo.static.CompressedManifestStorage",
+            SERVE_STATIC=True,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def collect(self) -> dict:
+        call_command("collectstatic", interactive=False, verbosity=0)
+        manifest = json.loads((self.root / "staticfiles.json").read_text())
+        return manifest["paths"]
+
+    def middleware(self) -> StaticFilesMiddleware:
+        return StaticFilesMiddleware(lambda request: HttpResponse("view"))
+
+    def get(self, path: str, **headers) -> HttpResponse:
+        return self.middleware()(RequestFactory().get(path, **headers))
+
+    def test_collect_writes_hashed_names_and_copies(self):
+        paths = self.collect()
+
+        style = paths["style.css"]
+        self.assertNotEqual(style, "style.css")
+        self.assertIn(paths["fonts/icons.woff2"], (self.root / style).read_text())
+        copy = gzip.decompress((self.root / f"{style}.gz").read_bytes())
+        self.assertEqual(copy, (self.root / style).read_bytes())
+        # Random bytes don't compress, fonts aren't tried.
+        self.assertFalse((self.root / f"{paths['fonts/icons.woff2']}.gz").exists())
+
+    def test_hashed_name_is_immutable_and_compressed(self):
+        style = self.collect()["style.css"]
+
+        response = self.get(f"/static/{style}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response["Cache-Control"], IMMUTABLE)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(body, (self.root / style).read_bytes())
+
+    def test_original_name_is_revalidated(self):
+        self.collect()
+
+        response = self.get("/static/style.css")
+        self.assertEqual(response["Cache-Control"], REVALIDATE)
+        self.assertNotIn("Content-Encoding", response)
+
+        since = http_date(os.stat(self.root / "style.css").st_mtime)
+        response = self.get("/static/style.css", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_reach_views(self):
+        self.collect()
+        middleware = self.middleware()
+
+        for request in [
+            RequestFactory().get("/static/missing.css"),
+            RequestFactory().get("/style.css"),
+            RequestFactory().post("/static/style.css"),
+        ]:
+            self.assertEqual(middleware(request).content, b"view")
+
+    def test_unused_without_setting(self):
+        with override_settings(SERVE_STATIC=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                self.middleware()
+
+    def test_build_collects_vendored_assets(self):
+        for asset in ASSETS:
+            path = self.source / "vendor" / asset.path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("/* vendored */\n")
+
+        out = StringIO()
+        call_command("build_static", verbosity=0, stdout=out, stderr=StringIO())
+
+        self.assertNotIn("Vendored", out.getvalue())
+        manifest = json.loads((self.root / "staticfiles.json").read_text())
+        self.assertEqual(
+            {f"vendor/{asset.path}" for asset in ASSETS} - manifest["paths"].keys(),
+            set(),
+        )
+
+
+class BaseTemplateTests(SimpleTestCase):
+    """Pages link collected copies of vendored assets with `DEBUG` off."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = Path(directory.name, "static")
+        self.source.mkdir()
+        settings = override_settings(
+            DEBUG=False,
+            STATICFILES_DIRS=[*project_settings.STATICFILES_DIRS, self.source],
+            STATIC_ROOT=Path(directory.name, "staticfiles"),
+            STATICFILES_STORAGE="yyiktodo.static.CompressedManifestStorage",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def render(self) -> str:
+        call_command("collectstatic", interactive=False, verbosity=0)
+        return render_to_string("base.html", request=RequestFactory().get("/"))
+
+    def test_pinned_cdn_until_vendored(self):
+        html = self.render()
+
+        css = next(asset for asset in ASSETS if asset.integrity)
+        self.assertIn(f'href="{CDN}{css.url}" integrity="{css.integrity}"', html)
+        self.assertNotIn("/static/vendor/", html)
+        self.assertIn(staticfiles_storage.url("style.css"), html)
+
+    def test_collected_vendored_assets(self):
+        for asset in ASSETS:
+            path = self.source / "vendor" / asset.path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("/* vendored */\n")
+
+        html = self.render()
+
+        self.assertNotIn(CDN, html)
+        for name in [
+            "vendor/bootstrap/css/bootstrap.min.css",
+            "vendor/bootstrap-icons/bootstrap-icons.css",
+            "vendor/bootstrap/js/bootstrap.bundle.min.js",
+        ]:
+            url = staticfiles_storage.url(name)
+            self.assertNotEqual(url, f"/static/{name}")
+            self.assertIn(f'"{url}"', html)
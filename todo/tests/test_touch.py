@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Entry, ToDo
+from ..touch import deferred_touches
+
+User = get_user_model()
+
+
+class TouchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="U_S_E_R", password="123")
+        self.todo: ToDo = ToDo.objects.create(title="Title", owner=self.user)
+        self.entry: Entry = Entry.objects.create(todo=self.todo, text="text")
+        self.past = timezone.now() - timedelta(days=1)
+        ToDo.objects.filter(pk=self.todo.pk).update(modified_at=self.past)
+
+    def modified_at(self):
+        return ToDo.objects.get(pk=self.todo.pk).modified_at
+
+    def test_entry_save_does_not_load_todo(self):
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.completed = True
+
+        # Touches of the list and of its feed item, and the update.
+        with self.assertNumQueries(3):
+            entry.save()
+        self.assertGreater(self.modified_at(), self.past)
+
+    def test_entry_delete_does_not_load_todo(self):
+        entry = Entry.objects.get(pk=self.entry.pk)
+
+        entry.delete()
+        self.assertGreater(self.modified_at(), self.past)
+
+    def test_deferred_touches_coalesce(self):
+        with deferred_touches():
+            for text in ("one", "two", "three"):
+                Entry.objects.create(todo=self.todo, text=text)
+            self.assertEqual(self.modified_at(), self.past)
+        self.assertGreater(self.modified_at(), self.past)
+
+    def test_deferred_touches_issue_one_update(self):
+        with self.assertNumQueries(4):
+            with deferred_touches():
+                for text in ("one", "two", "three"):
+                    Entry.objects.create(todo=self.todo, text=text)
+
+    def test_deferred_touches_look_up_last_position_once(self):
+        # The last key is looked up by the first insert only. The list isn't
+        # loaded, so its feed item is touched too.
+        with self.assertNumQueries(6):
+            with deferred_touches():
+                for text in ("one", "two", "three"):
+                    Entry.objects.create(todo_id=self.todo.pk, text=text)
+
+        entries = self.todo.entries.order_by(*Entry.ORDERING)
+        self.assertEqual(
+            list(entries.values_list("text", flat=True)),
+            ["text", "one", "two", "three"],
+        )
+
+    def test_deferred_touches_roll_back_with_writes(self):
+        # The block joins the test's transaction, which it would break.
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            with deferred_touches():
+                Entry.objects.create(todo=self.todo, text="text")
+                raise RuntimeError
+
+        self.assertEqual(self.modified_at(), self.past)
+        self.assertEqual(self.todo.entries.count(), 1)
+
+    def test_touches_outside_blocks_are_issued_at_once(self):
+        Entry.objects.create(todo=self.todo, text="text")
+
+        self.assertGreater(self.modified_at(), self.past)
+
+    def test_request_touches_once(self):
+        self.client.force_login(self.user)
+        url = reverse("todo:entry-edit", args=(self.entry.pk,))
+        self.client.post(url, {"text": "new text", "completed": True})
+
+        self.assertGreater(self.modified_at(), self.past)
+
+    def test_edits_of_private_lists_leave_feed_alone(self):
+        self.client.force_login(self.user)
+        url = reverse("todo:entry-edit", args=(self.entry.pk,))
+        with CaptureQueriesContext(connection) as captured:
+            self.client.post(url, {"text": "new text", "completed": True})
+
+        statements = [query["sql"] for query in captured.captured_queries]
+        self.assertFalse([sql for sql in statements if "publicfeeditem" in sql])
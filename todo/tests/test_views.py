@@ -1,7 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from ..feed import rebuild as rebuild_feed
+from ..feed import refresh as refresh_feed
 from ..models import Entry, ToDo
 
 User = get_user_model()
@@ -9,6 +14,7 @@ User = get_user_model()
 
 class ViewsTests(TestCase):
     def setUp(self):
+        caches["profiles"].clear()
         self.client = Client()
 
         self.user1 = User.objects.create(
@@ -74,6 +80,8 @@ class ViewsTests(TestCase):
                 ),
             ]
         )
+        # Bulk inserts send no signals the feed would follow.
+        rebuild_feed()
 
         self.list_path = reverse("todo:todo-list")
         self.my_list_path = reverse("todo:todo-list-my")
@@ -85,8 +93,11 @@ class ViewsTests(TestCase):
         self.entry_create = lambda todo_id: reverse(
             "todo:entry-create", args=(todo_id,)
         )
+        self.entry_bulk = lambda todo_id: reverse("todo:entry-bulk", args=(todo_id,))
         self.entry_edit = lambda pk: reverse("todo:entry-edit", args=(pk,))
         self.entry_delete = lambda pk: reverse("todo:entry-delete", args=(pk,))
+        self.entry_move = lambda pk: reverse("todo:entry-move", args=(pk,))
+        self.entry_toggle = lambda pk: reverse("todo:entry-toggle", args=(pk,))
 
     def test_todo_list_template(self):
         response = self.client.get(self.list_path)
@@ -122,6 +133,26 @@ class ViewsTests(TestCase):
 
         self.assertNotContains(response, "User1 private list")  # type: ignore
 
+    def test_todo_list_sorts_by_progress(self):
+        ToDo.objects.filter(pk=1).update(entry_count=2, completed_count=1, progress=50)
+        ToDo.objects.filter(pk=3).update(entry_count=2, completed_count=2, progress=100)
+        refresh_feed(ToDo.objects.filter(pk__in=[1, 3]))
+        response = self.client.get(self.list_path, {"sort": "progress"})
+
+        titles = [todo.title for todo in response.context["todo_list"]]  # type: ignore
+        self.assertEqual(titles[:2], ["User2 public list 1", "User1 public list"])
+
+    def test_todo_list_filters_by_status(self):
+        ToDo.objects.filter(pk=3).update(entry_count=2, completed_count=2, progress=100)
+        refresh_feed(ToDo.objects.filter(pk=3))
+        response = self.client.get(self.list_path, {"status": "done"})
+
+        self.assertContains(response, "User2 public list 1")
+        self.assertNotContains(response, "User1 public list")  # type: ignore
+
+        response = self.client.get(self.list_path, {"status": "open"})
+        self.assertNotContains(response, "User2 public list 1")  # type: ignore
+
     def test_my_todo_list_template(self):
         self.client.force_login(self.user1)
         response = self.client.get(self.my_list_path)
@@ -254,6 +285,33 @@ class ViewsTests(TestCase):
         self.assertContains(response, reverse("todo:entry-delete", args=(2,)))
         self.assertContains(response, reverse("todo:entry-create", args=(1,)))
 
+    def test_todo_detail_entries_are_cached(self):
+        caches["fragments"].clear()
+        self.client.get(self.todo_detail(1))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.todo_detail(1))
+
+        self.assertContains(response, "1.1.Text")
+        queries = [query["sql"] for query in context.captured_queries]
+        self.assertFalse([sql for sql in queries if "todo_entry" in sql])
+
+    def test_todo_detail_cache_invalidated_by_entry_write(self):
+        caches["fragments"].clear()
+        self.client.get(self.todo_detail(1))
+        Entry.objects.create(todo=get_todo(1), text="1.3.Text")
+        response = self.client.get(self.todo_detail(1))
+
+        self.assertContains(response, "1.3.Text")
+
+    def test_todo_detail_cache_varies_on_owner(self):
+        caches["fragments"].clear()
+        self.client.force_login(self.user1)
+        self.client.get(self.todo_detail(1))
+        self.client.logout()
+        response = self.client.get(self.todo_detail(1))
+
+        self.assertNotContains(response, reverse("todo:entry-edit", args=(1,)))  # type: ignore
+
     def test_todo_create_anonymous_redirects(self):
         response = self.client.get(self.todo_create, follow=True)
 
@@ -391,6 +449,16 @@ class ViewsTests(TestCase):
 
         self.assertFalse(ToDo.objects.filter(pk=3).exists())
 
+    def test_todo_delete_POST_owner_keeps_entries_until_purged(self):
+        self.client.force_login(self.user2)
+        self.client.post(self.todo_delete(3))
+
+        self.assertEqual(Entry.objects.filter(todo_id=3).count(), 2)
+        self.assertEqual(self.client.get(self.todo_detail(3)).status_code, 404)
+        self.assertEqual(self.client.get(self.entry_edit(4)).status_code, 404)
+        response = self.client.get(self.my_list_path)
+        self.assertNotContains(response, "User2 public list 1")
+
     def test_entry_create_anonymous_redirects(self):
         response = self.client.get(self.entry_create(3), follow=True)
 
@@ -431,6 +499,50 @@ class ViewsTests(TestCase):
 
         self.assertTrue(Entry.objects.filter(text="la-la-la").exists())
 
+    def test_entry_create_POST_invalid_renders_list_without_session(self):
+        self.client.force_login(self.user2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.entry_create(3), {"text": "l"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "todo/todo_detail.html")  # type: ignore
+        self.assertTrue(response.context["entry_form"].errors)  # type: ignore
+        self.assertContains(response, "3.1.Text")
+        self.assertContains(response, 'value="l"')
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if "django_session" in query["sql"]
+                and not query["sql"].startswith("SELECT")
+            ]
+        )
+        self.assertFalse(Entry.objects.filter(text="l").exists())
+
+    def test_entry_create_POST_invalid_script_gets_form(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(
+            self.entry_create(3), {"text": "l"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTemplateUsed(response, "todo/_entry_form.html")  # type: ignore
+        self.assertTemplateNotUsed(response, "todo/todo_detail.html")  # type: ignore
+
+    def test_entry_create_POST_script_gets_entry(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(
+            self.entry_create(3),
+            {"text": "la-la-la"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+        entry = Entry.objects.get(text="la-la-la")
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, "todo/_entry.html")  # type: ignore
+        self.assertTemplateNotUsed(response, "todo/todo_detail.html")  # type: ignore
+        self.assertContains(response, f'id="entry-{entry.pk}"', status_code=201)
+
     def test_entry_edit_anonymous_redirects(self):
         response = self.client.get(self.entry_edit(4), follow=True)
 
@@ -512,6 +624,232 @@ class ViewsTests(TestCase):
 
         self.assertFalse(Entry.objects.filter(pk=4).exists())
 
+    def test_entry_bulk_POST_anonymous_fails(self):
+        data = {"action": "clear"}
+        self.client.post(self.entry_bulk(3), data)
+
+        self.assertEqual(get_todo(3).entries.count(), 2)
+
+    def test_entry_bulk_POST_non_owner_fails(self):
+        self.client.force_login(self.user1)
+        data = {"action": "clear"}
+        response = self.client.post(self.entry_bulk(3), data)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(get_todo(3).entries.count(), 2)
+
+    def test_entry_bulk_add_POST_owner(self):
+        self.client.force_login(self.user2)
+        data = {"action": "add", "text": "la-la-la\r\n\r\n  tra-la-la  \nbla"}
+        response = self.client.post(self.entry_bulk(4), data)
+
+        self.assertRedirects(response, self.todo_detail(4))  # type: ignore
+        texts = get_todo(4).entries.values_list("text", flat=True)
+        self.assertEqual(sorted(texts), ["bla", "la-la-la", "tra-la-la"])
+
+    def test_entry_bulk_add_POST_short_line_fails(self):
+        self.client.force_login(self.user2)
+        data = {"action": "add", "text": "la-la-la\nb"}
+        response = self.client.post(self.entry_bulk(4), data, follow=True)
+
+        self.assertFalse(get_todo(4).entries.exists())
+        self.assertContains(response, "must be from 2 to 200 characters long")
+
+    def test_entry_bulk_complete_POST_owner(self):
+        self.client.force_login(self.user1)
+        data = {"action": "complete", "entries": [1, 2]}
+        self.client.post(self.entry_bulk(1), data)
+
+        self.assertIs(get_entry(1).completed, True)
+        self.assertIs(get_entry(2).completed, True)
+
+    def test_entry_bulk_uncomplete_POST_owner(self):
+        self.client.force_login(self.user2)
+        data = {"action": "uncomplete", "entries": [4]}
+        self.client.post(self.entry_bulk(3), data)
+
+        self.assertIs(get_entry(4).completed, False)
+        self.assertIs(get_entry(5).completed, True)
+
+    def test_entry_bulk_delete_POST_owner_ignores_other_lists(self):
+        self.client.force_login(self.user1)
+        data = {"action": "delete", "entries": [1, 4]}
+        self.client.post(self.entry_bulk(1), data)
+
+        self.assertFalse(Entry.objects.filter(pk=1).exists())
+        self.assertTrue(Entry.objects.filter(pk=4).exists())
+
+    def test_entry_bulk_clear_POST_owner(self):
+        self.client.force_login(self.user1)
+        data = {"action": "clear"}
+        self.client.post(self.entry_bulk(1), data)
+
+        texts = get_todo(1).entries.values_list("text", flat=True)
+        self.assertEqual(list(texts), ["1.2.Text"])
+
+    def test_entry_edit_POST_script_gets_entry(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(
+            self.entry_edit(4),
+            {"text": "edited"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+        self.assertTemplateUsed(response, "todo/_entry.html")  # type: ignore
+        self.assertContains(response, "<strike>edited</strike>")
+        entry = get_entry(4)
+        self.assertEqual((entry.text, entry.completed), ("edited", True))
+
+    def test_entry_edit_POST_script_invalid_gets_errors(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(
+            self.entry_edit(4), {"text": "e"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("text", response.json()["errors"])
+        self.assertEqual(get_entry(4).text, "3.1.Text")
+
+    def test_entry_toggle_POST_non_owner_returns_404(self):
+        self.client.force_login(self.user1)
+        response = self.client.post(self.entry_toggle(4), {})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(get_entry(4).completed)
+
+    def test_entry_toggle_POST_owner(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(self.entry_toggle(4), {})
+
+        self.assertRedirects(response, self.todo_detail(3))  # type: ignore
+        self.assertFalse(get_entry(4).completed)
+
+    def test_entry_toggle_POST_script_gets_entry(self):
+        self.client.force_login(self.user1)
+        response = self.client.post(
+            self.entry_toggle(2),
+            {"completed": "on"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+        self.assertTemplateUsed(response, "todo/_entry.html")  # type: ignore
+        self.assertTemplateNotUsed(response, "todo/todo_detail.html")  # type: ignore
+        self.assertContains(response, "<strike>1.2.Text</strike>")
+        self.assertTrue(get_entry(2).completed)
+
+    def test_entry_move_POST_non_owner_returns_404(self):
+        self.client.force_login(self.user1)
+        response = self.client.post(self.entry_move(5), {"before": 4})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_entry_move_POST_owner(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(self.entry_move(5), {"before": 4})
+
+        self.assertRedirects(response, self.todo_detail(3))  # type: ignore
+        response = self.client.get(self.todo_detail(3))
+        texts = [entry.text for entry in response.context["entries"]]
+        self.assertEqual(texts, ["3.2.Text", "3.1.Text"])
+
+    def test_entry_move_POST_script_gets_position(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(
+            self.entry_move(4), {"after": 5}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": 4, "position": get_entry(4).position})
+        self.assertGreater(get_entry(4).position, get_entry(5).position)
+
+    def test_entry_move_POST_other_list_fails(self):
+        self.client.force_login(self.user2)
+        response = self.client.post(
+            self.entry_move(4), {"after": 1}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("errors", response.json())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches["profiles"].clear()
+        self.user1 = User.objects.create(username="user1", password="pass1")
+        self.user2 = User.objects.create(username="user2", password="pass2")
+        self.todo = ToDo.objects.create(title="Public", owner=self.user1, public=True)
+        Entry.objects.create(todo=self.todo, text="entry")
+        self.paths = [
+            reverse("todo:todo-list"),
+            reverse("todo:todo-detail", args=(self.todo.pk,)),
+            reverse("todo:profile", args=("user1",)),
+        ]
+
+    def revalidate(self, path, response):
+        return self.client.get(
+            path,
+            HTTP_IF_NONE_MATCH=response.headers["ETag"],
+            HTTP_IF_MODIFIED_SINCE=response.headers["Last-Modified"],
+        )
+
+    def test_unchanged_returns_304(self):
+        for path in self.paths:
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("Cookie", response.headers["Vary"])
+
+                response = self.revalidate(path, response)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])  # type: ignore
+
+    def test_changed_returns_200(self):
+        responses = [self.client.get(path) for path in self.paths]
+        self.todo.title = "Renamed"
+        self.todo.save()
+
+        for path, response in zip(self.paths, responses):
+            with self.subTest(path=path):
+                response = self.revalidate(path, response)
+                self.assertContains(response, "Renamed")
+
+    def test_entry_change_returns_200(self):
+        path = reverse("todo:todo-detail", args=(self.todo.pk,))
+        response = self.client.get(path)
+        Entry.objects.create(todo=self.todo, text="new entry")
+
+        response = self.revalidate(path, response)
+        self.assertContains(response, "new entry")
+
+    def test_renamed_owner_returns_200(self):
+        path = reverse("todo:todo-list")
+        response = self.client.get(path)
+        self.user1.username = "renamed"
+        self.user1.save()
+
+        response = self.revalidate(path, response)
+        self.assertContains(response, "renamed")
+
+    def test_unpublished_list_returns_200(self):
+        path = reverse("todo:profile", args=("user1",))
+        response = self.client.get(path)
+        self.todo.public = False
+        self.todo.save()
+
+        response = self.revalidate(path, response)
+        self.assertNotContains(response, "Public")  # type: ignore
+
+    def test_etag_varies_on_user(self):
+        for path in self.paths:
+            with self.subTest(path=path):
+                self.client.force_login(self.user1)
+                response = self.client.get(path)
+                self.assertIn("private", response.headers["Cache-Control"])
+                self.client.force_login(self.user2)
+
+                response = self.revalidate(path, response)
+                self.assertEqual(response.status_code, 200)
+
 
 def url_plus_next(url: str, next: str) -> str:
     return f"{url}?next={next}"
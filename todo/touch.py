@@ -0,0 +1,181 @@
+"""Cheap `ToDo` bookkeeping on behalf of its entries.
+
+Saving the parent list just to refresh `auto_now` loads the row and rewrites
+every column. Instead entries *touch* the list, which is a single
+`UPDATE ... SET modified_at` by primary key that also applies changes of
+entry counters with `F()` expressions, so concurrent writers never lose
+each other's increments.
+
+A touch is issued right away, in the transaction of the write it belongs
+to. Inside `deferred_touches()`, which is a transaction itself, touches are
+collected and issued once at the end of it, so any number of entry writes
+costs one statement per list and still commits with the writes. The block
+also remembers the last position key of lists entries were appended to, so
+only the first entry appended to a list looks it up.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import router
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from yyiktodo.db import write_atomic
+
+# Deltas of counters, and 0 for lists known to be private else 1, keyed by
+# database alias and list id.
+Pending = dict[tuple[str | None, int], list[int]]
+
+# Database of the innermost `deferred_touches()` block, its touches and last
+# position keys by list id.
+_pending: ContextVar[tuple[str, Pending, dict[int, str]] | None] = ContextVar(
+    "todo_touch_pending", default=None
+)
+
+
+def progress_expression(entries=0, completed=0):
+    """Percent of completed entries after counters change by given deltas.
+
+    Both counters are referenced by their values before the update, as the
+    expression is evaluated in the same statement.
+    """
+    return (
+        (F("completed_count") + completed)
+        * 100
+        / Greatest(F("entry_count") + entries, 1)
+    )
+
+
+def counter_updates(entries=0, completed=0) -> dict:
+    """Return `QuerySet.update()` kwargs changing counters by deltas."""
+    if not (entries or completed):
+        return {}
+    return {
+        "entry_count": F("entry_count") + entries,
+        "completed_count": F("completed_count") + completed,
+        "progress": progress_expression(entries, completed),
+    }
+
+
+def touch(
+    todo_id: int,
+    todo=None,
+    entries: int = 0,
+    completed: int = 0,
+    using: str | None = None,
+) -> None:
+    """Mark to-do list as modified now and change its entry counters.
+
+    `todo` is an already loaded instance of the list, if any, which gets its
+    fields updated in place so callers see the same values as stored.
+    `using` is the database holding the list, routed as usual if not given.
+    Touches are deferred only by a `deferred_touches()` block on the same
+    database, others are issued at once.
+    """
+    now = timezone.now()
+    if todo is not None:
+        todo.modified_at = now
+        if entries or completed:
+            todo.entry_count += entries
+            todo.completed_count += completed
+            todo.progress = todo.completed_count * 100 // max(todo.entry_count, 1)
+    # Items of public lists in the feed are touched too, see `todo/feed.py`.
+    listed = int(todo is None or todo.public)
+    block = current_block(using)
+    if block is None:
+        flush_touches({(using, todo_id): [entries, completed, listed]}, now)
+    else:
+        deltas = block[1].setdefault((using, todo_id), [0, 0, 0])
+        deltas[0] += entries
+        deltas[1] += completed
+        deltas[2] |= listed
+
+
+def db_for_lists() -> str:
+    from .models import ToDo
+
+    return router.db_for_write(ToDo)
+
+
+def current_block(using: str | None):
+    """Return the `deferred_touches()` block open on `using`, if any."""
+    block = _pending.get()
+    if block is None or block[0] != (using or db_for_lists()):
+        return None
+    return block
+
+
+def batched_position(todo_id: int, using: str | None) -> str | None:
+    """Return last position key of the list remembered by the block."""
+    block = current_block(using)
+    return None if block is None else block[2].get(todo_id)
+
+
+def remember_position(todo_id: int, using: str | None, position: str | None) -> None:
+    """Remember last position key of the list, forget it if None."""
+    block = current_block(using)
+    if block is None:
+        return
+    if position is None:
+        block[2].pop(todo_id, None)
+    else:
+        block[2][todo_id] = position
+
+
+def flush_touches(deltas: Pending, now=None) -> None:
+    """Apply collected touches, one statement per database and counter change.
+
+    Feed items get one more statement per counter change, unless all lists
+    touched are known to be private, see `todo.feed.with_lists()` for when.
+    """
+    from .feed import with_lists
+    from .models import ToDo
+
+    now = now or timezone.now()
+    groups = defaultdict(list)
+    items = defaultdict(list)
+    for (using, todo_id), (entries, completed, listed) in deltas.items():
+        groups[using, entries, completed].append(todo_id)
+        if listed:
+            items[using, entries, completed].append(todo_id)
+    for (using, entries, completed), todo_ids in groups.items():
+        ToDo.objects.using(using).filter(pk__in=todo_ids).update(
+            modified_at=now, **counter_updates(entries, completed)
+        )
+    for (using, entries, completed), todo_ids in items.items():
+        with_lists(partial(touch_items, todo_ids, now, entries, completed), using)
+
+
+def touch_items(todo_ids: list[int], now, entries: int, completed: int) -> None:
+    from .feed import feed_db
+    from .models import PublicFeedItem
+
+    PublicFeedItem.objects.using(feed_db()).filter(pk__in=todo_ids).update(
+        modified_at=now, **counter_updates(entries, completed)
+    )
+
+
+@contextmanager
+def deferred_touches(using: str | None = None):
+    """Run the block in a transaction on `using`, touching each list once.
+
+    Touches of lists on `using` are collected and issued at the end of the
+    block, before it commits, so they are committed or rolled back together
+    with the writes. A transaction already open on `using` is joined without
+    a savepoint, so an error inside rolls it back as a whole. Touches of
+    writes undone by a nested `atomic()` would still be issued, so errors of
+    nested blocks must not be caught inside.
+    """
+    using = using or db_for_lists()
+    pending: Pending = {}
+    with write_atomic(using=using, savepoint=False):
+        token = _pending.set((using, pending, {}))
+        try:
+            yield
+        finally:
+            _pending.reset(token)
+        flush_touches(pending)
@@ -1,10 +1,19 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
+    AsyncToDoDetailView,
+    AsyncToDoListView,
+    AsyncUserProfileView,
+    EntryBulkView,
     EntryCreateView,
     EntryDeleteView,
     EntryEditView,
+    EntryMoveView,
+    EntryToggleView,
     MyToDoListView,
+    SearchView,
+    ToDoBatchView,
     ToDoCreateView,
     ToDoDeleteView,
     ToDoDetailView,
@@ -15,15 +24,29 @@ from .views import (
 
 app_name = "todo"
 
+if settings.TODO_ASYNC_VIEWS:
+    list_view = AsyncToDoListView.as_view()
+    detail_view = AsyncToDoDetailView.as_view()
+    profile_view = AsyncUserProfileView.as_view()
+else:
+    list_view = ToDoListView.as_view()
+    detail_view = ToDoDetailView.as_view()
+    profile_view = UserProfileView.as_view()
+
 urlpatterns = [
-    path("", ToDoListView.as_view(), name="todo-list"),
+    path("", list_view, name="todo-list"),
     path("my/", MyToDoListView.as_view(), name="todo-list-my"),
     path("create/", ToDoCreateView.as_view(), name="todo-create"),
-    path("<int:pk>/", ToDoDetailView.as_view(), name="todo-detail"),
+    path("<int:pk>/", detail_view, name="todo-detail"),
     path("<int:pk>/edit/", ToDoEditView.as_view(), name="todo-edit"),
     path("<int:pk>/delete/", ToDoDeleteView.as_view(), name="todo-delete"),
     path("<int:pk>/create_entry/", EntryCreateView.as_view(), name="entry-create"),
+    path("<int:pk>/entries/", EntryBulkView.as_view(), name="entry-bulk"),
     path("entries/<int:pk>/edit/", EntryEditView.as_view(), name="entry-edit"),
     path("entries/<int:pk>/delete/", EntryDeleteView.as_view(), name="entry-delete"),
-    path("users/<str:username>/", UserProfileView.as_view(), name="profile"),
+    path("entries/<int:pk>/move/", EntryMoveView.as_view(), name="entry-move"),
+    path("entries/<int:pk>/toggle/", EntryToggleView.as_view(), name="entry-toggle"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("users/<str:username>/", profile_view, name="profile"),
+    path("api/lists/", ToDoBatchView.as_view(), name="api-lists"),
 ]
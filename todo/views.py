@@ -1,90 +1,360 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
-from django.http import HttpRequest
-from django.shortcuts import get_object_or_404, redirect
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils.safestring import mark_safe
 from django.views.generic import (
     CreateView,
     DeleteView,
     DetailView,
     FormView,
     ListView,
+    TemplateView,
     UpdateView,
+    View,
 )
 
-from .forms import EntryForm
-from .mixins import AddOwnerMixin, OrFilteredMultipleMixin, OrFilteredSingleMixin
-from .models import Entry, ToDo
+from yyiktodo.db import write_atomic
+
+from .cache import aget_profile, get_profile
+from .forms import EntryBulkForm, EntryForm, EntryMoveForm, EntryToggleForm
+from .mixins import (
+    AddOwnerMixin,
+    AsyncConditionalGetMixin,
+    AsyncKeysetListMixin,
+    ConditionalGetMixin,
+    KeysetConditionalGetMixin,
+    OrFilteredMultipleMixin,
+    OrFilteredSingleMixin,
+    ProgressOrderingMixin,
+    VisibleFilterMixin,
+    visibility_filters,
+)
+from .models import Entry, PublicFeedItem, ToDo
+from .search import search
+from .sharding import (
+    all_shards,
+    candidate_shards,
+    is_sharded,
+    shard_for_owner,
+    with_owners,
+)
+from .touch import deferred_touches
 
 User = get_user_model()
 
 
-class ToDoListView(OrFilteredMultipleMixin, ListView):
+class ToDoListView(KeysetConditionalGetMixin, ProgressOrderingMixin, ListView):
+    """Public lists and own lists of the user.
+
+    Public lists are paged from the feed, see `todo/feed.py`, and own ones
+    from the shard of the user, and the pages are merged.
+    """
+
     model = ToDo
+    # Read from a replica, see `yyiktodo/routers.py`.
+    replica_reads = True
 
-    def get_filters(self):
-        filters = [Q(public=True)]
+    def get_queryset(self):
+        # Own lists, paged along with the feed for users logged in.
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(owner=user).using(shard_for_owner(user.pk))
+
+    def get_keyset_branches(self, queryset):
+        branches = [self.filter_status(PublicFeedItem.objects.all())]
         if self.request.user.is_authenticated:
-            filters.append(Q(owner=self.request.user))
-        return filters
+            branches.append(queryset)
+        return branches
+
+
+class AsyncToDoListView(AsyncKeysetListMixin, ToDoListView):
+    """`ToDoListView` served with async queries under ASGI."""
+
+
+class OwnerShardMixin:
+    """Look objects up on the shard holding lists of the user."""
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related("owner")
+        queryset = super().get_queryset()  # type: ignore
+        return queryset.using(shard_for_owner(self.request.user.pk))  # type: ignore
 
 
-class MyToDoListView(LoginRequiredMixin, OrFilteredMultipleMixin, ListView):
+class MyToDoListView(
+    LoginRequiredMixin,
+    OwnerShardMixin,
+    KeysetConditionalGetMixin,
+    ProgressOrderingMixin,
+    OrFilteredMultipleMixin,
+    ListView,
+):
     model = ToDo
 
     def get_filters(self):
         return [Q(owner=self.request.user)]
 
+
+class ToDoBatchView(View):
+    """Return many lists with their entries as JSON.
+
+    Lists are picked by `ids` and their fields by `fields`, comma separated,
+    where entry fields are prefixed with `entries.`. Whatever the batch size
+    it takes one query for lists and their owners and one for entries per
+    shard.
+    """
+
+    max_batch_size = 100
+    # Fields in the order they are serialized.
+    todo_fields = (
+        "id",
+        "title",
+        "owner",
+        "public",
+        "created_at",
+        "modified_at",
+        "entry_count",
+        "completed_count",
+        "progress",
+    )
+    entry_fields = ("id", "text", "completed")
+
+    def get(self, request, *args, **kwargs):
+        try:
+            ids = self.get_ids()
+            fields, entry_fields = self.get_fields()
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        visible = reduce(or_, visibility_filters(request.user))
+        queryset = ToDo.objects.filter(visible, pk__in=ids)
+        columns = [name for name in fields if name != "owner"]
+        if "owner" in fields and is_sharded():
+            owners = User.objects.only("username")
+            queryset = queryset.prefetch_related(Prefetch("owner", queryset=owners))
+            columns.append("owner")
+        elif "owner" in fields:
+            queryset = queryset.select_related("owner")
+            columns.append("owner__username")
+        queryset = queryset.only("id", *columns)
+        if entry_fields:
+            entries = Entry.objects.only("todo", *entry_fields).order_by(
+                *Entry.ORDERING
+            )
+            queryset = queryset.prefetch_related(Prefetch("entries", queryset=entries))
+
+        found = {todo.pk: todo for db in all_shards() for todo in queryset.using(db)}
+        lists = [
+            self.serialize(found[pk], fields, entry_fields) for pk in ids if pk in found
+        ]
+        missing = [pk for pk in ids if pk not in found]
+        return JsonResponse({"lists": lists, "missing": missing})
+
+    def get_ids(self) -> list[int]:
+        raw = ",".join(self.request.GET.getlist("ids"))
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in raw.split(",") if pk))
+        except ValueError:
+            raise ValueError("`ids` must be comma separated integers.")
+        if not ids:
+            raise ValueError("`ids` is required.")
+        if len(ids) > self.max_batch_size:
+            raise ValueError(f"No more than {self.max_batch_size} ids at once.")
+        return ids
+
+    def get_fields(self) -> tuple[list[str], list[str]]:
+        """Return requested list and entry fields, in the order of the class."""
+        raw = ",".join(self.request.GET.getlist("fields"))
+        if not raw:
+            return list(self.todo_fields), list(self.entry_fields)
+        fields, entry_fields = set(), set()
+        for name in filter(None, raw.split(",")):
+            if name == "entries":
+                entry_fields.update(self.entry_fields)
+            elif name.startswith("entries.") and name[8:] in self.entry_fields:
+                entry_fields.add(name[8:])
+            elif name in self.todo_fields:
+                fields.add(name)
+            else:
+                raise ValueError(f"Unknown field `{name}`.")
+        return (
+            [name for name in self.todo_fields if name in fields],
+            [name for name in self.entry_fields if name in entry_fields],
+        )
+
+    def serialize(self, todo: ToDo, fields: list[str], entry_fields: list[str]) -> dict:
+        data = {
+            name: todo.owner.username if name == "owner" else getattr(todo, name)
+            for name in fields
+        }
+        if entry_fields:
+            data["entries"] = [
+                {name: getattr(entry, name) for name in entry_fields}
+                for entry in todo.entries.all()  # type: ignore
+            ]
+        return data
+
+
+class SearchView(ListView):
+    """Rank lists and entries matching `q` among visible lists."""
+
+    template_name = "todo/search.html"
+    context_object_name = "results"
+    max_results = 50
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related("owner")
+        results = []
+        for db in all_shards():
+            results += self.search_shard(db)
+        # Every shard ranks by its own statistics, which is close enough to
+        # merge them.
+        results.sort(key=lambda match: match.rank)
+        return results[: self.max_results]
+
+    def search_shard(self, db: str | None) -> list:
+        matches = search(
+            self.request.GET.get("q", ""),
+            self.request.user.pk,
+            limit=self.max_results,
+            using=db,
+        )
+        todos = with_owners(ToDo.objects.using(db)).in_bulk(
+            {match.todo_id for match in matches}
+        )
+        entries = Entry.objects.using(db).in_bulk(
+            {match.entry_id for match in matches if match.entry_id}
+        )
+        results = []
+        for match in matches:
+            # Rows deleted since the search are skipped.
+            match.todo = todos.get(match.todo_id)
+            match.entry = entries.get(match.entry_id)  # type: ignore
+            if match.todo and (match.entry or not match.entry_id):
+                results.append(match)
+        return results
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.request.GET.get("q", "")
+        return context
+
 
+class UserProfileView(ConditionalGetMixin, TemplateView):
+    """Public lists of a user, served from `todo.cache`."""
 
-class UserProfileView(DetailView):
-    model = User
-    fields = ["username"]
     template_name = "todo/profile.html"
-    context_object_name = "profile"
+    replica_reads = True
+
+    def get_validators(self):
+        return self.profile_validators(get_profile(self.kwargs["username"]))
+
+    def profile_validators(self, profile: dict | None):
+        if profile is None:
+            raise Http404("No user found matching the query")
+        self.profile = profile
+        return (profile["id"], profile["version"]), profile["built_at"]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["todo_list"] = ToDo.objects.filter(owner=self.object).filter(  # type: ignore
-            public=True
-        )
+        context["profile"] = self.profile
+        context["todo_list"] = self.profile["lists"]
         return context
 
-    def get_object(self, queryset=None):
-        queryset = queryset or self.get_queryset()
-        return get_object_or_404(queryset, username=self.kwargs["username"])
+
+class AsyncUserProfileView(AsyncConditionalGetMixin, UserProfileView):
+    """`UserProfileView` served from the event loop under ASGI."""
+
+    async def aget_validators(self):
+        return self.profile_validators(await aget_profile(self.kwargs["username"]))
+
+    async def aget_response(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data(**kwargs))
 
 
-class ToDoDetailView(OrFilteredSingleMixin, DetailView):
+class ToDoDetailView(
+    ConditionalGetMixin, VisibleFilterMixin, OrFilteredSingleMixin, DetailView
+):
     model = ToDo
+    replica_reads = True
 
-    def get_filters(self):
-        filters = [Q(public=True)]
-        if self.request.user.is_authenticated:
-            filters.append(Q(owner=self.request.user))
-        return filters
+    # Shard the list is looked up on, found by `get_validators()`.
+    shard = None
 
     def get_queryset(self):
-        return super().get_queryset().select_related("owner")
+        return with_owners(super().get_queryset()).using(self.shard)
+
+    def get_validators_queryset(self):
+        return (
+            self.get_queryset()
+            .filter(pk=self.kwargs["pk"])
+            .values_list("modified_at", flat=True)
+        )
+
+    def get_validators(self):
+        for self.shard in candidate_shards(self.kwargs["pk"]):
+            modified_at = self.get_validators_queryset().first()
+            if modified_at is not None:
+                return modified_at, modified_at
+        return None
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if "entry_form" in self.request.session:
-            form = EntryForm(self.request.session.pop("entry_form"))
-            context["entry_form"] = form
-        else:
-            context["entry_form"] = EntryForm()
+        # Part of the entries fragment cache key, see `todo_detail.html`.
+        context["is_owner"] = self.object.owner_id == self.request.user.pk  # type: ignore
+        # Only read when the entries fragment isn't cached.
+        context["entries"] = self.object.entries.order_by(*Entry.ORDERING)  # type: ignore
+        if settings.TODO_ASYNC_VIEWS:
+            # Served by `yyiktodo/asgi.py`, see `todo/events.py`.
+            detail_url = reverse("todo:todo-detail", args=(self.object.pk,))  # type: ignore
+            context["events_url"] = f"{detail_url}events/"
+        # Bound when rendered by `EntryCreateView` with errors.
+        context.setdefault("entry_form", EntryForm())
+        context["bulk_form"] = EntryBulkForm()
         return context
 
 
+def entries_fragment_key(todo: ToDo, is_owner: bool) -> str:
+    """Cache key of the entries fragment of `todo_detail.html`."""
+    return make_template_fragment_key(
+        "todo_entries", [todo.pk, todo.modified_at, is_owner]
+    )
+
+
+class AsyncToDoDetailView(AsyncConditionalGetMixin, ToDoDetailView):
+    """`ToDoDetailView` served with async queries under ASGI."""
+
+    async def aget_validators(self):
+        for self.shard in candidate_shards(self.kwargs["pk"]):
+            modified_at = await self.get_validators_queryset().afirst()
+            if modified_at is not None:
+                return modified_at, modified_at
+        return None
+
+    async def aget_response(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        # Entries can't be read lazily by the template, so they are loaded
+        # only if the fragment is missing. A cached one is passed as is, as
+        # it could be evicted before the template gets to it.
+        key = entries_fragment_key(self.object, context["is_owner"])
+        fragment = caches["fragments"].get(key)
+        if fragment is None:
+            context["entries"] = [entry async for entry in context["entries"]]
+        else:
+            context["entries_html"] = mark_safe(fragment)
+        return self.render_to_response(context)
+
+
 class ToDoCreateView(AddOwnerMixin, CreateView):
     model = ToDo
     fields = ["title", "public"]
@@ -94,7 +364,9 @@ class ToDoCreateView(AddOwnerMixin, CreateView):
         return reverse("todo:todo-detail", args=(self.object.pk,))  # type: ignore
 
 
-class ToDoEditView(LoginRequiredMixin, OrFilteredSingleMixin, UpdateView):
+class ToDoEditView(
+    LoginRequiredMixin, OwnerShardMixin, OrFilteredSingleMixin, UpdateView
+):
     model = ToDo
     fields = ["title", "public"]
 
@@ -105,52 +377,234 @@ class ToDoEditView(LoginRequiredMixin, OrFilteredSingleMixin, UpdateView):
         return reverse("todo:todo-detail", args=(self.object.pk,))
 
 
-class ToDoDeleteView(LoginRequiredMixin, OrFilteredSingleMixin, DeleteView):
+class ToDoDeleteView(
+    LoginRequiredMixin, OwnerShardMixin, OrFilteredSingleMixin, DeleteView
+):
     model = ToDo
     success_url = reverse_lazy("todo:todo-list")
 
     def get_filters(self):
         return [Q(owner=self.request.user)]
 
+    def form_valid(self, form):
+        self.object.soft_delete()
+        return redirect(self.get_success_url())
+
+
+class EntryFragmentMixin:
+    """Answer scripts with the item of the changed entry alone.
+
+    Scripts of `todo_detail.html` send `X-Requested-With: XMLHttpRequest`
+    and swap the returned `<li>` into the page, instead of following a
+    redirect to the list and rendering all its entries again.
+    """
+
+    def is_script(self) -> bool:
+        return self.request.headers.get("X-Requested-With") == "XMLHttpRequest"  # type: ignore
+
+    def render_entry(self, entry: Entry, status: int = 200):
+        context = {"entry": entry, "is_owner": True}
+        return render(self.request, "todo/_entry.html", context, status=status)  # type: ignore
+
+
+class EntryCreateView(LoginRequiredMixin, EntryFragmentMixin, FormView):
+    """Add an entry to own list.
+
+    Scripts get the item of the new entry. An invalid form is rendered with
+    its errors right away, in the list page or alone for scripts, so
+    nothing is kept in the session for the next request.
+    """
 
-class EntryCreateView(LoginRequiredMixin, FormView):
     form_class = EntryForm
 
     def get(self, request, pk: int):
         return redirect(reverse("todo:todo-detail", args=(pk,)))
 
     def post(self, request: HttpRequest, pk: int):
-        todo = get_object_or_404(ToDo, pk=pk, owner=request.user)
-        form: EntryForm = self.get_form()  # type: ignore
+        lists = ToDo.objects.using(shard_for_owner(request.user.pk))
+        self.todo = get_object_or_404(with_owners(lists), pk=pk, owner=request.user)
+        return super().post(request, pk=pk)
+
+    def form_valid(self, form: EntryForm):
+        entry: Entry = form.save(commit=False)
+        entry.todo = self.todo
+        entry.save()
+        if self.is_script():
+            return self.render_entry(entry, status=201)
+        return super().form_valid(form)
+
+    def form_invalid(self, form: EntryForm):
+        if self.is_script():
+            context = {"todo": self.todo, "entry_form": form}
+            return render(self.request, "todo/_entry_form.html", context, status=400)
+        view = ToDoDetailView()
+        view.setup(self.request, **self.kwargs)
+        view.object = self.todo
+        context = view.get_context_data(object=self.todo, entry_form=form)
+        return view.render_to_response(context)
+
+    def get_success_url(self) -> str:
+        return reverse("todo:todo-detail", args=(self.todo.pk,))
+
+
+class EntryBulkView(LoginRequiredMixin, FormView):
+    form_class = EntryBulkForm
+
+    def get(self, request, pk: int):
+        return redirect(reverse("todo:todo-detail", args=(pk,)))
+
+    def post(self, request: HttpRequest, pk: int):
+        lists = ToDo.objects.using(shard_for_owner(request.user.pk))
+        todo = get_object_or_404(lists, pk=pk, owner=request.user)
+        form: EntryBulkForm = self.get_form()  # type: ignore
         if form.is_valid():
-            entry: Entry = form.save(commit=False)
-            entry.todo = todo
-            entry.save()
+            with deferred_touches(using=todo._state.db):
+                form.save(todo)
         else:
-            request.session["entry_form"] = form.data
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
         return redirect(reverse("todo:todo-detail", args=(pk,)))
 
 
-class EntryEditView(LoginRequiredMixin, OrFilteredSingleMixin, UpdateView):
+class EntryEditView(
+    LoginRequiredMixin,
+    OwnerShardMixin,
+    OrFilteredSingleMixin,
+    EntryFragmentMixin,
+    UpdateView,
+):
+    """Edit own entry on its page, or its text in place from scripts.
+
+    Scripts get the item of the edited entry, or JSON with errors.
+    """
+
     model = Entry
     fields = ["text", "completed"]
     template_name = "todo/entry_form.html"
     context_object_name = "entry"
 
     def get_filters(self):
-        return [Q(todo__owner=self.request.user)]
+        return [Q(todo__owner=self.request.user, todo__deleted_at=None)]
+
+    def get_queryset(self):
+        # Joined by the filter anyway, the list tells touches if it's public.
+        return super().get_queryset().select_related("todo")
+
+    def get_form_class(self):
+        # Inline edits send the text only.
+        return EntryForm if self.is_script() else super().get_form_class()
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if self.is_script():
+            return self.render_entry(self.object)
+        return response
+
+    def form_invalid(self, form):
+        if self.is_script():
+            return JsonResponse({"errors": form.errors}, status=400)
+        return super().form_invalid(form)
 
     def get_success_url(self) -> str:
-        return reverse("todo:todo-detail", args=(self.object.todo.pk,))
+        return reverse("todo:todo-detail", args=(self.object.todo_id,))
 
 
-class EntryDeleteView(LoginRequiredMixin, OrFilteredSingleMixin, DeleteView):
+class EntryDeleteView(
+    LoginRequiredMixin, OwnerShardMixin, OrFilteredSingleMixin, DeleteView
+):
     model = Entry
     template_name = "todo/entry_confirm_delete.html"
     context_object_name = "entry"
 
     def get_filters(self):
-        return [Q(todo__owner=self.request.user)]
+        return [Q(todo__owner=self.request.user, todo__deleted_at=None)]
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("todo")
 
     def get_success_url(self) -> str:
         return reverse("todo:todo-detail", args=(self.object.todo.pk,))
+
+
+class EntryToggleView(
+    LoginRequiredMixin,
+    OwnerShardMixin,
+    OrFilteredSingleMixin,
+    EntryFragmentMixin,
+    FormView,
+):
+    """Mark own entry completed or not by one `UPDATE`.
+
+    Scripts get the item of the entry, others are redirected to the list.
+    """
+
+    model = Entry
+    form_class = EntryToggleForm
+    http_method_names = ["post"]
+
+    def get_filters(self):
+        return [Q(todo__owner=self.request.user, todo__deleted_at=None)]
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        self.object = self.get_object(self.get_queryset().select_related("todo"))
+        return super().post(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), "entry": self.object}
+
+    def form_valid(self, form: EntryToggleForm):
+        with write_atomic(using=self.object._state.db):
+            entry = form.save()
+        if self.is_script():
+            return self.render_entry(entry)
+        return redirect(self.get_success_url())
+
+    def get_success_url(self) -> str:
+        return reverse("todo:todo-detail", args=(self.object.todo_id,))
+
+
+class EntryMoveView(
+    LoginRequiredMixin,
+    OwnerShardMixin,
+    OrFilteredSingleMixin,
+    EntryFragmentMixin,
+    FormView,
+):
+    """Move own entry right before or after another entry of its list.
+
+    Scripts sending `X-Requested-With: XMLHttpRequest` get JSON with the new
+    position of the entry, others are redirected to the list.
+    """
+
+    model = Entry
+    form_class = EntryMoveForm
+    http_method_names = ["post"]
+
+    def get_filters(self):
+        return [Q(todo__owner=self.request.user, todo__deleted_at=None)]
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        self.object = self.get_object(self.get_queryset().select_related("todo"))
+        return super().post(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), "entry": self.object}
+
+    def form_valid(self, form: EntryMoveForm):
+        with write_atomic(using=self.object._state.db):
+            entry = form.save()
+        if self.is_script():
+            return JsonResponse({"id": entry.pk, "position": entry.position})
+        return redirect(self.get_success_url())
+
+    def form_invalid(self, form: EntryMoveForm):
+        if self.is_script():
+            return JsonResponse({"errors": form.errors}, status=400)
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(self.request, error)
+        return redirect(self.get_success_url())
+
+    def get_success_url(self) -> str:
+        return reverse("todo:todo-detail", args=(self.object.todo_id,))
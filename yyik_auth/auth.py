@@ -0,0 +1,13 @@
+from asgiref.sync import sync_to_async
+from django.contrib import auth
+
+
+async def aget_user(request):
+    """Load the user of the request in a thread and set it as `request.user`.
+
+    Sync code reading `request.user` later, as templates do, gets the
+    loaded user instead of the lazy one of `AuthenticationMiddleware`, so it
+    never queries the database from the event loop.
+    """
+    request.user = await sync_to_async(auth.get_user)(request)
+    return request.user
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class YyikTasksConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "yyik_tasks"
+
+    def ready(self):
+        # Register tasks defined in `tasks.py` modules of installed apps.
+        autodiscover_modules("tasks")
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...models import Task
+from ...queue import batches, claim, run
+
+
+def run_in_thread(tasks: list[Task]) -> bool:
+    # Threads of the pool have their own connections, checked and closed
+    # around every call as around a request.
+    close_old_connections()
+    try:
+        return run(tasks)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks on a thread pool, claiming due calls "
+        "from the queue table and polling it when there are none."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Number of threads running tasks, 0 runs them in this one.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of calls claimed at once.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when no call is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no call is due instead of polling.",
+        )
+
+    def handle(
+        self,
+        *args,
+        threads: int,
+        batch_size: int,
+        poll_interval: float,
+        once: bool,
+        **options,
+    ):
+        pool = ThreadPoolExecutor(threads) if threads else None
+        done = failed = 0
+        try:
+            while True:
+                tasks = claim(batch_size)
+                if not tasks:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                groups = batches(tasks)
+                if pool is not None:
+                    results = list(pool.map(run_in_thread, groups))
+                else:
+                    results = [run(group) for group in groups]
+                for group, succeeded in zip(groups, results):
+                    if succeeded:
+                        done += len(group)
+                    else:
+                        failed += len(group)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(f"Ran {done} calls, {failed} failed.")
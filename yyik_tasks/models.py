@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Call of a registered task waiting in the queue, see `yyik_tasks/queue.py`.
+
+    A claimed task is leased by moving `run_at` forward, so a task of a
+    worker that died becomes due again once the lease is over. Done tasks are
+    deleted, failed ones stay with `failed_at` set.
+    """
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=dict)
+    # Idempotency key, a task is not enqueued while one with its key waits.
+    key = models.CharField(max_length=200, null=True, unique=True)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.SmallIntegerField(default=0)
+    failed_at = models.DateTimeField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run_at", "id"],
+                name="task_due_idx",
+                condition=models.Q(failed_at=None),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} {self.args}"
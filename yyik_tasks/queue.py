@@ -0,0 +1,184 @@
+"""Side work moved out of requests into a queue in the database.
+
+Tasks are functions registered with `@task` in `tasks.py` modules of apps.
+Requests enqueue calls of them, usually with `enqueue_on_commit()` so the
+call is queued only once the main work is committed, and `manage.py
+run_tasks` claims due calls and runs them on a thread pool.
+
+A call runs at least once, a worker dying in the middle of it leaves it to
+be claimed again once its lease is over, so tasks have to be idempotent.
+Enqueuing with a `key` does nothing while a call with that key waits, which
+coalesces repeated requests for the same work. A claimed call drops its key,
+so work requested while it runs is queued again.
+
+Tasks with a `batch_size` get arguments of up to that many calls claimed
+together as a list, to do in one statement what calls would do one by one.
+A failing call is retried after a delay doubling every time, and kept with
+`failed_at` set once it has no retries left.
+"""
+
+import logging
+import traceback
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from yyiktodo.db import write_atomic
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claimed call has to finish in before it is claimed again.
+LEASE = 300
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable
+    batch_size: int = 1
+    retries: int = 3
+    retry_delay: float = 10.0
+
+
+registry: dict[str, TaskSpec] = {}
+
+
+def task(
+    name: str | None = None,
+    *,
+    batch_size: int = 1,
+    retries: int = 3,
+    retry_delay: float = 10.0,
+):
+    """Register function as a task named `name`, its dotted path by default.
+
+    A task is called with keyword arguments of the call, or with a list of
+    them when `batch_size` is more than one.
+    """
+
+    def register(func: Callable) -> Callable:
+        spec = TaskSpec(
+            name or f"{func.__module__}.{func.__name__}",
+            func,
+            batch_size,
+            retries,
+            retry_delay,
+        )
+        registry[spec.name] = spec
+        return func
+
+    return register
+
+
+def queue_db() -> str:
+    return router.db_for_write(Task)
+
+
+def enqueue(
+    name: str, args: dict | None = None, key: str | None = None, delay: float = 0
+) -> None:
+    """Queue a call of task `name`, unless one with the same `key` waits."""
+    if name not in registry:
+        raise LookupError(f"No task {name} is registered.")
+    run_at = timezone.now() + timedelta(seconds=delay)
+    Task.objects.using(queue_db()).bulk_create(
+        [Task(name=name, args=args or {}, key=key, run_at=run_at)],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_on_commit(
+    name: str,
+    args: dict | None = None,
+    key: str | None = None,
+    delay: float = 0,
+    using: str | None = None,
+) -> None:
+    """Queue a call once the transaction on database `using` commits.
+
+    Nothing is queued if it rolls back. Outside of a transaction the call is
+    queued at once.
+    """
+    transaction.on_commit(lambda: enqueue(name, args, key, delay), using=using)
+
+
+def claim(limit: int) -> list[Task]:
+    """Lease up to `limit` due calls, the oldest first."""
+    db = queue_db()
+    now = timezone.now()
+    with write_atomic(using=db):
+        tasks = list(
+            Task.objects.using(db)
+            .select_for_update(skip_locked=True)
+            .filter(failed_at=None, run_at__lte=now)
+            .order_by("run_at", "id")[:limit]
+        )
+        Task.objects.using(db).filter(pk__in=[claimed.pk for claimed in tasks]).update(
+            run_at=now + timedelta(seconds=LEASE),
+            attempts=F("attempts") + 1,
+            key=None,
+        )
+    for claimed in tasks:
+        claimed.attempts += 1
+    return tasks
+
+
+def batches(tasks: list[Task]) -> list[list[Task]]:
+    """Group claimed calls by task and by up to `batch_size` of them."""
+    by_name = defaultdict(list)
+    for claimed in tasks:
+        by_name[claimed.name].append(claimed)
+    groups = []
+    for name, named in by_name.items():
+        spec = registry.get(name)
+        size = spec.batch_size if spec is not None else 1
+        groups += [named[start : start + size] for start in range(0, len(named), size)]
+    return groups
+
+
+def run(tasks: list[Task]) -> bool:
+    """Run claimed calls of one task, return if they succeeded.
+
+    Done calls are deleted, failed ones are scheduled for a retry.
+    """
+    spec = registry.get(tasks[0].name)
+    try:
+        if spec is None:
+            raise LookupError(f"No task {tasks[0].name} is registered.")
+        if spec.batch_size > 1:
+            spec.func([claimed.args for claimed in tasks])
+        else:
+            spec.func(**tasks[0].args)
+    except Exception:
+        logger.exception("Task %s failed.", tasks[0].name)
+        retry(tasks, spec, traceback.format_exc())
+        return False
+    else:
+        # Threads of the pool finish calls at once, writes of the queue wait
+        # for the write lock in turn.
+        with write_atomic(using=queue_db()):
+            Task.objects.using(queue_db()).filter(
+                pk__in=[claimed.pk for claimed in tasks]
+            ).delete()
+        return True
+
+
+def retry(tasks: list[Task], spec: TaskSpec | None, error: str) -> None:
+    now = timezone.now()
+    queue = Task.objects.using(queue_db())
+    with write_atomic(using=queue_db()):
+        for failed in tasks:
+            if spec is None or failed.attempts > spec.retries:
+                queue.filter(pk=failed.pk).update(failed_at=now, error=error)
+            else:
+                delay = spec.retry_delay * 2 ** (failed.attempts - 1)
+                queue.filter(pk=failed.pk).update(
+                    run_at=now + timedelta(seconds=delay), error=error
+                )
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from ..models import Task
+from ..queue import claim, enqueue, enqueue_on_commit, task
+
+calls: list = []
+
+
+@task("tests.record")
+def record(value: int) -> None:
+    calls.append(value)
+
+
+@task("tests.record_batch", batch_size=3)
+def record_batch(batch: list[dict]) -> None:
+    calls.append([call["value"] for call in batch])
+
+
+@task("tests.fail", retries=1, retry_delay=60)
+def fail() -> None:
+    raise RuntimeError("Failed")
+
+
+def run_tasks(threads: int = 0) -> str:
+    out = StringIO()
+    call_command("run_tasks", once=True, threads=threads, stdout=out)
+    return out.getvalue()
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_tasks_run_once_and_are_deleted(self):
+        enqueue("tests.record", {"value": 1})
+        enqueue("tests.record", {"value": 2}, delay=60)
+
+        self.assertIn("Ran 1 calls, 0 failed", run_tasks())
+        self.assertEqual(calls, [1])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_key_coalesces_waiting_calls(self):
+        for value in range(3):
+            enqueue("tests.record", {"value": value}, key="record")
+        self.assertEqual(Task.objects.count(), 1)
+
+        claim(10)
+        # The claimed call is running, so the same work is queued again.
+        enqueue("tests.record", {"value": 3}, key="record")
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_batched_task_gets_calls_together(self):
+        for value in range(5):
+            enqueue("tests.record_batch", {"value": value})
+
+        run_tasks()
+
+        self.assertEqual(calls, [[0, 1, 2], [3, 4]])
+
+    def test_failed_call_is_retried_then_kept(self):
+        enqueue("tests.fail")
+
+        with self.assertLogs("yyik_tasks.queue", "ERROR"):
+            self.assertIn("Ran 0 calls, 1 failed", run_tasks())
+        failed = Task.objects.get()
+        self.assertIsNone(failed.failed_at)
+        self.assertGreater(failed.run_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn("RuntimeError", failed.error)
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("yyik_tasks.queue", "ERROR"):
+            run_tasks()
+        self.assertIsNotNone(Task.objects.get().failed_at)
+        self.assertIn("Ran 0 calls, 0 failed", run_tasks())
+
+    def test_enqueue_on_commit_skips_rolled_back_work(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_on_commit("tests.record", {"value": 1})
+            try:
+                with transaction.atomic():
+                    enqueue_on_commit("tests.record", {"value": 2})
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(
+            list(Task.objects.values_list("args", flat=True)), [{"value": 1}]
+        )
+
+    def test_unknown_task_is_not_queued(self):
+        with self.assertRaises(LookupError):
+            enqueue("tests.missing")
+
+
+class ThreadPoolTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_pool_runs_calls(self):
+        for value in range(10):
+            enqueue("tests.record", {"value": value})
+
+        self.assertIn("Ran 10 calls, 0 failed", run_tasks(threads=3))
+        self.assertEqual(sorted(calls), list(range(10)))
+        self.assertFalse(Task.objects.exists())
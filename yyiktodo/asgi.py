@@ -12,5 +12,18 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yyiktodo.settings")
+# Read views don't hold a thread while waiting for the database.
+os.environ.setdefault("YYIKTODO_ASYNC_VIEWS", "1")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up by `get_asgi_application()`.
+from todo.events import EVENTS_PATH, event_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Event streams stay open for as long as the page does, so they are
+    # served outside of Django's request cycle and its middleware.
+    if scope["type"] == "http" and EVENTS_PATH.match(scope["path"]):
+        return await event_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,17 @@
+from contextlib import contextmanager, nullcontext
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_atomic(using: str | None = None, savepoint: bool = True):
+    """`transaction.atomic()` for blocks which write.
+
+    The SQLite backend of `yyiktodo/db/backends/sqlite3` begins it holding
+    the write lock, so reads in the block can be followed by writes under
+    contention. Other blocks begin deferred and don't hold up writers.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    with getattr(connection, "immediate_transactions", nullcontext)():
+        with transaction.atomic(using=using, savepoint=savepoint):
+            yield
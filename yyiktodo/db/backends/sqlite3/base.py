@@ -0,0 +1,138 @@
+"""SQLite backend for several workers writing to one database file.
+
+Options read from `OPTIONS` on top of the stock backend:
+
+- `pragmas`: applied to every new connection, such as WAL journaling,
+  which lets readers go on while one connection writes.
+- `transaction_mode`: how `atomic()` begins transactions, `DEFERRED` by
+  default. A deferred transaction that reads and then writes can't wait for
+  the write lock, as another writer may have changed what it read, and
+  fails with "database is locked" at once. `IMMEDIATE` takes the lock at
+  `BEGIN`, where SQLite waits for up to `busy_timeout`, and `BEGIN` is
+  retried a few times with backoff after that.
+- `write_gate`: queue immediate transactions of threads of one process on a
+  lock instead of the busy handler of SQLite, which polls with growing
+  sleeps.
+
+Blocks which write opt into immediate transactions with
+`connection.immediate_transactions()`, see `yyiktodo.db.write_atomic()`,
+so reads don't take the write lock.
+"""
+
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+from django.db.backends.sqlite3 import base
+
+OWN_OPTIONS = ("pragmas", "transaction_mode", "write_gate", "lock_retries")
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+_gates: dict[str, threading.Lock] = {}
+_gates_lock = threading.Lock()
+
+
+def write_gate(name: str) -> threading.Lock:
+    """Lock shared by all connections of the process to the database file."""
+    with _gates_lock:
+        return _gates.setdefault(name, threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        super().__init__(settings_dict, alias)
+        options = settings_dict["OPTIONS"]
+        self.pragmas = dict(options.get("pragmas", {}))
+        for name, value in self.pragmas.items():
+            if not (PRAGMA_NAME.match(name) and PRAGMA_VALUE.match(str(value))):
+                raise ImproperlyConfigured(f"Invalid SQLite pragma {name}={value}.")
+        self.transaction_mode = options.get("transaction_mode", "DEFERRED").upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"SQLite transaction_mode must be one of {', '.join(TRANSACTION_MODES)}."
+            )
+        self.lock_retries = options.get("lock_retries", 3)
+        self.busy_timeout = int(self.pragmas.get("busy_timeout", 5000)) / 1000
+        self.write_gate = (
+            write_gate(str(settings_dict["NAME"]))
+            if options.get("write_gate")
+            else None
+        )
+        self.holds_write_gate = False
+        self.immediate = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in OWN_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @contextmanager
+    def immediate_transactions(self):
+        """Begin transactions holding the write lock, for blocks which write."""
+        previous, self.immediate = self.immediate, True
+        try:
+            yield
+        finally:
+            self.immediate = previous
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode
+        if self.immediate and mode == "DEFERRED":
+            mode = "IMMEDIATE"
+        if mode != "DEFERRED" and self.write_gate is not None:
+            if not self.write_gate.acquire(timeout=self.busy_timeout):
+                raise OperationalError("database is locked")
+            self.holds_write_gate = True
+        try:
+            self._begin(mode)
+        except BaseException:
+            self._release_write_gate()
+            raise
+
+    def _begin(self, mode: str) -> None:
+        for attempt in range(self.lock_retries + 1):
+            try:
+                self.cursor().execute(f"BEGIN {mode}")
+                return
+            except OperationalError as error:
+                if "locked" not in str(error) or attempt == self.lock_retries:
+                    raise
+            # Jitter keeps workers that gave up together from retrying
+            # together.
+            time.sleep(random.uniform(0, 0.05 * 2**attempt))
+
+    def _release_write_gate(self) -> None:
+        if self.holds_write_gate:
+            self.holds_write_gate = False
+            self.write_gate.release()  # type: ignore
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_gate()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_gate()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_gate()
@@ -0,0 +1,120 @@
+"""Read replicas for views that only read.
+
+Views opt in with a `replica_reads = True` attribute. `ReplicaMiddleware`
+notes that for the current request and `ReplicaRouter` then sends its reads
+to a random alias of `DATABASE_REPLICAS`. Everything else, writes included,
+goes to the primary.
+
+Replicas lag behind, so a client that has just sent a POST would not see
+its own change. Every unsafe request sets a cookie that keeps the client's
+reads on the primary for `REPLICA_STICKY_SECONDS`, which has to be longer
+than the replication lag.
+"""
+
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = "primary_reads"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+@dataclass
+class Routing:
+    """Where reads of the current request go."""
+
+    sticky: bool = False
+    replica: bool = False
+
+
+_routing: ContextVar[Routing | None] = ContextVar("db_routing", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        replicas = settings.DATABASE_REPLICAS
+        if routing is None or not routing.replica or not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are saved to the primary too.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, migrated along with it.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Route reads of `replica_reads` views unless the client sticks."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # type: ignore
+            # A sync `process_view()` would be run in a thread.
+            self.process_view = self.aprocess_view
+        else:
+            self._is_coroutine = None
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        token = _routing.set(self.get_routing(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = _routing.set(self.get_routing(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.process_response(request, response)
+
+    def get_routing(self, request) -> Routing:
+        try:
+            until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            until = 0
+        return Routing(sticky=until > time.time())
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        view_class = getattr(view_func, "view_class", view_func)
+        if routing is not None and not routing.sticky:
+            routing.replica = request.method in SAFE_METHODS and getattr(
+                view_class, "replica_reads", False
+            )
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        ReplicaMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            sticky = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time() + sticky)),
+                max_age=sticky,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
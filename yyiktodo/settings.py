@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-v2j@q6(6!90@!^16f4ggv1wu1r=e9&bx!g3@3b7zo^o56tp0q@"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("YYIKTODO_DEBUG", "1") == "1"
 
 ALLOWED_HOSTS = []
 
@@ -38,16 +39,15 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     # installed
-    "debug_toolbar",
     "crispy_forms",
     "crispy_bootstrap5",
     # my apps
     "todo",
     "yyik_auth",
+    "yyik_tasks",
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     # default
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -56,8 +56,40 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # my middleware
+    "yyiktodo.routers.ReplicaMiddleware",
 ]
 
+# Serve collected static files when no web server fronts Django, see
+# `yyiktodo/static.py`. Goes right after security headers are set.
+SERVE_STATIC = os.environ.get("YYIKTODO_SERVE_STATIC") == "1"
+if SERVE_STATIC:
+    MIDDLEWARE.insert(1, "yyiktodo.static.StaticFilesMiddleware")
+
+# Serve read views with async queries. Turned on by `asgi.py`, as under WSGI
+# async views only add an event loop per request.
+TODO_ASYNC_VIEWS = os.environ.get("YYIKTODO_ASYNC_VIEWS") == "1"
+
+# Debug toolbar middleware is sync only and would put every ASGI request in
+# a thread for its whole duration.
+DEBUG_TOOLBAR = DEBUG and not TODO_ASYNC_VIEWS
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(0, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
+# Per view latency and SQL metrics, see `yyiktodo/metrics.py`. The
+# middleware goes first to time the whole request.
+METRICS = os.environ.get("YYIKTODO_METRICS", "1") == "1"
+METRICS_SLOW_REQUEST = float(os.environ.get("YYIKTODO_SLOW_REQUEST", "1.0"))
+# Addresses served `/metrics` without logging in as staff, none by default.
+METRICS_ALLOWED_IPS = [
+    address.strip()
+    for address in os.environ.get("YYIKTODO_METRICS_ALLOWED_IPS", "").split(",")
+    if address.strip()
+]
+if METRICS:
+    MIDDLEWARE.insert(0, "yyiktodo.metrics.MetricsMiddleware")
+
 ROOT_URLCONF = "yyiktodo.urls"
 
 TEMPLATES = [
@@ -82,12 +114,118 @@ WSGI_APPLICATION = "yyiktodo.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# SQLite set up for several workers, see `yyiktodo/db/backends/sqlite3`.
+# Pragmas can be overridden per environment, for example with
+# YYIKTODO_SQLITE_PRAGMAS="synchronous=full,mmap_size=0".
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    # Durable at checkpoints only, can't corrupt the database in WAL mode.
+    "synchronous": "normal",
+    # Milliseconds to wait for the write lock.
+    "busy_timeout": 5000,
+    "mmap_size": 128 * 1024 * 1024,
+    # Negative is in KiB, per connection.
+    "cache_size": -16000,
+}
+SQLITE_PRAGMAS.update(
+    pair.strip().split("=", 1)
+    for pair in os.environ.get("YYIKTODO_SQLITE_PRAGMAS", "").split(",")
+    if pair.strip()
+)
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "yyiktodo.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "pragmas": SQLITE_PRAGMAS,
+            "write_gate": True,
+        },
+    }
+}
+
+# Read replicas, see `yyiktodo/routers.py`. Locally each one is a read-only
+# copy of the primary file refreshed by `manage.py refresh_replica`.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get("YYIKTODO_REPLICAS", "0")) + 1):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        "ENGINE": "yyiktodo.db.backends.sqlite3",
+        "NAME": f"file:{BASE_DIR / f'db.{alias}.sqlite3'}?mode=ro",
+        "OPTIONS": {
+            # Replicas are copies in rollback journal mode, which can't be
+            # changed read-only.
+            "pragmas": {
+                name: value
+                for name, value in SQLITE_PRAGMAS.items()
+                if name != "journal_mode"
+            },
+        },
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+
+# Databases holding to-do lists partitioned by owner, see `todo/sharding.py`.
+# Locally each shard is another file next to the default database, which is
+# the first shard and the only one holding users. Replicas copy it only.
+TODO_SHARDS = ["default"]
+for number in range(1, int(os.environ.get("YYIKTODO_SHARDS", "1"))):
+    alias = f"shard{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / f"db.{alias}.sqlite3",
+    }
+    TODO_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ["todo.sharding.ShardRouter", "yyiktodo.routers.ReplicaRouter"]
+
+# Seconds a client reads from the primary after a write, longer than the
+# replication lag.
+REPLICA_STICKY_SECONDS = int(os.environ.get("YYIKTODO_STICKY_SECONDS", "10"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Rendered template fragments. Keys are versioned by `modified_at`, so
+    # stale entries are never read and just age out. Local-memory cache
+    # evicts least recently used keys once `MAX_ENTRIES` is reached.
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragments",
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "CULL_FREQUENCY": 10,
+        },
+    },
+    # Public profiles, see `todo/cache.py`. Versions are bumped in this cache
+    # by writers, so every process serving profiles must share it: files
+    # shared by the workers of one host, or Redis with YYIKTODO_REDIS_URL.
+    "profiles": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "profiles",
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
+    },
 }
+if REDIS_URL := os.environ.get("YYIKTODO_REDIS_URL"):
+    CACHES["profiles"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "profiles",
+    }
+
+
+# Sessions are only written on login and logout. Messages live in a cookie,
+# so showing one doesn't write the session either.
+SESSION_SAVE_EVERY_REQUEST = False
+MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
 
 
 # Password validation
@@ -128,6 +266,12 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# Filled by `manage.py build_static`.
+STATIC_ROOT = BASE_DIR / "staticfiles"
+# Hashed names need the manifest written by `build_static`, the debug
+# server serves files from `STATICFILES_DIRS` under their own names.
+if not DEBUG:
+    STATICFILES_STORAGE = "yyiktodo.static.CompressedManifestStorage"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
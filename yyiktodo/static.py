@@ -0,0 +1,259 @@
+"""Static files stored under hashed names with compressed copies.
+
+`manage.py build_static` vendors pinned third party assets into
+`static/vendor/` and runs `collectstatic`. Templates link them with the
+`vendored` tag, which uses the collected copy once it is in the manifest
+and the pinned CDN URL until then, so pages work before the vendored files
+are committed.
+
+With `CompressedManifestStorage`, used when `DEBUG` is off, every file is
+stored under a name with a hash of its content, names are recorded in
+`staticfiles.json`, and gzip copies, and brotli ones when `brotli` is
+installed, are written next to files worth compressing.
+
+`StaticFilesMiddleware` serves `STATIC_ROOT` when no web server fronts
+Django, turned on with `YYIKTODO_SERVE_STATIC=1`. Files are indexed once at
+start, so a request costs a dict lookup and no `stat()`. Clients get the
+smallest copy they accept. Hashed names never change content and are
+cached as immutable for a year, other names are revalidated.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Suffixes of copies by encoding, in order of preference.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+# Text and uncompressed formats, fonts and images are compressed already.
+COMPRESSIBLE = (".css", ".js", ".map", ".json", ".svg", ".ico", ".webmanifest")
+
+# Copies saving less than this share of the size aren't kept.
+MIN_SAVING = 0.05
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+CDN = "https://cdn.jsdelivr.net/npm/"
+
+
+@dataclass
+class Asset:
+    """Third party file kept in `static/vendor/`."""
+
+    url: str
+    path: str
+    # Subresource integrity hash the file is checked against.
+    integrity: str | None = None
+
+
+# Source maps are vendored as `collectstatic` follows their references.
+ASSETS = [
+    Asset(
+        "bootstrap@5.2.1/dist/css/bootstrap.min.css",
+        "bootstrap/css/bootstrap.min.css",
+        "sha384-iYQeCzEYFbKjA/T2uDLTpkwGzCiq6soy8tYaI1GyVh/UjpbCx/TYkiZhlZB6+fzT",
+    ),
+    Asset(
+        "bootstrap@5.2.1/dist/css/bootstrap.min.css.map",
+        "bootstrap/css/bootstrap.min.css.map",
+    ),
+    Asset(
+        "bootstrap@5.2.1/dist/js/bootstrap.bundle.min.js",
+        "bootstrap/js/bootstrap.bundle.min.js",
+        "sha384-u1OknCvxWvY5kfmNBILK2hRnQC3Pr17a+RTT6rIHI7NnikvbZlHgTPOOmMi466C8",
+    ),
+    Asset(
+        "bootstrap@5.2.1/dist/js/bootstrap.bundle.min.js.map",
+        "bootstrap/js/bootstrap.bundle.min.js.map",
+    ),
+    Asset(
+        "bootstrap-icons@1.9.1/font/bootstrap-icons.css",
+        "bootstrap-icons/bootstrap-icons.css",
+    ),
+    Asset(
+        "bootstrap-icons@1.9.1/font/fonts/bootstrap-icons.woff2",
+        "bootstrap-icons/fonts/bootstrap-icons.woff2",
+    ),
+    Asset(
+        "bootstrap-icons@1.9.1/font/fonts/bootstrap-icons.woff",
+        "bootstrap-icons/fonts/bootstrap-icons.woff",
+    ),
+]
+
+
+def integrity_of(data: bytes) -> str:
+    digest = hashlib.sha384(data).digest()
+    return "sha384-" + base64.b64encode(digest).decode()
+
+
+def vendored_url(asset: Asset) -> str:
+    """URL of the vendored copy of `asset`, its CDN URL if there is none.
+
+    Hashed copies are looked up in the manifest, which is read once. The
+    debug server serves files from `static/vendor/` as they are.
+    """
+    name = f"vendor/{asset.path}"
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None)
+    if hashed_files is not None:
+        vendored = name in hashed_files
+    else:
+        vendored = finders.find(name) is not None
+    return staticfiles_storage.url(name) if vendored else CDN + asset.url
+
+
+def compress(data: bytes) -> dict[str, bytes]:
+    """Return copies of `data` by encoding, skipping ones not much smaller."""
+    copies = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies["br"] = brotli.compress(data)
+    limit = len(data) * (1 - MIN_SAVING)
+    return {encoding: copy for encoding, copy in copies.items() if len(copy) < limit}
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Store hashed files along with their compressed copies."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Files are collected under their original names as well.
+        names = {*self.hashed_files, *self.hashed_files.values()}
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE):
+                self.save_copies(name)
+
+    def save_copies(self, name: str) -> None:
+        with self.open(name) as file:
+            data = file.read()
+        for encoding, copy in compress(data).items():
+            copy_name = name + ENCODINGS[encoding]
+            if self.exists(copy_name):
+                self.delete(copy_name)
+            self._save(copy_name, ContentFile(copy))
+
+
+@dataclass
+class StaticFile:
+    path: str
+    content_type: str
+    mtime: float
+    # Paths of compressed copies by encoding.
+    copies: dict[str, str] = field(default_factory=dict)
+
+
+def index_files(root: str) -> dict[str, StaticFile]:
+    """Map URL names of files under `root` to their paths and copies."""
+    files = {}
+    copy_suffixes = tuple(ENCODINGS.values())
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(copy_suffixes):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            content_type, _ = mimetypes.guess_type(filename)
+            files[name] = StaticFile(
+                path=path,
+                content_type=content_type or "application/octet-stream",
+                mtime=os.stat(path).st_mtime,
+                copies={
+                    encoding: path + suffix
+                    for encoding, suffix in ENCODINGS.items()
+                    if os.path.exists(path + suffix)
+                },
+            )
+    return files
+
+
+class StaticFilesMiddleware:
+    """Serve collected static files with long caching of hashed names."""
+
+    sync_capable = True
+    async_capable = True
+
+    # Matched as by `django.middleware.gzip.GZipMiddleware`.
+    accepts = {encoding: re.compile(rf"\b{encoding}\b") for encoding in ENCODINGS}
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SERVE_STATIC", False) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = index_files(settings.STATIC_ROOT)
+        self.immutable = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # type: ignore
+        else:
+            self._is_coroutine = None
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def serve(self, request) -> FileResponse | HttpResponseNotModified | None:
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if not request.path.startswith(self.prefix):
+            return None
+        name = request.path[len(self.prefix) :]
+        file = self.files.get(name)
+        if file is None:
+            return None
+        immutable = name in self.immutable
+        since = request.headers.get("If-Modified-Since")
+        if not immutable and not was_modified_since(since, file.mtime):
+            return HttpResponseNotModified()
+
+        accepted = request.headers.get("Accept-Encoding", "")
+        path, encoding = file.path, None
+        for copy_encoding, copy_path in file.copies.items():
+            if self.accepts[copy_encoding].search(accepted):
+                path, encoding = copy_path, copy_encoding
+                break
+        response = FileResponse(
+            open(path, "rb"),
+            content_type=file.content_type,
+            filename=os.path.basename(file.path),
+        )
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        if file.copies:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        response.headers["Last-Modified"] = http_date(file.mtime)
+        response.headers["Cache-Control"] = IMMUTABLE if immutable else REVALIDATE
+        return response
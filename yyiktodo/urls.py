@@ -13,7 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-import debug_toolbar
+
 from django.conf import settings
 from django.contrib import admin
 from django.shortcuts import redirect
@@ -26,7 +26,16 @@ urlpatterns = [
     path("index/", lambda request: redirect("todo:todo-list"), name="index"),
 ]
 
-if settings.DEBUG:
+if settings.METRICS:
+    from .metrics import metrics_view
+
+    urlpatterns += [
+        path("metrics", metrics_view, name="metrics"),
+    ]
+
+if settings.DEBUG_TOOLBAR:
+    import debug_toolbar
+
     urlpatterns += [
         path("__debug__/", include(debug_toolbar.urls)),
     ]